@@ -0,0 +1,278 @@
+"""Record a real API session to a cassette file and replay it offline.
+
+`RecordingApi` wraps the `Mastodon` client and appends every call, with its
+arguments, its sanitized result (or error) and how long it took, to a JSON
+lines file. `ReplayApi` serves a cassette back: calls are matched by method
+and arguments, in the order they were recorded, and each one takes as long
+as the original did (scaled by `latency_scale`). Run mastui with
+`--record-api session.jsonl` once, then `--replay-api session.jsonl` to
+replay the session deterministically.
+
+Sanitizing keeps the shape of the data, which is what performance depends
+on, but not its text: letters and digits in the text of posts, bios, names
+and alt texts are replaced, while markup, entities and :shortcodes: are
+kept. Private account fields (`source`, `email`) are dropped. Usernames
+and `acct` handles are scrambled the same way, and so is the handle in
+profile links (`https://host/@name`, `https://host/users/name`) wherever a
+link appears. Hosts, ids and media URLs are kept. Positional arguments are
+sanitized by the name of their parameter, so a search query passed
+positionally is scrambled like `q=`; strings for parameters that can't be
+named are always scrambled.
+
+The rate limit the server reported after each call is recorded too, and
+replayed as the `ratelimit_*` attributes of `ReplayApi`.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from time import monotonic, perf_counter, sleep, time
+import inspect
+import json
+import logging
+import re
+import threading
+
+from mastodon import Mastodon
+from mastodon import errors as mastodon_errors
+from mastodon.errors import MastodonAPIError
+
+from mastui import __version__
+
+log = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+TEXT_KEYS = frozenset(
+    {"content", "spoiler_text", "note", "display_name", "description", "title", "text", "status", "q"}
+)
+HANDLE_KEYS = frozenset({"username", "acct"})
+PRIVATE_KEYS = frozenset({"source", "email"})
+# Markup, entities, custom emoji shortcodes and URLs are kept as they are.
+_KEEP = re.compile(r"(<[^>]*>|&#?\w+;|:\w+:|https?://[^\s<\"]+)")
+_UPPER = re.compile(r"[A-Z]")
+_LOWER = re.compile(r"[a-z]")
+_DIGIT = re.compile(r"[0-9]")
+# The account handle in a profile link, e.g. https://host/@name/123.
+_LINK_HANDLE = re.compile(r"(https?://[^/\s<\"]+/(?:@|users/))([^/?#\s<\"]+)")
+_DATETIME = "__datetime__"
+
+
+def scramble_text(text: str) -> str:
+    """Replace the letters and digits of `text`, keeping its markup and length."""
+    parts = _KEEP.split(text)
+    for index in range(0, len(parts), 2):
+        part = _LOWER.sub("x", parts[index])
+        part = _UPPER.sub("X", part)
+        parts[index] = _DIGIT.sub("0", part)
+    return "".join(parts)
+
+
+def _scramble_link_handles(text: str) -> str:
+    return _LINK_HANDLE.sub(lambda match: match.group(1) + scramble_text(match.group(2)), text)
+
+
+def sanitize(value, key: str | None = None):
+    """Return a JSON-ready copy of an API value with private text removed."""
+    if isinstance(value, dict):
+        return {
+            str(name): sanitize(item, str(name))
+            for name, item in value.items()
+            if name not in PRIVATE_KEYS
+        }
+    if isinstance(value, (list, tuple)):
+        return [sanitize(item, key) for item in value]
+    if isinstance(value, datetime):
+        return {_DATETIME: value.isoformat()}
+    if isinstance(value, str):
+        if key in TEXT_KEYS or key in HANDLE_KEYS:
+            value = scramble_text(value)
+        return _scramble_link_handles(value)
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+@lru_cache(maxsize=None)
+def _parameter_names(method: str) -> tuple[str, ...]:
+    """The positional parameter names of a `Mastodon` client method."""
+    try:
+        parameters = inspect.signature(getattr(Mastodon, method)).parameters
+    except (AttributeError, TypeError, ValueError):
+        return ()
+    return tuple(name for name in parameters if name != "self")
+
+
+def sanitize_args(method: str, args) -> list:
+    """Sanitize the positional arguments of a call to `method`, by parameter name."""
+    names = _parameter_names(method)
+    sanitized = []
+    for index, arg in enumerate(args):
+        if index < len(names):
+            sanitized.append(sanitize(arg, names[index]))
+        elif isinstance(arg, str):
+            sanitized.append(scramble_text(arg))
+        else:
+            sanitized.append(sanitize(arg))
+    return sanitized
+
+
+def _restore(value):
+    """Undo the datetime tagging of `sanitize`."""
+    if isinstance(value, dict):
+        if len(value) == 1 and _DATETIME in value:
+            return datetime.fromisoformat(value[_DATETIME])
+        return {name: _restore(item) for name, item in value.items()}
+    if isinstance(value, list):
+        return [_restore(item) for item in value]
+    return value
+
+
+def _ratelimit(api) -> dict | None:
+    """The rate limit a client last saw, with the reset relative to now."""
+    remaining = getattr(api, "ratelimit_remaining", None)
+    limit = getattr(api, "ratelimit_limit", None)
+    reset = getattr(api, "ratelimit_reset", None)
+    if not (isinstance(remaining, int) and isinstance(limit, int) and isinstance(reset, (int, float))):
+        return None
+    return {"remaining": remaining, "limit": limit, "reset_in": reset - time()}
+
+
+def _call_key(method: str, args: list, kwargs: dict) -> str:
+    return json.dumps([method, args, kwargs], sort_keys=True)
+
+
+class RecordingApi:
+    """Forwards calls to a `Mastodon` client and records them to `path`."""
+
+    def __init__(self, api, path: Path):
+        self._api = api
+        self._path = Path(path)
+        self._lock = threading.Lock()
+        self._started = monotonic()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self._path.open("w", encoding="utf-8")
+        self._write(
+            {
+                "cassette": CASSETTE_VERSION,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "mastui": __version__,
+                "api_base_url": getattr(api, "api_base_url", None),
+            }
+        )
+        log.info(f"Recording API calls to {self._path}")
+
+    def _write(self, entry: dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._api, name)
+        if name.startswith("_") or not callable(attribute) or name.startswith("stream_"):
+            return attribute
+
+        def recorded(*args, **kwargs):
+            entry = {
+                "at": monotonic() - self._started,
+                "method": name,
+                "args": sanitize_args(name, args),
+                "kwargs": sanitize(kwargs),
+            }
+            start = perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as e:
+                entry["duration"] = perf_counter() - start
+                entry["error"] = {"type": type(e).__name__, "message": str(e)}
+                entry["ratelimit"] = _ratelimit(self._api)
+                self._write(entry)
+                raise
+            entry["duration"] = perf_counter() - start
+            entry["result"] = sanitize(result)
+            entry["ratelimit"] = _ratelimit(self._api)
+            self._write(entry)
+            return result
+
+        return recorded
+
+
+class ReplayApi:
+    """Serves the calls recorded in a cassette, with their original latency.
+
+    A call gets the next unused recording with the same method and
+    arguments, or else the next one of the same method (ids and queries
+    differ between sessions), or else the last recording again. Calls that
+    were never recorded raise a `MastodonAPIError`. Only `Mastodon` methods
+    are replayed; other attributes raise `AttributeError`, except the
+    `ratelimit_*` ones, which follow the recorded rate limit.
+    """
+
+    def __init__(self, path: Path, latency_scale: float = 1.0):
+        self._path = Path(path)
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._by_call: dict[str, deque] = defaultdict(deque)
+        self._by_method: dict[str, deque] = defaultdict(deque)
+        self._last: dict[str, dict] = {}
+        self.misses = 0
+        self.ratelimit_remaining: int | None = None
+        self.ratelimit_limit: int | None = None
+        self.ratelimit_reset: float | None = None
+
+        with self._path.open(encoding="utf-8") as file:
+            header = json.loads(file.readline() or "{}")
+            if header.get("cassette") != CASSETTE_VERSION:
+                raise ValueError(f"{self._path} is not a version {CASSETTE_VERSION} cassette")
+            self.api_base_url = header.get("api_base_url")
+            count = 0
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._by_call[_call_key(entry["method"], entry["args"], entry["kwargs"])].append(entry)
+                self._by_method[entry["method"]].append(entry)
+                count += 1
+        log.info(f"Replaying {count} API calls from {self._path}")
+
+    def _take(self, method: str, args: list, kwargs: dict) -> dict | None:
+        with self._lock:
+            for queue in (self._by_call.get(_call_key(method, args, kwargs)), self._by_method.get(method)):
+                while queue:
+                    entry = queue.popleft()
+                    if not entry.get("used"):
+                        entry["used"] = True
+                        self._last[method] = entry
+                        return entry
+            self.misses += 1
+            return self._last.get(method)
+
+    def _replay_ratelimit(self, entry: dict) -> None:
+        ratelimit = entry.get("ratelimit")
+        if ratelimit:
+            self.ratelimit_remaining = ratelimit["remaining"]
+            self.ratelimit_limit = ratelimit["limit"]
+            self.ratelimit_reset = time() + ratelimit["reset_in"]
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not callable(getattr(Mastodon, name, None)):
+            raise AttributeError(name)
+
+        def replayed(*args, **kwargs):
+            entry = self._take(name, sanitize_args(name, args), sanitize(kwargs))
+            if entry is None:
+                raise MastodonAPIError(f"{name} is not in the cassette {self._path}")
+            if self.latency_scale > 0:
+                sleep(entry["duration"] * self.latency_scale)
+            self._replay_ratelimit(entry)
+            error = entry.get("error")
+            if error:
+                error_class = getattr(mastodon_errors, error["type"], MastodonAPIError)
+                if not (isinstance(error_class, type) and issubclass(error_class, Exception)):
+                    error_class = MastodonAPIError
+                raise error_class(error["message"])
+            return _restore(entry["result"])
+
+        return replayed
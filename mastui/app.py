@@ -10,6 +10,7 @@ from mastui.post import PostScreen
 from mastui.edit_post_screen import EditPostScreen
 from mastui.splash import SplashScreen
 from mastui.mastodon_api import get_api
+from mastui.api_cassette import RecordingApi, ReplayApi
 from mastui.timeline import Timelines, Timeline
 from mastui.widgets import (
     Post,
@@ -29,6 +30,7 @@ from mastui.hashtag_timeline import HashtagTimeline
 from mastui.conversation_screen import ConversationScreen
 from mastui.keybind_manager import KeybindManager
 from mastui.log_viewer_screen import LogViewerScreen
+from mastui.performance_hud import PerformanceHud
 from mastui.logging_config import setup_logging
 from mastui.retro import retro_theme_builtin
 from mastui.theme_manager import load_custom_themes
@@ -45,12 +47,26 @@ from mastui.messages import (
     FocusPreviousTimeline,
     ViewProfile,
     ViewHashtag,
+    ViewImage,
     ViewConversation,
     ConversationRead,
 )
 from mastui.cache import Cache
+from mastui.metrics import InstrumentedApi, frame_times, reset_session_metrics
+from mastui.metrics_export import METRICS_FILE_NAME, metrics_exporter
+from mastui.watchdog import stall_watchdog
+from mastui.tracing import tracer
+from mastui.profiling import PROFILER_MODES, Profiler, profile_path
+from mastui.render_cache import clear_render_caches
+from mastui import image_pool
+from mastui.image_cache import ENCODED_DIR_NAME, MB, decoded_images, encoded_images
+from mastui.image_store import get_store, needs_migration
 from mastui.url_selector import URLSelectorScreen
+from mastui.image_viewer_screen import ImageViewerScreen
+from mastui.view_models import build_media_views
 from mastodon.errors import MastodonAPIError
+from functools import partial
+from time import perf_counter
 import logging
 import argparse
 import os
@@ -87,11 +103,27 @@ class Mastui(App):
     _profile_load_generation: int
     _login_cancel_callback: Callable[[str], None] | None
 
-    def __init__(self, action=None, ssl_verify=True, debug=False):
+    def __init__(
+        self,
+        action=None,
+        ssl_verify=True,
+        debug=False,
+        api_base_url=None,
+        record_api=None,
+        replay_api=None,
+        replay_latency_scale=1.0,
+        session_profile_mode=None,
+    ):
         super().__init__()
         self.action = action
         self.ssl_verify = ssl_verify
         self._debug = debug
+        self.api_base_url = api_base_url
+        self.record_api = record_api
+        self.replay_api = replay_api
+        self.replay_latency_scale = replay_latency_scale
+        self.session_profile_mode = session_profile_mode
+        self._profiling_window: Profiler | None = None
         self._bound_keys = set()
         self.autocomplete_provider = None
         self._timelines_widget = None
@@ -120,6 +152,13 @@ class Mastui(App):
             log.debug("No 'add_account' action specified, selecting profile.")
             self.select_profile()
 
+    def on_unmount(self) -> None:
+        """Called when the app shuts down."""
+        stall_watchdog.stop()
+        metrics_exporter.stop()
+        if self._profiling_window is not None:
+            self._profiling_window.stop(profile_path("window", self._profiling_window.mode))
+
     def select_profile(self):
         """Select a profile to use, or load the last used one."""
         migrated = profile_manager.migrate_old_profile()
@@ -160,6 +199,29 @@ class Mastui(App):
         log.debug(f"Profile path: {profile_path}")
         self.config = Config(profile_path)
         self.config.ssl_verify = self.ssl_verify
+        # Like tracing and profiling, the watchdog is a diagnostic: it only
+        # runs with --debug or when asked for.
+        if self.config.stall_watchdog or self._debug:
+            stall_watchdog.start(self.config.stall_threshold_ms)
+        else:
+            stall_watchdog.stop()
+        decoded_images.set_budget(self.config.image_memory_budget_mb * MB)
+        encoded_images.configure(
+            self.config.image_cache_dir / ENCODED_DIR_NAME
+            if self.config.image_encoded_disk_cache
+            else None
+        )
+        image_store = get_store(self.config.media_cache_dir, self.config.media_cache_max_mb)
+        if needs_migration(self.config.image_cache_dir):
+            self.run_worker(
+                partial(
+                    image_store.migrate_profile_cache,
+                    self.config.profile_name,
+                    self.config.image_cache_dir,
+                ),
+                thread=True,
+                group="image-migration",
+            )
         log.debug(
             f"Loaded access token: {'Yes' if self.config.mastodon_access_token else 'No'}"
         )
@@ -196,7 +258,18 @@ class Mastui(App):
         self.theme_changed_signal.subscribe(self, self.on_theme_changed)
 
         self.push_screen(SplashScreen())
-        self.api = get_api(self.config)
+        api = self.create_api()
+        self.api = InstrumentedApi(api) if api else None
+        if self.config.metrics_export:
+            metrics_exporter.start(
+                profile_path / METRICS_FILE_NAME,
+                cache=self.cache,
+                api=self.api,
+                store=image_store,
+                profile=profile_name,
+                interval=self.config.metrics_export_interval,
+                port=self.config.metrics_port,
+            )
         if self.api:
             self.run_worker(
                 lambda generation=profile_load_generation: self._load_profile_data(
@@ -209,6 +282,22 @@ class Mastui(App):
             log.error("API object could not be created. Forcing login.")
             self.call_later(self.show_login_screen)
 
+    def create_api(self):
+        """Return the API client for the loaded profile, or None without a token."""
+        if self.replay_api:
+            try:
+                return ReplayApi(self.replay_api, self.replay_latency_scale)
+            except (OSError, ValueError) as e:
+                log.error(f"Cannot replay {self.replay_api}: {e}", exc_info=True)
+                self.notify(f"Cannot replay {self.replay_api}: {e}", severity="error")
+                return None
+        if self.api_base_url:
+            log.warning(f"Sending API requests to {self.api_base_url}")
+        api = get_api(self.config, self.api_base_url)
+        if api and self.record_api:
+            api = RecordingApi(api, self.record_api)
+        return api
+
     def _load_profile_data(self, generation: int):
         """Worker to fetch initial profile data in the background."""
         if generation != self._profile_load_generation:
@@ -259,10 +348,13 @@ class Mastui(App):
         # Once data is loaded, show the timelines
         self.call_from_thread(self.show_timelines, generation)
 
-        # Start other background tasks
+        # Start other background tasks (timers and workers need the event loop)
         if self.config.auto_prune_cache:
-            self.run_worker(self.prune_cache, thread=True, exclusive=True)
-        self.set_interval(300, self.check_for_dms)  # Check for DMs every 5 minutes
+            self.call_from_thread(
+                self.run_worker, self.prune_cache, thread=True, exclusive=True
+            )
+        # Check for DMs every 5 minutes
+        self.call_from_thread(self.set_interval, 300, self.check_for_dms)
         self.call_from_thread(self.check_for_dms)  # Also check right after startup
 
     def check_for_dms(self):
@@ -318,7 +410,9 @@ class Mastui(App):
     def prune_cache(self):
         """Prunes the image cache."""
         try:
-            count = self.cache.prune_image_cache()
+            count = self.cache.prune_image_cache(
+                store=get_store(self.config.media_cache_dir, self.config.media_cache_max_mb)
+            )
             if count > 0:
                 self.notify(f"Pruned {count} items from the image cache.")
         except Exception as e:
@@ -502,8 +596,9 @@ class Mastui(App):
     def action_refresh_timelines(self) -> None:
         """An action to refresh the timelines."""
         log.info("Refreshing all timelines...")
+        request_id = tracer.new_request("refresh_timelines")
         for timeline in self.query(Timeline):
-            timeline.refresh_posts()
+            timeline.refresh_posts(request_id)
 
     def action_compose_post(self) -> None:
         """An action to compose a new post."""
@@ -1087,17 +1182,15 @@ class Mastui(App):
         if focused:
             focused.first().go_to_top()
 
-    def action_show_urls(self) -> None:
-        """Find the selected post and show the URL selector screen."""
-        post_to_extract = None
-
+    def _selected_post_data(self) -> dict | None:
+        """Return the post data of the selected item in a modal or focused timeline."""
         # Case 1: A modal screen is active (e.g., Thread, Conversation)
         if isinstance(self.screen, ModalScreen) and hasattr(
             self.screen, "selected_item"
         ):
             selected_item = self.screen.selected_item
             if isinstance(selected_item, Post):
-                post_to_extract = selected_item.post
+                return selected_item.post
 
         # Case 2: A main timeline is focused
         else:
@@ -1105,11 +1198,16 @@ class Mastui(App):
             if focused:
                 selected_item = focused.first().content_container.selected_item
                 if isinstance(selected_item, Post):
-                    post_to_extract = selected_item.post
+                    return selected_item.post
                 elif isinstance(
                     selected_item, Notification
                 ) and selected_item.notif.get("status"):
-                    post_to_extract = selected_item.notif["status"]
+                    return selected_item.notif["status"]
+        return None
+
+    def action_show_urls(self) -> None:
+        """Find the selected post and show the URL selector screen."""
+        post_to_extract = self._selected_post_data()
 
         if post_to_extract:
             self.pause_timers()
@@ -1119,6 +1217,26 @@ class Mastui(App):
         else:
             self.notify("No post selected or post has no content.", severity="warning")
 
+    def action_view_image(self) -> None:
+        """Show the images of the selected post in the full-size viewer."""
+        post_data = self._selected_post_data()
+        status = (post_data.get("reblog") or post_data) if post_data else {}
+        images = [media for media in build_media_views(status) if media.type == "image"]
+        if images:
+            self.post_message(ViewImage(images))
+        else:
+            self.notify("No post selected or post has no images.", severity="warning")
+
+    @on(ViewImage)
+    def on_view_image(self, message: ViewImage) -> None:
+        if isinstance(self.screen, ImageViewerScreen):
+            return
+        self.pause_timers()
+        self.push_screen(
+            ImageViewerScreen(message.media, self.config, index=message.index),
+            lambda _: self.resume_timers(),
+        )
+
     def action_switch_profile(self) -> None:
         """An action to switch the user profile."""
         if isinstance(self.screen, ModalScreen):
@@ -1204,6 +1322,11 @@ class Mastui(App):
         self.notified_dm_ids = set()
         self.sub_title = ""
         self.autocomplete_provider = None
+        metrics_exporter.stop()
+        reset_session_metrics()
+        clear_render_caches()
+        decoded_images.clear()
+        encoded_images.clear()
 
     def pause_timers(self):
         """Pauses all timeline timers."""
@@ -1221,6 +1344,44 @@ class Mastui(App):
             if not isinstance(self.screen, LogViewerScreen):
                 self.push_screen(LogViewerScreen(self.log_file_path))
 
+    def action_toggle_performance_hud(self) -> None:
+        """Show or hide the performance HUD over the current screen."""
+        shown_here = bool(self.screen.query(PerformanceHud))
+        for screen in self.screen_stack:
+            screen.query(PerformanceHud).remove()
+        if not shown_here:
+            self.screen.mount(PerformanceHud(id="performance-hud"))
+
+    def action_toggle_profiling(self) -> None:
+        """Start a profiling window, or stop it and write its profile."""
+        if self._profiling_window is not None:
+            window, self._profiling_window = self._profiling_window, None
+            path = window.stop(profile_path("window", window.mode))
+            if path:
+                self.notify(f"Profile written to {path}", title="Profiling")
+            else:
+                self.notify("Could not write the profile.", severity="error")
+            return
+
+        mode = self.config.profiler_mode if self.config else "sample"
+        if mode not in PROFILER_MODES:
+            log.warning(f"Unknown PROFILER_MODE {mode!r}, sampling instead")
+            mode = "sample"
+        if mode == "cprofile" and self.session_profile_mode == "cprofile":
+            # Only one cProfile profiler can run on a thread at a time.
+            mode = "sample"
+        self._profiling_window = Profiler(mode)
+        self._profiling_window.start()
+        key = self.keybind_manager.get_key("toggle_profiling").upper()
+        self.notify(f"Profiling ({mode}), press {key} again to stop.", title="Profiling")
+
+    def _display(self, screen, renderable) -> None:
+        # Times writing each frame to the terminal, for the performance HUD.
+        start = perf_counter()
+        super()._display(screen, renderable)
+        if renderable is not None and not self.is_headless:
+            frame_times.observe((perf_counter() - start) * 1000)
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -1234,14 +1395,76 @@ def main():
     )
     parser.add_argument("--debug", action="store_true", help="Enable debug logging.")
     parser.add_argument("--add-account", action="store_true", help="Add a new account.")
+    parser.add_argument(
+        "--api-base-url",
+        help="Send API requests to this URL instead of the profile's instance "
+        "(for testing against `mastui-bench serve`).",
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument(
+        "--record-api",
+        metavar="FILE",
+        help="Record the (sanitized) API calls of this session to a cassette file.",
+    )
+    cassette.add_argument(
+        "--replay-api",
+        metavar="FILE",
+        help="Serve API calls from a recorded cassette instead of the instance.",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="Scale the recorded latency when replaying (0 replays without delays).",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write a Chrome trace-event file of this session (open it in Perfetto).",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="sample",
+        choices=PROFILER_MODES,
+        metavar="MODE",
+        help="Profile the whole session with the sampling profiler (default) or "
+        "cProfile (--profile cprofile), and write the profile next to the log file.",
+    )
     args = parser.parse_args()
 
     log_file_path = setup_logging(debug=args.debug)
 
     action = "add_account" if args.add_account else None
-    app = Mastui(action=action, ssl_verify=args.ssl_verify, debug=args.debug)
+    app = Mastui(
+        action=action,
+        ssl_verify=args.ssl_verify,
+        debug=args.debug,
+        api_base_url=args.api_base_url,
+        record_api=args.record_api,
+        replay_api=args.replay_api,
+        replay_latency_scale=args.replay_speed,
+        session_profile_mode=args.profile,
+    )
     app.log_file_path = log_file_path
-    app.run()
+    if args.trace:
+        tracer.start(args.trace)
+    session_profiler = None
+    if args.profile:
+        session_profiler = Profiler(args.profile)
+        session_profiler.start()
+    session_profile = None
+    try:
+        app.run()
+    finally:
+        if session_profiler:
+            session_profile = session_profiler.stop(profile_path("session", args.profile))
+        image_pool.shutdown_pool()
+        tracer.stop()
 
     if app.log_file_path:
         print(f"Log file written to: {app.log_file_path}")
+    if args.trace:
+        print(f"Trace written to: {args.trace}")
+    if session_profile:
+        print(f"Profile written to: {session_profile}")
@@ -0,0 +1,6 @@
+"""Offline benchmarks for mastui's hot paths.
+
+Nothing in this package talks to a real Mastodon instance; all data comes
+from the synthetic fixtures in `mastui.benchmarks.fixtures`. Run the suite
+with `mastui-bench` (see `mastui.benchmarks.cli`).
+"""
@@ -0,0 +1,270 @@
+"""Headless benchmarks of the whole app, driven by Textual's pilot.
+
+Each scenario starts a real `Mastui` in `App.run_test()` with a temporary
+profile whose API client is a `FakeApi`, so startup, timeline fetching,
+caching and mounting all run the production code paths without a network.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import asyncio
+import statistics
+
+from mastui.app import Mastui
+from mastui.benchmarks.fake_api import FakeApi
+from mastui.benchmarks.harness import BenchResult, benchmark
+from mastui.profile_manager import profile_manager
+from mastui.splash import SplashScreen
+from mastui.timeline import Timeline
+
+APP_SIZE = (160, 50)
+PROFILE_NAME = "bench@example.social"
+PROFILE_ENV = "\n".join(
+    [
+        "MASTODON_HOST=example.social",
+        "MASTODON_ACCESS_TOKEN=bench-token",
+        "HOME_AUTO_REFRESH=off",
+        "LOCAL_AUTO_REFRESH=off",
+        "NOTIFICATIONS_AUTO_REFRESH=off",
+        "FEDERATED_AUTO_REFRESH=off",
+        "AUTO_PRUNE_CACHE=off",
+        "",
+    ]
+)
+SCROLL_POSTS = 40
+SCROLL_BURST = 10
+REFRESH_POSTS = 50
+FRAME_MS = 1000 / 60
+POLL_SECONDS = 0.001
+TIMEOUT_SECONDS = 30
+
+
+class BenchMastui(Mastui):
+    """`Mastui` talking to a `FakeApi`, with the splash and update check skipped.
+
+    Without `api` it uses the real client, e.g. against a mock server given
+    as `api_base_url`.
+    """
+
+    SPLASH_HOLD_SECONDS = 0.01  # a zero-second timer divides by zero
+
+    def __init__(self, api: FakeApi | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.fake_api = api
+        self.created_at = perf_counter()
+        self.initialized_at: dict[str, float] = {}
+
+    def create_api(self):
+        if self.fake_api is None:
+            return super().create_api()
+        return self.fake_api
+
+    def schedule_update_checks(self, initial: bool = False) -> None:
+        pass  # never ask PyPI from a benchmark
+
+    def notify_timeline_initialized(self, timeline_id: str) -> None:
+        self.initialized_at.setdefault(timeline_id, perf_counter())
+
+
+@contextmanager
+def isolated_profile(root: Path, env: str = PROFILE_ENV):
+    """Point the profile manager at `root`, holding a single bench profile."""
+    attributes = ("config_dir", "profiles_dir", "last_profile_file", "media_cache_dir")
+    saved = {name: getattr(profile_manager, name) for name in attributes}
+    profile_manager.config_dir = root
+    profile_manager.profiles_dir = root / "profiles"
+    profile_manager.last_profile_file = root / "last_profile.txt"
+    profile_manager.media_cache_dir = root / "media_cache"
+    try:
+        profile_manager.profiles_dir.mkdir(parents=True)
+        profile_manager.create_profile(PROFILE_NAME, env)
+        profile_manager.set_last_profile(PROFILE_NAME)
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(profile_manager, name, value)
+
+
+class FrameMonitor:
+    """Measure how late the event loop wakes up for each 60 Hz frame.
+
+    A frame interval of two frame times or more means the app could not
+    have repainted in between: every whole frame past the first is dropped.
+    """
+
+    def __init__(self, frame_ms: float = FRAME_MS):
+        self.frame_ms = frame_ms
+        self.intervals_ms: list[float] = []
+        self._task = None
+
+    async def _run(self):
+        last = perf_counter()
+        while True:
+            await asyncio.sleep(self.frame_ms / 1000)
+            now = perf_counter()
+            self.intervals_ms.append((now - last) * 1000)
+            last = now
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    @property
+    def dropped(self) -> int:
+        return sum(max(0, round(interval / self.frame_ms) - 1) for interval in self.intervals_ms)
+
+
+def _run_mastui(scenario, api: FakeApi | None = None):
+    async def run():
+        with TemporaryDirectory(prefix="mastui-bench-") as tmp, isolated_profile(Path(tmp)):
+            app = BenchMastui(api or FakeApi())
+            async with app.run_test(size=APP_SIZE) as pilot:
+                return await scenario(app, pilot)
+
+    return asyncio.run(run())
+
+
+async def wait_until(predicate, timeout: float = TIMEOUT_SECONDS):
+    deadline = perf_counter() + timeout
+    while not predicate():
+        if perf_counter() > deadline:
+            raise TimeoutError("The app did not reach the expected state")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+def _idle(timeline: Timeline) -> bool:
+    return timeline.initial_render_done and timeline._mounter is None and not timeline.loading_more
+
+
+async def _home_timeline(app, pilot, posts: int = 0) -> Timeline:
+    """Wait for the home timeline to render, load `posts` of it and focus it."""
+    await wait_until(lambda: app.query("#home") and not isinstance(app.screen, SplashScreen))
+    timeline = app.query_one("#home", Timeline)
+    await wait_until(lambda: _idle(timeline))
+    while len(timeline.post_ids) < posts:
+        loaded = len(timeline.post_ids)
+        timeline.load_older_posts()
+        await wait_until(lambda: _idle(timeline) and len(timeline.post_ids) > loaded)
+    timeline.focus()
+    timeline.content_container.select_first_item()
+    await pilot.pause()
+    return timeline
+
+
+def _items(timeline: Timeline) -> int:
+    return len(timeline.content_container.query("Post, Notification, ConversationSummary"))
+
+
+@benchmark("app.time_to_first_post", group="app")
+def bench_time_to_first_post(rounds: int) -> BenchResult:
+    """Mastui startup, from creating the app until the home timeline shows a post."""
+
+    async def scenario(app, pilot):
+        await wait_until(lambda: "home" in app.initialized_at)
+        return (app.initialized_at["home"] - app.created_at) * 1000
+
+    samples = [_run_mastui(scenario) for _ in range(rounds + 1)][1:]
+    return BenchResult("app.time_to_first_post", samples, 1, "starts")
+
+
+@benchmark("app.navigation", group="app")
+def bench_navigation(rounds: int) -> BenchResult:
+    """Latency of one down/up keystroke moving the selection through 40 posts.
+
+    Timed from dispatching the key to the selection changing. `pilot.press`
+    also waits for the whole app to go idle, so it is only used untimed, to
+    let the app settle between keystrokes.
+    """
+
+    async def scenario(app, pilot):
+        timeline = await _home_timeline(app, pilot, SCROLL_POSTS)
+        content = timeline.content_container
+        last = _items(timeline) - 1
+        position, key = 0, "down"
+        samples = []
+        for index in range(rounds + 1):
+            if position in (0, last):
+                key = "down" if position == 0 else "up"
+            before = content.selected_item
+            start = perf_counter()
+            app.simulate_key(key)
+            await wait_until(lambda: content.selected_item is not before)
+            if index:
+                samples.append((perf_counter() - start) * 1000)
+            await pilot.pause()
+            position += 1 if key == "down" else -1
+        return samples
+
+    return BenchResult("app.navigation", _run_mastui(scenario), 1, "keys")
+
+
+@benchmark("app.refresh_50", group="app")
+def bench_refresh(rounds: int) -> BenchResult:
+    """Refreshing the home timeline after 50 posts were published, until mounted.
+
+    The timeline asks for one page of newer posts, so not all 50 are shown;
+    the throughput counts the posts actually mounted.
+    """
+
+    async def scenario(app, pilot):
+        timeline = await _home_timeline(app, pilot)
+        samples = []
+        mounted = []
+        for index in range(rounds + 1):
+            newest = app.fake_api.add_posts(REFRESH_POSTS)[0]["id"]
+            known = set(timeline.post_ids)
+            start = perf_counter()
+            timeline.refresh_posts()
+            await wait_until(lambda: timeline.latest_post_id == newest and _idle(timeline))
+            if index:
+                samples.append((perf_counter() - start) * 1000)
+                mounted.append(len(timeline.post_ids - known))
+        return samples, mounted
+
+    samples, mounted = _run_mastui(scenario)
+    return BenchResult(
+        "app.refresh_50", samples, round(statistics.fmean(mounted)) if mounted else 0, "posts"
+    )
+
+
+@benchmark("app.scroll_frames", group="app")
+def bench_scroll_frames(rounds: int) -> BenchResult:
+    """Frame intervals while holding down, then up, for 10 posts; counts dropped frames."""
+
+    async def scenario(app, pilot):
+        await _home_timeline(app, pilot, SCROLL_POSTS)
+
+        async def burst(key):
+            for _ in range(SCROLL_BURST):
+                await pilot.press(key)
+
+        await burst("down")  # warm up
+        await burst("up")
+        monitor = FrameMonitor()
+        monitor.start()
+        for index in range(rounds):
+            await burst("down" if index % 2 == 0 else "up")
+        await monitor.stop()
+        return monitor
+
+    monitor = _run_mastui(scenario)
+    return BenchResult(
+        "app.scroll_frames",
+        monitor.intervals_ms,
+        1,
+        "frames",
+        counters={
+            "frames_dropped": monitor.dropped,
+            "frames_dropped_per_round": monitor.dropped / rounds if rounds else 0,
+        },
+    )
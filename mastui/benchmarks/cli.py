@@ -0,0 +1,247 @@
+"""`mastui-bench`: run the offline benchmark suite and compare result files.
+
+    mastui-bench list
+    mastui-bench run [-k PATTERN ...] [--rounds N] [--output results.json]
+    mastui-bench compare base.json new.json [--threshold 0.1] [--metric p50_ms]
+    mastui-bench serve [--port 8765] [--latency-ms 80 --jitter-ms 40] [--error-rate 0.05]
+    mastui-bench soak [--duration 600] [--speed 60] [--output soak.json]
+
+`compare` exits with status 1 if any benchmark got slower by more than the
+threshold, so it can gate CI. `serve` runs a mock Mastodon instance for
+`mastui --api-base-url`. `soak` drives hours of simulated use against it and
+exits with status 1 if memory, threads, workers or widgets grow too much.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import json
+import logging
+import sys
+
+from mastui.benchmarks import app_scenarios, suite  # noqa: F401  (registers the benchmarks)
+from mastui.benchmarks.harness import (
+    DEFAULT_ROUNDS,
+    DEFAULT_THRESHOLD,
+    compare_results,
+    load_results,
+    select,
+    write_results,
+)
+from mastui.benchmarks.mock_server import DEFAULT_PORT
+
+
+def cmd_list(args) -> int:
+    for bench in select(None):
+        print(f"{bench.name:<28} {bench.description}")
+    return 0
+
+
+def cmd_run(args) -> int:
+    benchmarks = select(args.k)
+    if not benchmarks:
+        print("No benchmarks match.", file=sys.stderr)
+        return 2
+
+    print(
+        f"{'benchmark':<28} {'rounds':>6} {'p50 ms':>9} {'p90 ms':>9} "
+        f"{'p99 ms':>9} {'max ms':>9} {'throughput':>16}"
+    )
+    results = []
+    for bench in benchmarks:
+        result = bench.run(args.rounds)
+        results.append(result)
+        summary = result.summary()
+        print(
+            f"{result.name:<28} {summary['rounds']:>6} {summary['p50_ms']:>9.2f} "
+            f"{summary['p90_ms']:>9.2f} {summary['p99_ms']:>9.2f} {summary['max_ms']:>9.2f} "
+            f"{summary['throughput']:>10.2f} {result.unit}/s"
+        )
+        for counter, value in result.counters.items():
+            print(f"  {counter}: {value:g}")
+    if args.output:
+        write_results(Path(args.output), results)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    try:
+        base = load_results(Path(args.base))
+        new = load_results(Path(args.new))
+        rows = compare_results(base, new, args.threshold, args.metric)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Cannot compare results: {e}", file=sys.stderr)
+        return 2
+
+    print(f"{'benchmark':<28} {'base':>9} {'new':>9} {'change':>8}  status")
+    for row in rows:
+        if "change" not in row:
+            print(f"{row['name']:<28} {'':>9} {'':>9} {'':>8}  {row['status']}")
+            continue
+        print(
+            f"{row['name']:<28} {row['base']:>9.2f} {row['new']:>9.2f} "
+            f"{row['change']:>+8.1%}  {row['status']}"
+        )
+    return 1 if any(row["status"] == "slower" for row in rows) else 0
+
+
+def cmd_serve(args) -> int:
+    from mastui.benchmarks.fake_api import FakeApi
+    from mastui.benchmarks.mock_server import MockMastodonServer, ServerOptions
+
+    options = ServerOptions(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+        stream_interval=args.stream_interval,
+        seed=args.seed,
+    )
+    try:
+        server = MockMastodonServer(
+            (args.host, args.port), options, FakeApi(posts=args.posts, seed=args.seed)
+        )
+    except OSError as e:
+        print(f"Cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 2
+    print(f"Serving a mock Mastodon API at {server.base_url}")
+    print(f"Run: mastui --api-base-url {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stopping.set()
+        server.server_close()
+    return 0
+
+
+def cmd_soak(args) -> int:
+    from mastui.benchmarks.soak import SoakLimits, SoakOptions, run_soak
+
+    options = SoakOptions(
+        duration=args.duration,
+        speed=args.speed,
+        sample_every=args.sample_every,
+        warmup=args.warmup,
+        posts_per_minute=args.posts_per_minute,
+        latency_ms=args.latency_ms,
+        images=args.images,
+        tracemalloc=args.tracemalloc,
+        seed=args.seed,
+    )
+    limits = SoakLimits(
+        rss_growth_mb=args.max_rss_growth_mb,
+        traced_growth_mb=args.max_traced_growth_mb,
+        thread_growth=args.max_thread_growth,
+        worker_growth=args.max_worker_growth,
+        widget_growth=args.max_widget_growth,
+        state_growth=args.max_state_growth,
+    )
+    print(
+        f"Soaking for {options.duration:g}s at {options.speed:g}x "
+        f"({options.duration * options.speed / 3600:.1f} simulated hours)"
+    )
+    report = run_soak(options, limits)
+
+    if report.top_allocators:
+        print("Top allocators since warm-up:")
+        for allocator in report.top_allocators:
+            print(f"  {allocator['size_diff_kb']:>+10.1f} KB {allocator['count_diff']:>+7}  {allocator['where']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report.to_dict(), indent=2))
+        print(f"Wrote {args.output}")
+    for violation in report.violations:
+        print(f"FAIL: {violation}", file=sys.stderr)
+    if report.passed:
+        print("Soak passed.")
+    return 0 if report.passed else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="mastui-bench",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List the benchmarks")
+    list_parser.set_defaults(func=cmd_list)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks")
+    run_parser.add_argument(
+        "-k", action="append", metavar="PATTERN",
+        help="Only run benchmarks whose name contains PATTERN or whose group is PATTERN",
+    )
+    run_parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    run_parser.add_argument("--output", "-o", help="Write the results to this JSON file")
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.add_argument(
+        "--metric", default="p50_ms",
+        choices=("mean_ms", "min_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"),
+    )
+    compare_parser.set_defaults(func=cmd_compare)
+
+    serve_parser = subparsers.add_parser("serve", help="Run a mock Mastodon server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--latency-ms", type=float, default=0.0)
+    serve_parser.add_argument("--jitter-ms", type=float, default=0.0)
+    serve_parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 503"
+    )
+    serve_parser.add_argument(
+        "--drop-rate", type=float, default=0.0, help="Fraction of connections closed without an answer"
+    )
+    serve_parser.add_argument("--rate-limit", type=int, default=300, help="Requests allowed per window")
+    serve_parser.add_argument("--rate-limit-window", type=float, default=300.0, help="Seconds")
+    serve_parser.add_argument(
+        "--stream-interval", type=float, default=5.0, help="Seconds between streamed posts"
+    )
+    serve_parser.add_argument("--posts", type=int, default=400, help="Posts in each timeline")
+    serve_parser.add_argument("--seed", type=int, default=1)
+    serve_parser.set_defaults(func=cmd_serve)
+
+    soak_parser = subparsers.add_parser("soak", help="Run a long session and check for growth")
+    soak_parser.add_argument("--duration", type=float, default=600.0, help="Real seconds")
+    soak_parser.add_argument("--speed", type=float, default=60.0, help="Simulated seconds per real second")
+    soak_parser.add_argument("--sample-every", type=float, default=30.0, help="Real seconds")
+    soak_parser.add_argument("--warmup", type=float, default=60.0, help="Real seconds before the baseline sample")
+    soak_parser.add_argument("--posts-per-minute", type=float, default=2.0, help="Simulated arrival rate")
+    soak_parser.add_argument("--latency-ms", type=float, default=20.0)
+    soak_parser.add_argument("--images", action="store_true", help="Turn image support on")
+    soak_parser.add_argument(
+        "--no-tracemalloc", dest="tracemalloc", action="store_false",
+        help="Skip tracemalloc (faster, but no allocator report)",
+    )
+    soak_parser.add_argument("--seed", type=int, default=1)
+    soak_parser.add_argument("--max-rss-growth-mb", type=float, default=150.0)
+    soak_parser.add_argument("--max-traced-growth-mb", type=float, default=100.0)
+    soak_parser.add_argument("--max-thread-growth", type=int, default=8)
+    soak_parser.add_argument("--max-worker-growth", type=int, default=20)
+    soak_parser.add_argument("--max-widget-growth", type=int, default=1500)
+    soak_parser.add_argument(
+        "--max-state-growth", type=int, default=5000,
+        help="Entries in post_ids, notified_dm_ids and the autocomplete caches",
+    )
+    soak_parser.add_argument("--output", "-o", help="Write the samples and report to this JSON file")
+    soak_parser.set_defaults(func=cmd_soak)
+
+    args = parser.parse_args(argv)
+    # Keep the widgets' logging out of the timings.
+    logging.disable(logging.CRITICAL)
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Compare widget counts and mount time of `Post` and `CompactPost`.
+
+Run with `python -m mastui.benchmarks.compact_posts`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+from tempfile import mkdtemp
+from types import SimpleNamespace
+
+from textual.app import App
+from textual.containers import VerticalScroll
+
+from mastui.app import css_path
+from mastui.benchmarks.fixtures import make_timeline
+from mastui.view_models import build_timeline_items
+from mastui.widgets import CompactPost, Post
+
+
+def bench_config(**overrides) -> SimpleNamespace:
+    """A stand-in for `Config` that never touches the user's profile."""
+    values = {
+        "image_support": False,
+        "image_renderer": "ansi",
+        "image_load_margin": 20,
+        "image_prefetch_items": 3,
+        "image_memory_budget_mb": 64,
+        "image_encoded_disk_cache": False,
+        "image_process_pool": False,
+        "image_process_workers": 2,
+        "image_cache_max_mb": 512,
+        "media_cache_max_mb": 512,
+        "image_cache_dir": Path(mkdtemp(prefix="mastui-bench-")),
+        "media_cache_dir": Path(mkdtemp(prefix="mastui-bench-media-")),
+        "profile_name": "bench",
+        "ssl_verify": True,
+        "compact_posts": False,
+        "mount_frame_budget_ms": 12.0,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class PostBenchApp(App):
+    CSS_PATH = css_path
+
+    def __init__(self, config=None):
+        super().__init__()
+        self.config = config or bench_config()
+        self.me = {"id": "0"}
+
+    def compose(self):
+        yield VerticalScroll(id="bench-container")
+
+
+async def measure_mount(post_class, posts: int, rounds: int) -> dict:
+    items = build_timeline_items("home", make_timeline(posts))
+    app = PostBenchApp()
+    timings = []
+    widget_count = 0
+    async with app.run_test(size=(80, 50)) as pilot:
+        container = app.query_one("#bench-container")
+        for _ in range(rounds):
+            widgets = [
+                post_class(item.data, timeline_id="home", view=item.status)
+                for item in items
+            ]
+            start = time.perf_counter()
+            await container.mount_all(widgets)
+            await pilot.pause()
+            timings.append(time.perf_counter() - start)
+            widget_count = len(container.query("*"))
+            await container.remove_children()
+            await pilot.pause()
+    return {
+        "renderer": post_class.__name__,
+        "posts": posts,
+        "widgets": widget_count,
+        "widgets_per_post": widget_count / posts,
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+    }
+
+
+async def run(posts: int, rounds: int) -> list[dict]:
+    return [
+        await measure_mount(Post, posts, rounds),
+        await measure_mount(CompactPost, posts, rounds),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=70)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.posts, args.rounds))
+    print(f"{'renderer':<12} {'widgets':>8} {'per post':>9} {'median ms':>10} {'min ms':>8}")
+    for result in results:
+        print(
+            f"{result['renderer']:<12} {result['widgets']:>8} "
+            f"{result['widgets_per_post']:>9.1f} {result['median_ms']:>10.1f} "
+            f"{result['min_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""An in-memory stand-in for the Mastodon API client, serving fixture data.
+
+`FakeApi` answers the calls mastui makes with the payloads from
+`mastui.benchmarks.fixtures`, paginated like a Mastodon server: newest
+first, `since_id`/`min_id`/`max_id` bounds and a `limit`.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+import random
+import threading
+
+from mastui.benchmarks.fixtures import (
+    BASE_TIME,
+    make_account,
+    make_conversations,
+    make_notifications,
+    make_status,
+    make_thread,
+    make_timeline,
+)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 40
+FIRST_ID = 200_000_000_000_000_000
+ME = make_account(1)
+
+
+def _renumber(items: list[dict], top_id: int) -> list[dict]:
+    """Give `items` descending ids and times, newest first, starting at `top_id`."""
+    for offset, item in enumerate(items):
+        item_id = top_id - offset
+        item["id"] = str(item_id)
+        item["created_at"] = (BASE_TIME + timedelta(seconds=item_id - FIRST_ID)).isoformat()
+        if item.get("reblog"):
+            item["reblog"]["created_at"] = item["created_at"]
+    return items
+
+
+def _page(items: list[dict], since_id=None, max_id=None, limit=None, min_id=None) -> list[dict]:
+    """Return one page of `items` (newest first), like a Mastodon timeline.
+
+    `since_id` returns the newest posts after it, `min_id` the ones right
+    after it.
+    """
+    limit = min(int(limit or DEFAULT_LIMIT), MAX_LIMIT)
+    if max_id is not None:
+        items = [item for item in items if int(item["id"]) < int(max_id)]
+    if since_id is not None:
+        items = [item for item in items if int(item["id"]) > int(since_id)]
+    if min_id is not None:
+        items = [item for item in items if int(item["id"]) > int(min_id)][-limit:]
+    return [dict(item) for item in items[:limit]]
+
+
+class FakeApi:
+    """Serves timelines, notifications, conversations and threads from memory.
+
+    It is thread safe: the app calls it from worker threads while a
+    benchmark adds posts with `add_posts`.
+    """
+
+    api_base_url = "https://example.social"
+
+    def __init__(self, posts: int = 200, notifications: int = 100, conversations: int = 20, seed: int = 1):
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._next_index = posts
+        self.calls: dict[str, int] = {}
+        self.timelines = {
+            "home": _renumber(make_timeline(posts, seed=seed), FIRST_ID + posts),
+            "local": _renumber(make_timeline(posts, seed=seed + 1), FIRST_ID + posts),
+            "public": _renumber(make_timeline(posts, seed=seed + 2), FIRST_ID + posts),
+        }
+        self._notifications = _renumber(make_notifications(notifications, seed=seed), FIRST_ID + notifications)
+        self._conversations = make_conversations(conversations, seed=seed)
+        self._statuses = {
+            status["id"]: status
+            for timeline in self.timelines.values()
+            for status in timeline
+        }
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def add_posts(self, count: int, timeline: str = "home") -> list[dict]:
+        """Publish `count` new posts at the top of `timeline` and return them."""
+        with self._lock:
+            items = self.timelines[timeline]
+            top_id = int(items[0]["id"]) + count if items else FIRST_ID + count
+            new_posts = [
+                make_status(self._next_index + offset, self._rng, media=self._rng.choice((0, 0, 1)))
+                for offset in range(count)
+            ]
+            self._next_index += count
+            _renumber(new_posts, top_id)
+            self.timelines[timeline] = new_posts + items
+            self._statuses.update((status["id"], status) for status in new_posts)
+            return new_posts
+
+    def add_notifications(self, count: int) -> list[dict]:
+        """Deliver `count` new notifications and return them."""
+        with self._lock:
+            top_id = int(self._notifications[0]["id"]) + count if self._notifications else FIRST_ID + count
+            new_notifications = _renumber(make_notifications(count, seed=self._rng.randrange(1 << 30)), top_id)
+            self._notifications = new_notifications + self._notifications
+            return new_notifications
+
+    def add_conversations(self, count: int) -> list[dict]:
+        """Start `count` new, unread conversations and return them."""
+        with self._lock:
+            top_id = max((int(item["id"]) for item in self._conversations), default=0) + count
+            new_conversations = make_conversations(count, seed=self._rng.randrange(1 << 30))
+            for offset, conversation in enumerate(new_conversations):
+                conversation["id"] = str(top_id - offset)
+                conversation["unread"] = True
+            self._conversations = new_conversations + self._conversations
+            return new_conversations
+
+    # Account and instance
+
+    def me(self):
+        self._count("me")
+        return dict(ME)
+
+    def instance(self):
+        self._count("instance")
+        return {
+            "uri": "example.social",
+            "title": "Example Social",
+            "version": "4.2.0",
+            "configuration": {"statuses": {"max_characters": 500, "max_media_attachments": 4}},
+        }
+
+    def account(self, account_id):
+        self._count("account")
+        return make_account(int(account_id))
+
+    def account_relationships(self, account_ids):
+        self._count("account_relationships")
+        if not isinstance(account_ids, (list, tuple)):
+            account_ids = [account_ids]
+        return [
+            {"id": str(account_id), "following": False, "followed_by": False, "blocking": False, "muting": False}
+            for account_id in account_ids
+        ]
+
+    def account_search(self, q, limit=None, following=False, resolve=False, **kwargs):
+        self._count("account_search")
+        query = q.lstrip("@").lower()
+        accounts = [make_account(index) for index in range(100)]
+        matches = [account for account in accounts if query in account["acct"].lower()]
+        return matches[: min(int(limit or DEFAULT_LIMIT), MAX_LIMIT)]
+
+    def account_statuses(self, account_id, since_id=None, max_id=None, limit=None, **kwargs):
+        self._count("account_statuses")
+        with self._lock:
+            statuses = [status for status in self.timelines["home"] if status["account"]["id"] == str(account_id)]
+        return _page(statuses, since_id, max_id, limit)
+
+    # Timelines
+
+    def _timeline(self, name, since_id=None, max_id=None, limit=None, min_id=None):
+        self._count(f"timeline_{name}")
+        with self._lock:
+            return _page(self.timelines[name], since_id, max_id, limit, min_id)
+
+    def timeline_home(self, since_id=None, max_id=None, limit=None, min_id=None, **kwargs):
+        return self._timeline("home", since_id, max_id, limit, min_id)
+
+    def timeline_local(self, since_id=None, max_id=None, limit=None, min_id=None, **kwargs):
+        return self._timeline("local", since_id, max_id, limit, min_id)
+
+    def timeline_public(self, since_id=None, max_id=None, limit=None, min_id=None, **kwargs):
+        return self._timeline("public", since_id, max_id, limit, min_id)
+
+    def timeline_hashtag(self, hashtag, since_id=None, max_id=None, limit=None, min_id=None, **kwargs):
+        self._count("timeline_hashtag")
+        with self._lock:
+            statuses = list(self.timelines["public"])
+        return _page(statuses, since_id, max_id, limit, min_id)
+
+    def notifications(self, since_id=None, max_id=None, limit=None, min_id=None, **kwargs):
+        self._count("notifications")
+        with self._lock:
+            return _page(self._notifications, since_id, max_id, limit, min_id)
+
+    def conversations(self, since_id=None, max_id=None, limit=None, min_id=None, **kwargs):
+        self._count("conversations")
+        return _page(self._conversations, since_id, max_id, limit, min_id)
+
+    def conversations_read(self, conversation_id):
+        self._count("conversations_read")
+        for conversation in self._conversations:
+            if conversation["id"] == str(conversation_id):
+                conversation["unread"] = False
+                return dict(conversation)
+        return None
+
+    # Statuses
+
+    def status(self, status_id):
+        self._count("status")
+        with self._lock:
+            status = self._statuses.get(str(status_id))
+        return dict(status) if status else make_status(int(status_id) % 1000)
+
+    def status_context(self, status_id):
+        self._count("status_context")
+        thread = make_thread(20, seed=int(status_id) % 1000)
+        return {"ancestors": thread["ancestors"], "descendants": thread["descendants"]}
+
+    def _set_flag(self, status_id, flag: str, count: str, value: bool):
+        with self._lock:
+            status = self._statuses.get(str(status_id))
+            if status is None:
+                status = make_status(int(status_id) % 1000)
+            if status[flag] != value:
+                status[flag] = value
+                status[count] += 1 if value else -1
+            return dict(status)
+
+    def status_favourite(self, status_id):
+        self._count("status_favourite")
+        return self._set_flag(status_id, "favourited", "favourites_count", True)
+
+    def status_unfavourite(self, status_id):
+        self._count("status_unfavourite")
+        return self._set_flag(status_id, "favourited", "favourites_count", False)
+
+    def status_reblog(self, status_id):
+        self._count("status_reblog")
+        return self._set_flag(status_id, "reblogged", "reblogs_count", True)
+
+    def status_unreblog(self, status_id):
+        self._count("status_unreblog")
+        return self._set_flag(status_id, "reblogged", "reblogs_count", False)
+
+    # Search and filters
+
+    def search_v2(self, q, **kwargs):
+        self._count("search_v2")
+        with self._lock:
+            statuses = [status for status in self.timelines["public"] if q.lower() in status["content"].lower()]
+        return {
+            "accounts": [make_account(index) for index in range(5)],
+            "statuses": [dict(status) for status in statuses[:DEFAULT_LIMIT]],
+            "hashtags": [{"name": q.lstrip("#"), "url": f"https://example.social/tags/{q.lstrip('#')}"}],
+        }
+
+    def filters_v2(self):
+        self._count("filters_v2")
+        return []
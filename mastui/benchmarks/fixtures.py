@@ -0,0 +1,247 @@
+"""Synthetic Mastodon payloads shaped like the ones mastui renders."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import random
+
+BASE_TIME = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+BLURHASH = "LEHV6nWB2yk8pyo0adR*.7kCMdnj"
+
+_WORDS = (
+    "mastodon fediverse terminal textual render widget column timeline boost "
+    "favourite reply thread federation instance server toot client python"
+).split()
+
+
+def make_account(account_id: int) -> dict:
+    return {
+        "id": str(account_id),
+        "username": f"user{account_id}",
+        "acct": f"user{account_id}@example.social",
+        "display_name": f"Example User {account_id}",
+        "url": f"https://example.social/@user{account_id}",
+        "avatar": f"https://example.social/avatars/{account_id}.png",
+        "note": "<p>Just an example account.</p>",
+        "followers_count": account_id * 3,
+        "following_count": account_id * 2,
+        "statuses_count": account_id * 10,
+    }
+
+
+def make_html(rng: random.Random, paragraphs: int = 2, links: int = 1) -> str:
+    parts = []
+    for _ in range(paragraphs):
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(12, 40)))
+        parts.append(f"<p>{words}</p>")
+    for i in range(links):
+        parts.append(
+            f'<p><a href="https://example.social/tags/tag{i}" class="mention hashtag">#tag{i}</a> '
+            f'<a href="https://example.com/article/{i}">https://example.com/article/{i}</a></p>'
+        )
+    return "".join(parts)
+
+
+def make_media(status_id: int, index: int) -> dict:
+    return {
+        "id": f"{status_id}{index}",
+        "type": "image",
+        "url": f"https://files.example.social/original/{status_id}-{index}.png",
+        "preview_url": f"https://files.example.social/small/{status_id}-{index}.png",
+        "description": "A synthetic image attachment",
+        "blurhash": BLURHASH,
+        "meta": {"small": {"width": 400, "height": 300, "aspect": 1.3333}},
+    }
+
+
+def make_poll(status_id: int, options: int = 3, voted: bool = False) -> dict:
+    return {
+        "id": f"poll-{status_id}",
+        "expired": False,
+        "voted": voted,
+        "own_votes": [0] if voted else [],
+        "expires_at": (BASE_TIME + timedelta(days=1)).isoformat(),
+        "votes_count": options * 4,
+        "options": [
+            {"title": f"Option {i}", "votes_count": 4} for i in range(options)
+        ],
+    }
+
+
+def make_status(
+    index: int,
+    rng: random.Random | None = None,
+    media: int = 0,
+    poll: bool = False,
+    reblog: bool = False,
+    paragraphs: int = 2,
+) -> dict:
+    rng = rng or random.Random(index)
+    status_id = 110_000_000_000_000_000 + index
+    status = {
+        "id": str(status_id),
+        "created_at": (BASE_TIME - timedelta(minutes=index)).isoformat(),
+        "edited_at": None,
+        "account": make_account(index % 50),
+        "content": make_html(rng, paragraphs=paragraphs),
+        "spoiler_text": "",
+        "visibility": "public",
+        "reblogs_count": rng.randint(0, 20),
+        "favourites_count": rng.randint(0, 100),
+        "replies_count": rng.randint(0, 5),
+        "favourited": False,
+        "reblogged": False,
+        "mentions": [],
+        "tags": [],
+        "emojis": [],
+        "filtered": [],
+        "media_attachments": [make_media(status_id, i) for i in range(media)],
+        "poll": make_poll(status_id) if poll else None,
+        "reblog": None,
+        "url": f"https://example.social/@user{index % 50}/{status_id}",
+    }
+    if reblog:
+        return {
+            **status,
+            "id": str(status_id + 500_000),
+            "account": make_account(900 + index % 10),
+            "content": "",
+            "reblog": status,
+        }
+    return status
+
+
+def make_timeline(count: int, seed: int = 1, start: int = 0) -> list[dict]:
+    """A mixed home timeline: plain posts, boosts, media and polls."""
+    rng = random.Random(seed)
+    statuses = []
+    for index in range(start, start + count):
+        statuses.append(
+            make_status(
+                index,
+                rng,
+                media=rng.choice((0, 0, 0, 1, 2)),
+                poll=rng.random() < 0.1,
+                reblog=rng.random() < 0.2,
+                paragraphs=rng.randint(1, 4),
+            )
+        )
+    return statuses
+
+
+def make_emoji(shortcode: str) -> dict:
+    return {
+        "shortcode": shortcode,
+        "url": f"https://files.example.social/emoji/{shortcode}.png",
+        "static_url": f"https://files.example.social/emoji/static/{shortcode}.png",
+        "visible_in_picker": True,
+    }
+
+
+def make_heavy_html(rng: random.Random, paragraphs: int = 8, emojis: int = 12) -> str:
+    """Long, markup-heavy content: lists, quotes, code, mentions and emoji."""
+    parts = []
+    for index in range(paragraphs):
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(30, 80)))
+        parts.append(
+            f'<p><span class="h-card"><a href="https://example.social/@user{index}" '
+            f'class="u-url mention">@<span>user{index}</span></a></span> {words} '
+            f"<strong>{rng.choice(_WORDS)}</strong> <em>{rng.choice(_WORDS)}</em> "
+            f"&amp; &lt;escaped&gt; &quot;entities&quot;</p>"
+        )
+    parts.append(
+        "<ul>" + "".join(f"<li>{rng.choice(_WORDS)} item {i}</li>" for i in range(6)) + "</ul>"
+    )
+    parts.append(f"<blockquote><p>{' '.join(rng.choice(_WORDS) for _ in range(25))}</p></blockquote>")
+    parts.append("<pre><code>def render(self):\n    return self.widget\n</code></pre>")
+    parts.append(
+        "<p>" + " ".join(f":emoji{i}: \N{PARTY POPPER}\N{SPARKLES}" for i in range(emojis)) + "</p>"
+    )
+    parts.append(
+        "<p>"
+        + " ".join(
+            f'<a href="https://example.social/tags/tag{i}" class="mention hashtag" rel="tag">#<span>tag{i}</span></a>'
+            for i in range(10)
+        )
+        + "</p>"
+    )
+    return "".join(parts)
+
+
+def make_heavy_status(index: int, rng: random.Random | None = None, media: int = 4, emojis: int = 12) -> dict:
+    """A status with long HTML, many media attachments and custom emoji."""
+    rng = rng or random.Random(index)
+    status = make_status(index, rng, media=media)
+    status["content"] = make_heavy_html(rng, emojis=emojis)
+    status["emojis"] = [make_emoji(f"emoji{i}") for i in range(emojis)]
+    status["mentions"] = [
+        {"id": str(i), "username": f"user{i}", "acct": f"user{i}@example.social", "url": f"https://example.social/@user{i}"}
+        for i in range(8)
+    ]
+    status["tags"] = [{"name": f"tag{i}", "url": f"https://example.social/tags/tag{i}"} for i in range(10)]
+    return status
+
+
+def make_thread(length: int, seed: int = 1) -> dict:
+    """A long reply chain: a focused status with its context.
+
+    Returns {"status": ..., "ancestors": [...], "descendants": [...]}, the
+    focused status sitting in the middle of the chain.
+    """
+    rng = random.Random(seed)
+    statuses = []
+    for index in range(length):
+        status = make_status(10_000 + index, rng, media=rng.choice((0, 0, 1)), paragraphs=rng.randint(1, 3))
+        status["created_at"] = (BASE_TIME + timedelta(minutes=index)).isoformat()
+        if statuses:
+            status["in_reply_to_id"] = statuses[-1]["id"]
+            status["in_reply_to_account_id"] = statuses[-1]["account"]["id"]
+        statuses.append(status)
+    middle = length // 2
+    return {
+        "status": statuses[middle],
+        "ancestors": statuses[:middle],
+        "descendants": statuses[middle + 1 :],
+    }
+
+
+NOTIFICATION_TYPES = ("mention", "favourite", "reblog", "follow", "poll", "status")
+
+
+def make_notifications(count: int, seed: int = 1) -> list[dict]:
+    """Notifications of every common type, most of them carrying a status."""
+    rng = random.Random(seed)
+    notifications = []
+    for index in range(count):
+        notif_type = NOTIFICATION_TYPES[index % len(NOTIFICATION_TYPES)]
+        status = None
+        if notif_type != "follow":
+            status = make_status(20_000 + index, rng, poll=notif_type == "poll", paragraphs=rng.randint(1, 3))
+        notifications.append(
+            {
+                "id": str(500_000 - index),
+                "type": notif_type,
+                "created_at": (BASE_TIME - timedelta(minutes=index)).isoformat(),
+                "account": make_account(100 + index % 40),
+                "status": status,
+            }
+        )
+    return notifications
+
+
+def make_conversations(count: int, seed: int = 1) -> list[dict]:
+    """Direct message conversations, newest first."""
+    rng = random.Random(seed)
+    conversations = []
+    for index in range(count):
+        last_status = make_status(30_000 + index, rng, paragraphs=rng.randint(1, 3))
+        last_status["visibility"] = "direct"
+        conversations.append(
+            {
+                "id": str(700_000 - index),
+                "unread": index % 3 == 0,
+                "accounts": [make_account(200 + index % 25), make_account(300 + index % 7)],
+                "last_status": last_status,
+            }
+        )
+    return conversations
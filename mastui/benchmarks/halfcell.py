@@ -0,0 +1,90 @@
+"""Compare half-cell image encoding in mastui with textual-image's renderer.
+
+Run with `python -m mastui.benchmarks.halfcell`. textual-image converts
+pixels every time the image is drawn; mastui encodes once in a worker
+(pure Python or NumPy) and then only draws the prepared segments. The NumPy
+column is only measured when NumPy is installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from PIL import Image as PILImage
+from rich.console import Console
+from textual_image.renderable import HalfcellImage
+
+from mastui import halfcell
+from mastui.halfcell import encode_halfcell
+from mastui.image_cache import target_pixel_width
+
+DEFAULT_WIDTHS = (40, 60, 80, 120)
+
+
+def make_image(width: int, height: int, noise: int = 24) -> PILImage.Image:
+    """A photo-like test image: gradients with some noise."""
+    red = PILImage.linear_gradient("L").resize((width, height))
+    green = PILImage.radial_gradient("L").resize((width, height))
+    blue = PILImage.effect_noise((width, height), noise)
+    return PILImage.merge("RGB", (red, green, blue))
+
+
+def _median_ms(func, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def measure(cells: int, rounds: int, noise: int = 24) -> dict:
+    target_width = target_pixel_width(cells, "ansi")
+    image = make_image(target_width, target_width * 3 // 4, noise)
+    console = Console(width=cells, file=open("/dev/null", "w"), color_system="truecolor")
+    options = console.options.update(width=cells, height=None)
+
+    def textual_image_render():
+        console.render_lines(HalfcellImage(image, width=cells, height="auto"), options)
+
+    def mastui_encode(use_numpy: bool):
+        encode_halfcell(image, cells).prepare(use_numpy=use_numpy)
+
+    prepared = encode_halfcell(image, cells).prepare()
+
+    result = {
+        "cells": cells,
+        "textual_image_ms": _median_ms(textual_image_render, rounds),
+        "python_ms": _median_ms(lambda: mastui_encode(False), rounds),
+        "numpy_ms": None,
+        "draw_ms": _median_ms(lambda: console.render_lines(prepared, options), rounds),
+    }
+    if halfcell.np is not None:
+        result["numpy_ms"] = _median_ms(lambda: mastui_encode(True), rounds)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS))
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--noise", type=int, default=24, help="Noise level of the test image")
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'cells':>5} {'textual-image ms':>17} {'encode py ms':>13} "
+        f"{'encode numpy ms':>16} {'draw ms':>8}"
+    )
+    for cells in args.widths:
+        result = measure(cells, args.rounds, args.noise)
+        numpy_ms = f"{result['numpy_ms']:.2f}" if result["numpy_ms"] is not None else "n/a"
+        print(
+            f"{result['cells']:>5} {result['textual_image_ms']:>17.2f} "
+            f"{result['python_ms']:>13.2f} {numpy_ms:>16} {result['draw_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
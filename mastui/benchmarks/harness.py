@@ -0,0 +1,172 @@
+"""Timing, statistics and result files for the benchmark suite."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+import json
+import platform
+import statistics
+import sys
+
+RESULTS_VERSION = 1
+DEFAULT_ROUNDS = 20
+DEFAULT_THRESHOLD = 0.10
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Return the `q`th percentile (0-100) of `values`, interpolating linearly."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+@dataclass
+class BenchResult:
+    """The samples of one benchmark.
+
+    Each sample is the time of one round, in milliseconds, and covers `items`
+    units of work (posts converted, rows inserted, ...), so that throughput
+    can be compared between runs of different sizes. `counters` holds other
+    measurements of the run, such as frames dropped.
+    """
+
+    name: str
+    samples_ms: list[float] = field(default_factory=list)
+    items: int = 1
+    unit: str = "ops"
+    counters: dict[str, float] = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        samples = self.samples_ms
+        mean_ms = statistics.fmean(samples) if samples else 0.0
+        return {
+            "rounds": len(samples),
+            "items": self.items,
+            "unit": self.unit,
+            "mean_ms": mean_ms,
+            "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "min_ms": min(samples, default=0.0),
+            "p50_ms": percentile(samples, 50),
+            "p90_ms": percentile(samples, 90),
+            "p99_ms": percentile(samples, 99),
+            "max_ms": max(samples, default=0.0),
+            "throughput": self.items / (mean_ms / 1000) if mean_ms else 0.0,
+            **self.counters,
+        }
+
+
+def time_rounds(func, rounds: int, warmup: int = 1, setup=None) -> list[float]:
+    """Call `func` `warmup` times untimed, then `rounds` times; return ms per call.
+
+    If given, `setup` runs untimed before every call and its result is
+    passed to `func`, e.g. fresh fixtures for a call that modifies them.
+    """
+    samples = []
+    for index in range(warmup + rounds):
+        args = (setup(),) if setup else ()
+        start = perf_counter()
+        func(*args)
+        if index >= warmup:
+            samples.append((perf_counter() - start) * 1000)
+    return samples
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    group: str
+    description: str
+    func: object
+
+    def run(self, rounds: int) -> BenchResult:
+        return self.func(rounds)
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: str):
+    """Register a function `func(rounds) -> BenchResult` as a benchmark."""
+
+    def register(func):
+        description = (func.__doc__ or "").strip().split("\n")[0]
+        BENCHMARKS[name] = Benchmark(name, group, description, func)
+        return func
+
+    return register
+
+
+def select(patterns: list[str] | None) -> list[Benchmark]:
+    """Return the benchmarks whose name or group contains any of `patterns`."""
+    if not patterns:
+        return list(BENCHMARKS.values())
+    return [
+        bench
+        for bench in BENCHMARKS.values()
+        if any(pattern in bench.name or pattern == bench.group for pattern in patterns)
+    ]
+
+
+def environment() -> dict:
+    from mastui import __version__
+
+    return {
+        "mastui": __version__,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def write_results(path: Path, results: list[BenchResult]) -> None:
+    data = {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "results": {
+            result.name: {**result.summary(), "samples_ms": result.samples_ms}
+            for result in results
+        },
+    }
+    path.write_text(json.dumps(data, indent=2))
+
+
+def load_results(path: Path) -> dict:
+    data = json.loads(path.read_text())
+    if data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path} has unsupported results version {data.get('version')!r}")
+    return data
+
+
+def compare_results(base: dict, new: dict, threshold: float = DEFAULT_THRESHOLD, metric: str = "p50_ms") -> list[dict]:
+    """Compare `metric` of every benchmark present in both result files.
+
+    A change larger than `threshold` (a fraction) marks the benchmark as a
+    regression or an improvement.
+    """
+    rows = []
+    base_results = base["results"]
+    new_results = new["results"]
+    for name in sorted(set(base_results) | set(new_results)):
+        if name not in base_results or name not in new_results:
+            rows.append({"name": name, "status": "only in " + ("new" if name in new_results else "base")})
+            continue
+        before = base_results[name][metric]
+        after = new_results[name][metric]
+        change = (after - before) / before if before else 0.0
+        if change > threshold:
+            status = "slower"
+        elif change < -threshold:
+            status = "faster"
+        else:
+            status = "same"
+        rows.append({"name": name, "base": before, "new": after, "change": change, "status": status})
+    return rows
@@ -0,0 +1,340 @@
+"""A local HTTP stand-in for a Mastodon instance, for offline testing.
+
+`MockMastodonServer` serves the endpoints mastui uses from a `FakeApi`, with
+what a real instance adds on top: pagination `Link` headers,
+`X-RateLimit-*` headers (answering 429 once the budget is spent), a
+streaming endpoint, and media files. Latency, jitter and failures can be
+injected. Start it with `mastui-bench serve` and point mastui at it with
+`mastui --api-base-url http://127.0.0.1:8765`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from time import monotonic, sleep
+from urllib.parse import parse_qs, urlencode, urlsplit
+import json
+import logging
+import random
+import re
+import threading
+
+from PIL import Image as PILImage
+
+from mastui.benchmarks.fake_api import FakeApi
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+FIXTURE_MEDIA_ORIGIN = "https://files.example.social"
+HEARTBEAT_SECONDS = 15
+MEDIA_SIZES = {"small": (400, 300), "original": (1200, 900), "emoji": (32, 32)}
+
+
+@dataclass(frozen=True)
+class ServerOptions:
+    """How the mock server misbehaves.
+
+    `latency_ms` +/- `jitter_ms` is added to every request. `error_rate` of
+    the requests get a 503 and `drop_rate` of them are closed without an
+    answer. `rate_limit` requests are allowed per `rate_limit_window`
+    seconds, like Mastodon's 300 per 5 minutes.
+    """
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    drop_rate: float = 0.0
+    rate_limit: int = 300
+    rate_limit_window: float = 300.0
+    stream_interval: float = 5.0
+    seed: int = 1
+
+
+class MockMastodonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", DEFAULT_PORT), options: ServerOptions | None = None, api: FakeApi | None = None):
+        super().__init__(address, MockRequestHandler)
+        self.options = options or ServerOptions()
+        self.api = api or FakeApi(seed=self.options.seed)
+        self._rng = random.Random(self.options.seed)
+        self._lock = threading.Lock()
+        self._window_start = monotonic()
+        self._window_used = 0
+        self._media: dict[str, bytes] = {}
+        self._thread = None
+        self.stopping = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-mastodon", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.stopping.set()
+        self.shutdown()
+        self.server_close()
+
+    def delay(self) -> float:
+        """Return the injected latency of one request, in seconds."""
+        options = self.options
+        with self._lock:
+            jitter = self._rng.uniform(-options.jitter_ms, options.jitter_ms) if options.jitter_ms else 0.0
+        return max(0.0, options.latency_ms + jitter) / 1000
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    def take_request(self) -> tuple[int, datetime]:
+        """Count a request against the rate limit; return what remains and when it resets."""
+        options = self.options
+        with self._lock:
+            now = monotonic()
+            if now - self._window_start >= options.rate_limit_window:
+                self._window_start = now
+                self._window_used = 0
+            self._window_used += 1
+            remaining = options.rate_limit - self._window_used
+            reset_in = options.rate_limit_window - (now - self._window_start)
+        return remaining, datetime.now(timezone.utc) + timedelta(seconds=reset_in)
+
+    def media(self, path: str) -> bytes:
+        """A PNG for a fixture media URL, generated once per path."""
+        with self._lock:
+            data = self._media.get(path)
+        if data is None:
+            kind = "emoji" if "/emoji/" in path else "original" if "/original/" in path else "small"
+            seed = sum(path.encode())
+            image = PILImage.effect_noise(MEDIA_SIZES[kind], 32 + seed % 64).convert("RGB")
+            buffer = BytesIO()
+            image.save(buffer, "PNG")
+            data = buffer.getvalue()
+            with self._lock:
+                self._media[path] = data
+        return data
+
+
+def _int_param(params: dict, name: str):
+    value = params.get(name)
+    return value if value is None else int(value)
+
+
+def _timeline(server, match, params):
+    name = match["name"]
+    if name == "public" and params.get("local") in ("true", "1"):
+        name = "local"
+    paging = {key: _int_param(params, key) for key in ("since_id", "max_id", "min_id", "limit")}
+    if name.startswith("tag/"):
+        return server.api.timeline_hashtag(name[4:], **paging)
+    if name not in ("home", "local", "public"):
+        return None
+    return getattr(server.api, f"timeline_{name}")(**paging)
+
+
+def _paged(method):
+    def handler(server, match, params):
+        paging = {key: _int_param(params, key) for key in ("since_id", "max_id", "min_id", "limit")}
+        return getattr(server.api, method)(**paging)
+
+    return handler
+
+
+def _instance(server, match, params):
+    instance = server.api.instance()
+    streaming = server.base_url.replace("http", "ws", 1)
+    instance["urls"] = {"streaming_api": streaming}
+    instance["configuration"]["urls"] = {"streaming": streaming}
+    return instance
+
+
+def _search(server, match, params):
+    return server.api.search_v2(params.get("q", ""))
+
+
+def _account_search(server, match, params):
+    return server.api.account_search(
+        params.get("q", ""),
+        limit=_int_param(params, "limit"),
+        following=params.get("following") in ("true", "1"),
+        resolve=params.get("resolve") in ("true", "1"),
+    )
+
+
+def _relationships(server, match, params):
+    return server.api.account_relationships(params.get("id[]", []))
+
+
+def _account_statuses(server, match, params):
+    paging = {key: _int_param(params, key) for key in ("since_id", "max_id", "limit")}
+    return server.api.account_statuses(match["id"], **paging)
+
+
+_ROUTE_TABLE = [
+    ("GET", r"/api/v1/accounts/verify_credentials", lambda server, match, params: server.api.me()),
+    ("GET", r"/api/v1/accounts/relationships", _relationships),
+    ("GET", r"/api/v1/accounts/search", _account_search),
+    ("GET", r"/api/v1/accounts/(?P<id>\d+)/statuses", _account_statuses),
+    ("GET", r"/api/v1/accounts/(?P<id>\d+)", lambda server, match, params: server.api.account(match["id"])),
+    ("GET", r"/api/v[12]/instance/?", _instance),
+    ("GET", r"/api/v1/timelines/(?P<name>tag/[^/]+|\w+)", _timeline),
+    ("GET", r"/api/v1/notifications", _paged("notifications")),
+    ("GET", r"/api/v1/conversations/?", _paged("conversations")),
+    ("POST", r"/api/v1/conversations/(?P<id>\d+)/read", lambda server, match, params: server.api.conversations_read(match["id"])),
+    ("GET", r"/api/v1/statuses/(?P<id>\d+)/context", lambda server, match, params: server.api.status_context(match["id"])),
+    ("GET", r"/api/v1/statuses/(?P<id>\d+)", lambda server, match, params: server.api.status(match["id"])),
+    (
+        "POST",
+        r"/api/v1/statuses/(?P<id>\d+)/(?P<action>favourite|unfavourite|reblog|unreblog)",
+        lambda server, match, params: getattr(server.api, f"status_{match['action']}")(match["id"]),
+    ),
+    ("GET", r"/api/v2/search", _search),
+    ("GET", r"/api/v2/filters", lambda server, match, params: server.api.filters_v2()),
+]
+ROUTES = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in _ROUTE_TABLE]
+STREAM_PATH = re.compile(r"/api/v1/streaming/(?P<stream>user|public|public/local)/?$")
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    server: MockMastodonServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        log.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method: str):
+        url = urlsplit(self.path)
+        params = {
+            key: values if key.endswith("[]") else values[-1]
+            for key, values in parse_qs(url.query).items()
+        }
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = self.rfile.read(length).decode("utf-8", "replace")
+            params.update((key, values[-1]) for key, values in parse_qs(body).items())
+
+        server = self.server
+        sleep(server.delay())
+        if server.roll(server.options.drop_rate):
+            self.close_connection = True
+            return
+        if url.path.startswith("/files/"):
+            self._send_media(url.path)
+            return
+        if url.path == "/api/v1/streaming/health":
+            self._send(200, b"OK", "text/plain")
+            return
+        if server.roll(server.options.error_rate):
+            self._send_json(503, {"error": "Injected failure"})
+            return
+
+        remaining, reset_at = server.take_request()
+        headers = {
+            "X-RateLimit-Limit": str(server.options.rate_limit),
+            "X-RateLimit-Remaining": str(max(0, remaining)),
+            "X-RateLimit-Reset": reset_at.isoformat(),
+        }
+        if remaining < 0:
+            self._send_json(429, {"error": "Too many requests"}, headers)
+            return
+
+        stream = STREAM_PATH.match(url.path)
+        if stream and method == "GET":
+            self._stream(stream["stream"])
+            return
+
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                try:
+                    payload = handler(server, match, params)
+                except (TypeError, ValueError) as e:
+                    self._send_json(422, {"error": str(e)}, headers)
+                    return
+                if payload is None:
+                    self._send_json(404, {"error": "Record not found"}, headers)
+                    return
+                if isinstance(payload, list):
+                    link = self._link_header(url.path, params, payload)
+                    if link:
+                        headers["Link"] = link
+                self._send_json(200, payload, headers)
+                return
+        self._send_json(404, {"error": "Record not found"}, headers)
+
+    def _link_header(self, path: str, params: dict, payload: list) -> str | None:
+        """Mastodon's `next` (older) and `prev` (newer) page links."""
+        if not payload or "id" not in payload[0]:
+            return None
+        base = {key: value for key, value in params.items() if key not in ("since_id", "max_id", "min_id")}
+        older = urlencode({**base, "max_id": payload[-1]["id"]})
+        newer = urlencode({**base, "min_id": payload[0]["id"]})
+        url = f"{self.server.base_url}{path}"
+        return f'<{url}?{older}>; rel="next", <{url}?{newer}>; rel="prev"'
+
+    def _body(self, payload) -> bytes:
+        text = json.dumps(payload, default=str)
+        return text.replace(FIXTURE_MEDIA_ORIGIN, f"{self.server.base_url}/files").encode()
+
+    def _send_json(self, status: int, payload, headers: dict | None = None):
+        self._send(status, self._body(payload), "application/json; charset=utf-8", headers)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_media(self, path: str):
+        data = self.server.media(path)
+        etag = f'"{len(data)}-{sum(data[:64])}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send(200, data, "image/png", {"ETag": etag, "Cache-Control": "public, max-age=86400"})
+
+    def _stream(self, stream: str):
+        """Server-sent events: one new post every `stream_interval` seconds."""
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        timeline = {"user": "home", "public": "public", "public/local": "local"}[stream]
+        server = self.server
+        interval = server.options.stream_interval
+        next_post = monotonic() + interval
+        try:
+            while not server.stopping.wait(min(interval, HEARTBEAT_SECONDS)):
+                if monotonic() >= next_post:
+                    post = server.api.add_posts(1, timeline)[0]
+                    self.wfile.write(f"event: update\ndata: {self._body(post).decode()}\n\n".encode())
+                    next_post += interval
+                else:
+                    self.wfile.write(b":thump\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            log.debug(f"Streaming client for {stream} disconnected")
@@ -0,0 +1,316 @@
+"""Soak test: hours of simulated use, checking that nothing keeps growing.
+
+`run_soak` starts a `MockMastodonServer` and a headless `Mastui` pointed at
+it. Time runs `speed` times faster than real time: auto-refresh intervals,
+the DM check and the server's rate-limit window are divided by `speed`,
+while new posts, notifications and DMs arrive at their simulated rate. A
+simulated user moves through the columns, opens threads, refreshes and
+looks up autocomplete suggestions.
+
+Every `sample_every` seconds it records process RSS, traced Python memory,
+threads, workers, mounted widgets and the size of the app's growing state
+(`Timeline.post_ids`, `Mastui.notified_dm_ids`, the autocomplete caches).
+Growth from the first sample after warm-up to the last one is checked
+against `SoakLimits`. Run it with `mastui-bench soak`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import asyncio
+import random
+import threading
+import tracemalloc
+
+from mastui.autocomplete import AutocompleteToken
+from mastui.benchmarks.app_scenarios import (
+    APP_SIZE,
+    BenchMastui,
+    isolated_profile,
+    wait_until,
+)
+from mastui.benchmarks.mock_server import MockMastodonServer, ServerOptions
+from mastui.metrics import rss_mb
+from mastui.splash import SplashScreen
+from mastui.thread import ThreadScreen
+from mastui.timeline import Timeline
+
+TICK_SECONDS = 0.5
+DM_CHECK_SECONDS = 300
+RATE_LIMIT_WINDOW_SECONDS = 300
+TOP_ALLOCATORS = 10
+# Minutes, as in the profile's .env.
+REFRESH_INTERVALS = {"HOME": 2, "LOCAL": 2, "NOTIFICATIONS": 10, "FEDERATED": 2}
+
+
+@dataclass(frozen=True)
+class SoakLimits:
+    """How much each measurement may grow between warm-up and the end."""
+
+    rss_growth_mb: float = 150.0
+    traced_growth_mb: float = 100.0
+    thread_growth: int = 8
+    worker_growth: int = 20
+    widget_growth: int = 1500
+    state_growth: int = 5000
+
+
+@dataclass(frozen=True)
+class SoakOptions:
+    duration: float = 600.0
+    speed: float = 60.0
+    sample_every: float = 30.0
+    warmup: float = 60.0
+    posts_per_minute: float = 2.0
+    notifications_per_hour: float = 12.0
+    dms_per_hour: float = 2.0
+    latency_ms: float = 20.0
+    images: bool = False
+    tracemalloc: bool = True
+    seed: int = 1
+
+
+@dataclass
+class SoakSample:
+    elapsed_s: float
+    simulated_s: float
+    rss_mb: float
+    traced_mb: float
+    threads: int
+    workers: int
+    widgets: int
+    post_ids: int
+    notified_dm_ids: int
+    autocomplete_cache: int
+
+    @property
+    def state(self) -> int:
+        return self.post_ids + self.notified_dm_ids + self.autocomplete_cache
+
+
+@dataclass
+class SoakReport:
+    options: SoakOptions
+    limits: SoakLimits
+    samples: list[SoakSample] = field(default_factory=list)
+    baseline: SoakSample | None = None
+    top_allocators: list[dict] = field(default_factory=list)
+    violations: list[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.violations
+
+    def check(self) -> None:
+        """Compare the last sample with the baseline and record what grew too much."""
+        if not self.samples or self.baseline is None:
+            self.violations.append("No samples were taken after warm-up")
+            return
+        base, last, limits = self.baseline, self.samples[-1], self.limits
+        checks = [
+            ("RSS", last.rss_mb - base.rss_mb, limits.rss_growth_mb, "MB"),
+            ("traced memory", last.traced_mb - base.traced_mb, limits.traced_growth_mb, "MB"),
+            ("threads", last.threads - base.threads, limits.thread_growth, ""),
+            ("workers", last.workers - base.workers, limits.worker_growth, ""),
+            ("widgets", last.widgets - base.widgets, limits.widget_growth, ""),
+            ("app state entries", last.state - base.state, limits.state_growth, ""),
+        ]
+        for name, growth, limit, unit in checks:
+            if growth > limit:
+                self.violations.append(f"{name} grew by {growth:g}{unit} (limit {limit:g}{unit})")
+
+    def to_dict(self) -> dict:
+        return {
+            "options": asdict(self.options),
+            "limits": asdict(self.limits),
+            "baseline": asdict(self.baseline) if self.baseline else None,
+            "samples": [asdict(sample) for sample in self.samples],
+            "top_allocators": self.top_allocators,
+            "violations": self.violations,
+            "passed": self.passed,
+        }
+
+
+def _profile_env(options: SoakOptions) -> str:
+    lines = ["MASTODON_HOST=example.social", "MASTODON_ACCESS_TOKEN=soak-token"]
+    for name, minutes in REFRESH_INTERVALS.items():
+        lines.append(f"{name}_AUTO_REFRESH=on")
+        lines.append(f"{name}_AUTO_REFRESH_INTERVAL={minutes / options.speed}")
+    lines.append("LOCAL_TIMELINE_ENABLED=on")
+    lines.append(f"IMAGE_SUPPORT={'on' if options.images else 'off'}")
+    lines.append("AUTO_PRUNE_CACHE=off")
+    return "\n".join(lines) + "\n"
+
+
+def _sample(app, started: float, speed: float) -> SoakSample:
+    elapsed = perf_counter() - started
+    provider = app.autocomplete_provider
+    return SoakSample(
+        elapsed_s=round(elapsed, 1),
+        simulated_s=round(elapsed * speed),
+        rss_mb=round(rss_mb(), 1),
+        traced_mb=round(tracemalloc.get_traced_memory()[0] / 2**20, 1) if tracemalloc.is_tracing() else 0.0,
+        threads=threading.active_count(),
+        workers=len(app.workers),
+        widgets=sum(len(screen.query("*")) for screen in app.screen_stack),
+        post_ids=sum(len(timeline.post_ids) for timeline in app.query(Timeline)),
+        notified_dm_ids=len(app.notified_dm_ids),
+        autocomplete_cache=(len(provider._account_cache) + len(provider._tag_cache)) if provider else 0,
+    )
+
+
+def _top_allocators(before, after) -> list[dict]:
+    ignored = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<unknown>")
+    filters = [tracemalloc.Filter(False, pattern) for pattern in ignored]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    return [
+        {
+            "where": str(stat.traceback[0]),
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats[:TOP_ALLOCATORS]
+    ]
+
+
+class SimulatedUser:
+    """Chooses and performs one user action per tick."""
+
+    def __init__(self, app, pilot, rng: random.Random):
+        self.app = app
+        self.pilot = pilot
+        self.rng = rng
+        keymap = app.keybind_manager.keymap
+        self.keys = {action: keymap.get(action) for action in ("scroll_down", "scroll_up", "focus_next_column", "go_to_top", "refresh_timelines")}
+
+    async def act(self) -> None:
+        if isinstance(self.app.screen, ThreadScreen):
+            await self.pilot.press("escape")
+            return
+        action = self.rng.choices(
+            ("scroll_down", "scroll_up", "focus_next_column", "go_to_top", "refresh_timelines", "open_thread", "autocomplete"),
+            weights=(8, 3, 2, 1, 1, 1, 1),
+        )[0]
+        if action == "open_thread":
+            if self.app.query("Timeline:focus"):
+                await self.pilot.press("enter")
+        elif action == "autocomplete":
+            await self._autocomplete()
+        elif self.keys.get(action):
+            await self.pilot.press(self.keys[action])
+
+    async def _autocomplete(self) -> None:
+        provider = self.app.get_autocomplete_provider()
+        if provider is None:
+            return
+        if self.rng.random() < 0.7:
+            query = f"user{self.rng.randrange(100)}"
+            token = AutocompleteToken("mention", f"@{query}", query, 0, len(query) + 1)
+        else:
+            query = f"tag{self.rng.randrange(100)}"
+            token = AutocompleteToken("hashtag", f"#{query}", query, 0, len(query) + 1)
+        await asyncio.to_thread(provider.get_suggestions, token)
+
+
+class _Arrivals:
+    """Turns a per-simulated-second rate into whole arrivals per tick."""
+
+    def __init__(self, per_second: float):
+        self.per_second = per_second
+        self.pending = 0.0
+
+    def take(self, simulated_seconds: float) -> int:
+        self.pending += self.per_second * simulated_seconds
+        count = int(self.pending)
+        self.pending -= count
+        return count
+
+
+async def _drive(app, pilot, server: MockMastodonServer, options: SoakOptions, report: SoakReport) -> None:
+    await wait_until(
+        lambda: "home" in app.initialized_at and not isinstance(app.screen, SplashScreen), timeout=120
+    )
+    rng = random.Random(options.seed)
+    user = SimulatedUser(app, pilot, rng)
+    posts = _Arrivals(options.posts_per_minute / 60)
+    notifications = _Arrivals(options.notifications_per_hour / 3600)
+    dms = _Arrivals(options.dms_per_hour / 3600)
+    dm_check_every = DM_CHECK_SECONDS / options.speed
+
+    started = last_tick = perf_counter()
+    next_sample = started + options.warmup
+    next_dm_check = started + dm_check_every
+    snapshot = None
+    while (now := perf_counter()) - started < options.duration:
+        simulated = (now - last_tick) * options.speed
+        last_tick = now
+        for timeline in ("home", "local", "public"):
+            count = posts.take(simulated / 3)
+            if count:
+                server.api.add_posts(count, timeline)
+        if count := notifications.take(simulated):
+            server.api.add_notifications(count)
+        if count := dms.take(simulated):
+            server.api.add_conversations(count)
+        if now >= next_dm_check:
+            next_dm_check += dm_check_every
+            app.check_for_dms()
+
+        await user.act()
+
+        if now >= next_sample:
+            next_sample += options.sample_every
+            sample = _sample(app, started, options.speed)
+            report.samples.append(sample)
+            if report.baseline is None:
+                report.baseline = sample
+                if tracemalloc.is_tracing():
+                    snapshot = tracemalloc.take_snapshot()
+            print(
+                f"{sample.elapsed_s:>7.0f}s  sim {sample.simulated_s / 3600:>6.2f}h  "
+                f"rss {sample.rss_mb:>7.1f} MB  traced {sample.traced_mb:>6.1f} MB  "
+                f"threads {sample.threads:>3}  workers {sample.workers:>3}  "
+                f"widgets {sample.widgets:>5}  state {sample.state:>6}",
+                flush=True,
+            )
+        await asyncio.sleep(TICK_SECONDS)
+
+    report.samples.append(_sample(app, started, options.speed))
+    if snapshot is not None:
+        report.top_allocators = _top_allocators(snapshot, tracemalloc.take_snapshot())
+
+
+def run_soak(options: SoakOptions | None = None, limits: SoakLimits | None = None) -> SoakReport:
+    """Run a soak test and return its report, with `violations` filled in."""
+    options = options or SoakOptions()
+    report = SoakReport(options, limits or SoakLimits())
+    server = MockMastodonServer(
+        ("127.0.0.1", 0),
+        ServerOptions(
+            latency_ms=options.latency_ms,
+            jitter_ms=options.latency_ms / 2,
+            rate_limit_window=RATE_LIMIT_WINDOW_SECONDS / options.speed,
+            seed=options.seed,
+        ),
+    )
+    server.start()
+
+    async def run():
+        with TemporaryDirectory(prefix="mastui-soak-") as tmp, isolated_profile(Path(tmp), _profile_env(options)):
+            app = BenchMastui(api_base_url=server.base_url)
+            async with app.run_test(size=APP_SIZE) as pilot:
+                await _drive(app, pilot, server, options, report)
+
+    if options.tracemalloc:
+        tracemalloc.start()
+    try:
+        asyncio.run(run())
+    finally:
+        if options.tracemalloc:
+            tracemalloc.stop()
+        server.stop()
+    report.check()
+    return report
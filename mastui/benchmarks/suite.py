@@ -0,0 +1,223 @@
+"""The benchmarks run by `mastui-bench`.
+
+Every benchmark builds its own fixtures and takes `rounds` samples. Widget
+benchmarks run in a headless Textual app, like `compact_posts`.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from io import BytesIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import asyncio
+import copy
+import random
+
+from PIL import Image as PILImage
+
+from mastui.benchmarks.compact_posts import PostBenchApp, bench_config
+from mastui.benchmarks.fixtures import (
+    make_conversations,
+    make_heavy_status,
+    make_notifications,
+    make_thread,
+    make_timeline,
+)
+from mastui.benchmarks.harness import BenchResult, benchmark, time_rounds
+from mastui.cache import Cache
+from mastui.render_cache import clear_render_caches
+from mastui.utils import to_markdown
+from mastui.view_models import build_timeline_items
+
+TIMELINE_SIZE = 200
+HEAVY_SIZE = 50
+UI_POSTS = 40
+APP_SIZE = (120, 50)
+
+
+@benchmark("markdown.timeline", group="markdown")
+def bench_markdown_timeline(rounds: int) -> BenchResult:
+    """to_markdown on the content of a mixed home timeline."""
+    contents = [(post.get("reblog") or post)["content"] for post in make_timeline(TIMELINE_SIZE)]
+    samples = time_rounds(lambda: [to_markdown(content) for content in contents], rounds)
+    return BenchResult("markdown.timeline", samples, len(contents), "posts")
+
+
+@benchmark("markdown.heavy", group="markdown")
+def bench_markdown_heavy(rounds: int) -> BenchResult:
+    """to_markdown on long posts full of mentions, lists, code and emoji."""
+    rng = random.Random(1)
+    contents = [make_heavy_status(index, rng)["content"] for index in range(HEAVY_SIZE)]
+    samples = time_rounds(lambda: [to_markdown(content) for content in contents], rounds)
+    return BenchResult("markdown.heavy", samples, len(contents), "posts")
+
+
+def _cold(items: list):
+    """A `time_rounds` setup giving each round fresh copies of `items` and empty render caches.
+
+    `build_timeline_items` stores converted markdown on the statuses and in
+    `converted_content`; without this, every round after the first would
+    skip the HTML conversion.
+    """
+
+    def setup():
+        clear_render_caches()
+        return copy.deepcopy(items)
+
+    return setup
+
+
+@benchmark("view_models.home", group="view_models")
+def bench_view_models_home(rounds: int) -> BenchResult:
+    """build_timeline_items for a home timeline."""
+    posts = make_timeline(TIMELINE_SIZE)
+    samples = time_rounds(partial(build_timeline_items, "home"), rounds, setup=_cold(posts))
+    return BenchResult("view_models.home", samples, len(posts), "posts")
+
+
+@benchmark("view_models.notifications", group="view_models")
+def bench_view_models_notifications(rounds: int) -> BenchResult:
+    """build_timeline_items for notifications of every type."""
+    notifications = make_notifications(TIMELINE_SIZE)
+    samples = time_rounds(
+        partial(build_timeline_items, "notifications"), rounds, setup=_cold(notifications)
+    )
+    return BenchResult("view_models.notifications", samples, len(notifications), "notifications")
+
+
+@benchmark("view_models.conversations", group="view_models")
+def bench_view_models_conversations(rounds: int) -> BenchResult:
+    """build_timeline_items for direct message conversations."""
+    conversations = make_conversations(TIMELINE_SIZE)
+    samples = time_rounds(
+        partial(build_timeline_items, "direct"), rounds, setup=_cold(conversations)
+    )
+    return BenchResult("view_models.conversations", samples, len(conversations), "conversations")
+
+
+@benchmark("view_models.thread", group="view_models")
+def bench_view_models_thread(rounds: int) -> BenchResult:
+    """build_timeline_items for a 150-post reply chain."""
+    thread = make_thread(150)
+    statuses = [*thread["ancestors"], thread["status"], *thread["descendants"]]
+    samples = time_rounds(partial(build_timeline_items, "home"), rounds, setup=_cold(statuses))
+    return BenchResult("view_models.thread", samples, len(statuses), "posts")
+
+
+@benchmark("cache.bulk_insert_posts", group="cache")
+def bench_cache_bulk_insert(rounds: int) -> BenchResult:
+    """Cache.bulk_insert_posts into an empty database."""
+    posts = make_timeline(TIMELINE_SIZE)
+    with TemporaryDirectory(prefix="mastui-bench-") as tmp:
+        samples = []
+        for index in range(rounds + 1):
+            cache = Cache(Path(tmp) / f"cache-{index}.db")
+            start = perf_counter()
+            cache.bulk_insert_posts("home", posts)
+            if index:  # the first round warms up
+                samples.append((perf_counter() - start) * 1000)
+    return BenchResult("cache.bulk_insert_posts", samples, len(posts), "posts")
+
+
+@benchmark("cache.get_posts", group="cache")
+def bench_cache_get_posts(rounds: int) -> BenchResult:
+    """Cache.get_posts, paging 40 at a time through 1000 cached posts."""
+    posts = make_timeline(1000)
+    pages = 5
+    with TemporaryDirectory(prefix="mastui-bench-") as tmp:
+        cache = Cache(Path(tmp) / "cache.db")
+        cache.bulk_insert_posts("home", posts)
+
+        def page_through():
+            max_id = None
+            for _ in range(pages):
+                page = cache.get_posts("home", limit=40, max_id=max_id)
+                max_id = page[-1]["id"]
+
+        samples = time_rounds(page_through, rounds)
+    return BenchResult("cache.get_posts", samples, pages * 40, "posts")
+
+
+def _run_app(scenario, config=None):
+    async def run():
+        app = PostBenchApp(config or bench_config())
+        async with app.run_test(size=APP_SIZE) as pilot:
+            return await scenario(app, pilot)
+
+    return asyncio.run(run())
+
+
+async def _wait_for_render(timeline, pilot):
+    while not timeline.initial_render_done or timeline._mounter is not None:
+        await pilot.pause()
+
+
+@benchmark("ui.render_posts", group="ui")
+def bench_render_posts(rounds: int) -> BenchResult:
+    """Timeline.render_posts of a first page, until every post is mounted."""
+    from mastui.timeline import Timeline
+
+    posts = make_timeline(UI_POSTS)
+
+    async def scenario(app, pilot):
+        container = app.query_one("#bench-container")
+        samples = []
+        for index in range(rounds + 1):
+            timeline = Timeline("Home", posts_data=posts, id="home")
+            start = perf_counter()
+            await container.mount(timeline)
+            await _wait_for_render(timeline, pilot)
+            if index:
+                samples.append((perf_counter() - start) * 1000)
+            await timeline.remove()
+        return samples
+
+    return BenchResult("ui.render_posts", _run_app(scenario), len(posts), "posts")
+
+
+@benchmark("ui.adjacent_item", group="ui")
+def bench_adjacent_item(rounds: int) -> BenchResult:
+    """TimelineContent._adjacent_item while stepping through 40 posts."""
+    from mastui.timeline import Timeline
+
+    posts = make_timeline(UI_POSTS)
+
+    async def scenario(app, pilot):
+        timeline = Timeline("Home", posts_data=posts, id="home")
+        await app.query_one("#bench-container").mount(timeline)
+        await _wait_for_render(timeline, pilot)
+        content = timeline.content_container
+        steps = len(posts) - 1
+
+        def step_through():
+            content.selected_item = None
+            for _ in range(steps):
+                content.selected_item = content._adjacent_item(1)
+
+        return time_rounds(step_through, rounds)
+
+    return BenchResult("ui.adjacent_item", _run_app(scenario), UI_POSTS - 1, "steps")
+
+
+@benchmark("ui.render_image", group="ui")
+def bench_render_image(rounds: int) -> BenchResult:
+    """ImageWidget.render_image of a decoded, already encoded image."""
+    from mastui.image import ImageWidget
+    from mastui.image_store import get_store
+
+    config = bench_config(image_support=True)
+    url = "https://files.example.social/small/bench.png"
+    data = BytesIO()
+    PILImage.effect_noise((400, 300), 64).convert("RGB").save(data, "PNG")
+    get_store(config.media_cache_dir).put(url, data.getvalue(), config.profile_name)
+
+    async def scenario(app, pilot):
+        widget = ImageWidget(url, config, lazy=False)
+        await app.query_one("#bench-container").mount(widget)
+        while type(widget.content).__name__ != "HalfcellStrips":
+            await pilot.pause(0.01)
+        return time_rounds(widget.render_image, rounds)
+
+    return BenchResult("ui.render_image", _run_app(scenario, config), 1, "images")
@@ -0,0 +1,122 @@
+"""A small pure-Python BlurHash decoder.
+
+BlurHash (https://blurha.sh) packs a handful of DCT components into a short
+string. Mastodon sends one with every media attachment, so a blurred preview
+can be drawn before any image bytes are downloaded.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+import math
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+_DIGIT_VALUES = {digit: value for value, digit in enumerate(DIGITS)}
+
+Pixel = tuple[int, int, int]
+
+
+def decode83(value: str) -> int:
+    result = 0
+    for char in value:
+        try:
+            result = result * 83 + _DIGIT_VALUES[char]
+        except KeyError:
+            raise ValueError(f"Invalid blurhash character: {char!r}") from None
+    return result
+
+
+def _srgb_to_linear(value: int) -> float:
+    v = value / 255
+    if v <= 0.04045:
+        return v / 12.92
+    return ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exp: float) -> float:
+    return math.copysign(abs(value) ** exp, value)
+
+
+def components(blurhash: str) -> tuple[int, int]:
+    """Return the number of (x, y) components encoded in `blurhash`."""
+    if not blurhash or len(blurhash) < 6:
+        raise ValueError("Blurhash must be at least 6 characters long")
+    size_flag = decode83(blurhash[0])
+    num_x = size_flag % 9 + 1
+    num_y = size_flag // 9 + 1
+    if len(blurhash) != 4 + 2 * num_x * num_y:
+        raise ValueError(
+            f"Blurhash length {len(blurhash)} does not match {num_x}x{num_y} components"
+        )
+    return num_x, num_y
+
+
+def _decode_colors(blurhash: str, punch: float) -> list[tuple[float, float, float]]:
+    num_x, num_y = components(blurhash)
+    max_value = (decode83(blurhash[1]) + 1) / 166 * punch
+
+    dc = decode83(blurhash[2:6])
+    colors = [
+        (
+            _srgb_to_linear(dc >> 16),
+            _srgb_to_linear((dc >> 8) & 255),
+            _srgb_to_linear(dc & 255),
+        )
+    ]
+    for index in range(1, num_x * num_y):
+        ac = decode83(blurhash[4 + index * 2 : 6 + index * 2])
+        colors.append(
+            (
+                _sign_pow((ac // (19 * 19) - 9) / 9, 2.0) * max_value,
+                _sign_pow(((ac // 19) % 19 - 9) / 9, 2.0) * max_value,
+                _sign_pow((ac % 19 - 9) / 9, 2.0) * max_value,
+            )
+        )
+    return colors
+
+
+@lru_cache(maxsize=256)
+def decode(
+    blurhash: str, width: int, height: int, punch: float = 1.0
+) -> tuple[tuple[Pixel, ...], ...]:
+    """Decode `blurhash` into `height` rows of `width` sRGB pixels.
+
+    Raises ValueError for malformed hashes. Results are cached, since the
+    same attachment is usually drawn at the same size more than once.
+    """
+    if width <= 0 or height <= 0:
+        return ()
+    num_x, num_y = components(blurhash)
+    colors = _decode_colors(blurhash, punch)
+
+    cos_x = [
+        [math.cos(math.pi * x * i / width) for i in range(num_x)] for x in range(width)
+    ]
+    cos_y = [
+        [math.cos(math.pi * y * j / height) for j in range(num_y)]
+        for y in range(height)
+    ]
+
+    rows = []
+    for y in range(height):
+        row = []
+        for x in range(width):
+            r = g = b = 0.0
+            for j in range(num_y):
+                basis_y = cos_y[y][j]
+                for i in range(num_x):
+                    basis = cos_x[x][i] * basis_y
+                    color = colors[i + j * num_x]
+                    r += color[0] * basis
+                    g += color[1] * basis
+                    b += color[2] * basis
+            row.append((_linear_to_srgb(r), _linear_to_srgb(g), _linear_to_srgb(b)))
+        rows.append(tuple(row))
+    return tuple(rows)
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import sqlite3
 import json
 from pathlib import Path
@@ -5,6 +7,10 @@ import logging
 from datetime import datetime, timezone, timedelta
 import os
 
+from mastui.image_cache import ENCODED_DIR_NAME
+from mastui.tracing import traced
+from mastui.utils import CONVERTER_VERSION
+
 log = logging.getLogger(__name__)
 
 class CustomJsonEncoder(json.JSONEncoder):
@@ -16,9 +22,30 @@ class CustomJsonEncoder(json.JSONEncoder):
             return obj.isoformat()
         return super().default(obj)
 
+def _edited_at_str(status: dict) -> str | None:
+    edited_at = status.get("edited_at")
+    return str(edited_at) if edited_at is not None else None
+
+
+def _displayed_statuses(items: list):
+    """Yield the statuses inside posts and notifications whose content gets rendered."""
+    for item in items:
+        if not item:
+            continue
+        for status in (item, item.get("status")):
+            if not status:
+                continue
+            status = status.get("reblog") or status
+            if "content" in status and status.get("id"):
+                yield status
+
+
 class Cache:
     def __init__(self, db_path: Path):
         self.db_path = db_path
+        # Lookups by `get_posts` that found posts, or none.
+        self.hits = 0
+        self.misses = 0
         self.initialize_database()
 
     def _get_conn(self):
@@ -54,7 +81,21 @@ class Cache:
                     data TEXT NOT NULL
                 )
             """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS rendered_content (
+                    status_id TEXT PRIMARY KEY,
+                    edited_at TEXT,
+                    converter_version INTEGER NOT NULL,
+                    content_md TEXT NOT NULL
+                )
+            """)
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_timeline_id ON posts (timeline_id, id)")
+            # Markdown from an older converter is never read again.
+            cursor.execute(
+                "DELETE FROM rendered_content WHERE converter_version != ?", (CONVERTER_VERSION,)
+            )
+            if cursor.rowcount > 0:
+                log.info(f"Dropped {cursor.rowcount} rendered posts from an older converter")
             conn.commit()
         except sqlite3.Error as e:
             log.error(f"Failed to create tables: {e}", exc_info=True)
@@ -62,6 +103,7 @@ class Cache:
             if conn:
                 conn.close()
 
+    @traced("cache")
     def get_conversations(self):
         """Get all conversations from the database."""
         conn = self._get_conn()
@@ -90,6 +132,7 @@ class Cache:
             if conn:
                 conn.close()
 
+    @traced("cache")
     def bulk_insert_conversations(self, conversations: list):
         """Bulk insert conversations into the database."""
         if not conversations:
@@ -137,6 +180,7 @@ class Cache:
             if conn:
                 conn.close()
 
+    @traced("cache")
     def bulk_insert_posts(self, timeline_id: str, posts: list):
         """Bulk insert posts into the database."""
         if not posts:
@@ -177,6 +221,7 @@ class Cache:
             if conn:
                 conn.close()
 
+    @traced("cache")
     def get_latest_post_timestamp(self, timeline_id: str) -> datetime | None:
         """Get the timestamp of the latest post in the cache for a timeline."""
         conn = self._get_conn()
@@ -196,6 +241,7 @@ class Cache:
             if conn:
                 conn.close()
 
+    @traced("cache")
     def get_posts(self, timeline_id: str, limit: int = 20, max_id: str = None):
         """Get posts from the database, ordered by ID."""
         conn = self._get_conn()
@@ -215,7 +261,13 @@ class Cache:
 
             cursor.execute(query, params)
             rows = cursor.fetchall()
-            return [json.loads(row['data']) for row in rows]
+            posts = [json.loads(row['data']) for row in rows]
+            self._attach_rendered_content(cursor, posts)
+            if posts:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return posts
         except sqlite3.Error as e:
             log.error(f"Failed to get posts: {e}", exc_info=True)
             return []
@@ -223,6 +275,63 @@ class Cache:
             if conn:
                 conn.close()
 
+    def _attach_rendered_content(self, cursor, items: list):
+        """Attach persisted markdown to the statuses of `items`, if still valid."""
+        statuses = {}
+        for status in _displayed_statuses(items):
+            # Drop anything that was serialized with the status itself; only
+            # rows matching edited_at and the converter version are trusted.
+            status.pop("_cached_markdown", None)
+            status.pop("_persisted_markdown", None)
+            statuses.setdefault(str(status["id"]), []).append(status)
+        if not statuses:
+            return
+
+        status_ids = list(statuses)
+        placeholders = ",".join("?" for _ in status_ids)
+        cursor.execute(
+            f"SELECT status_id, edited_at, content_md FROM rendered_content "  # nosec B608
+            f"WHERE converter_version = ? AND status_id IN ({placeholders})",
+            [CONVERTER_VERSION, *status_ids],
+        )
+        for row in cursor.fetchall():
+            for status in statuses.get(row['status_id'], []):
+                if _edited_at_str(status) == row['edited_at']:
+                    status["_cached_markdown"] = row['content_md']
+                    status["_persisted_markdown"] = True
+
+    @traced("cache")
+    def bulk_insert_rendered_content(self, items: list):
+        """Persist converted markdown for statuses that were rendered but not yet stored."""
+        rows = []
+        pending = []
+        for status in _displayed_statuses(items):
+            content_md = status.get("_cached_markdown")
+            if content_md is None or status.get("_persisted_markdown"):
+                continue
+            rows.append((str(status["id"]), _edited_at_str(status), CONVERTER_VERSION, content_md))
+            pending.append(status)
+        if not rows:
+            return
+        conn = self._get_conn()
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR REPLACE INTO rendered_content (status_id, edited_at, converter_version, content_md) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+            for status in pending:
+                status["_persisted_markdown"] = True
+            log.debug(f"Stored rendered content for {len(rows)} statuses")
+        except sqlite3.Error as e:
+            log.error(f"Failed to store rendered content: {e}", exc_info=True)
+        finally:
+            if conn:
+                conn.close()
+
     def delete_post(self, post_id: str):
         """Remove a post from all timelines in the cache."""
         conn = self._get_conn()
@@ -231,6 +340,7 @@ class Cache:
         try:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM posts WHERE id = ?", (post_id,))
+            cursor.execute("DELETE FROM rendered_content WHERE status_id = ?", (post_id,))
             conn.commit()
             log.info(f"Deleted post {post_id} from cache.")
         except sqlite3.Error as e:
@@ -239,8 +349,30 @@ class Cache:
             if conn:
                 conn.close()
 
-    def prune_image_cache(self, days: int = 30) -> int:
-        """Prune the image cache of files older than a certain number of days."""
+    def stats(self) -> dict:
+        """The rows per table and the size of the database file in bytes."""
+        rows = {}
+        conn = self._get_conn()
+        if conn:
+            try:
+                cursor = conn.cursor()
+                for table in ("posts", "conversations", "rendered_content"):
+                    cursor.execute(f"SELECT COUNT(*) FROM {table}")  # nosec B608
+                    rows[table] = cursor.fetchone()[0]
+            except sqlite3.Error as e:
+                log.error(f"Failed to count cached rows: {e}", exc_info=True)
+            finally:
+                conn.close()
+        size = self.db_path.stat().st_size if self.db_path.exists() else 0
+        return {"rows": rows, "bytes": size}
+
+    def prune_image_cache(self, days: int = 30, store=None) -> int:
+        """Prune the image cache of files not used for a certain number of days.
+
+        Downloaded images are released from the shared image `store` for this
+        profile. Encoded images are kept in the profile and pruned by
+        modification time.
+        """
         count = 0
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
         
@@ -248,16 +380,22 @@ class Cache:
         if not image_cache_dir.exists():
             return 0
 
-        for filename in os.listdir(image_cache_dir):
-            file_path = image_cache_dir / filename
-            try:
-                if file_path.is_file():
-                    modified_time = datetime.fromtimestamp(file_path.stat().st_mtime, tz=timezone.utc)
-                    if modified_time < cutoff:
-                        file_path.unlink()
-                        count += 1
-            except Exception as e:
-                log.error(f"Error pruning cache file {file_path}: {e}", exc_info=True)
+        if store is not None:
+            count += store.prune(days, self.db_path.parent.name)
+            count += store.evict()
+
+        encoded_dir = image_cache_dir / ENCODED_DIR_NAME
+        if encoded_dir.is_dir():
+            for filename in os.listdir(encoded_dir):
+                file_path = encoded_dir / filename
+                try:
+                    if file_path.is_file():
+                        modified_time = datetime.fromtimestamp(file_path.stat().st_mtime, tz=timezone.utc)
+                        if modified_time < cutoff:
+                            file_path.unlink()
+                            count += 1
+                except Exception as e:
+                    log.error(f"Error pruning cache file {file_path}: {e}", exc_info=True)
         
         log.info(f"Pruned {count} items from the image cache.")
         return count
@@ -7,6 +7,7 @@ from mastui.languages import (
     dedupe_language_codes,
     get_default_language_codes,
 )
+from mastui.profile_manager import profile_manager
 
 log = logging.getLogger(__name__)
 
@@ -31,8 +32,11 @@ class Config:
         
         self.profile_name = self.profile_path.name
 
+        # Downloaded images live in the shared media cache; this directory
+        # only keeps what is derived from them for this profile.
         self.image_cache_dir = self.profile_path / "image_cache"
         self.image_cache_dir.mkdir(exist_ok=True)
+        self.media_cache_dir = profile_manager.media_cache_dir
         self.env_file = self.profile_path / ".env"
         
         config_values = {}
@@ -66,6 +70,15 @@ class Config:
         # Image settings
         self.image_support = config_values.get("IMAGE_SUPPORT", "off") == "on"
         self.image_renderer = config_values.get("IMAGE_RENDERER", "ansi")
+        self.image_load_margin = int(config_values.get("IMAGE_LOAD_MARGIN", "20"))
+        self.image_prefetch_items = int(config_values.get("IMAGE_PREFETCH_ITEMS", "3"))
+        self.image_memory_budget_mb = int(config_values.get("IMAGE_MEMORY_BUDGET_MB", "64"))
+        self.image_encoded_disk_cache = config_values.get("IMAGE_ENCODED_DISK_CACHE", "off") == "on"
+        self.image_process_pool = config_values.get("IMAGE_PROCESS_POOL", "off") == "on"
+        self.image_process_workers = int(config_values.get("IMAGE_PROCESS_WORKERS", "2"))
+        self.image_cache_max_mb = int(config_values.get("IMAGE_CACHE_MAX_MB", "512"))
+        # The media cache is shared, so the largest cap of all profiles applies.
+        self.media_cache_max_mb = profile_manager.media_cache_max_mb()
         self.auto_prune_cache = config_values.get("AUTO_PRUNE_CACHE", "on") == "on"
 
         # Timeline settings
@@ -75,6 +88,16 @@ class Config:
         self.federated_timeline_enabled = config_values.get("FEDERATED_TIMELINE_ENABLED", "on") == "on"
         self.direct_timeline_enabled = config_values.get("DIRECT_TIMELINE_ENABLED", "on") == "on"
         self.force_single_column = config_values.get("FORCE_SINGLE_COLUMN", "off") == "on"
+        self.compact_posts = config_values.get("COMPACT_POSTS", "off") == "on"
+
+        # Performance settings
+        self.mount_frame_budget_ms = float(config_values.get("MOUNT_FRAME_BUDGET_MS", "12"))
+        self.stall_watchdog = config_values.get("STALL_WATCHDOG", "off") == "on"
+        self.stall_threshold_ms = float(config_values.get("STALL_THRESHOLD_MS", "250"))
+        self.profiler_mode = config_values.get("PROFILER_MODE", "sample")
+        self.metrics_export = config_values.get("METRICS_EXPORT", "off") == "on"
+        self.metrics_export_interval = float(config_values.get("METRICS_EXPORT_INTERVAL", "30"))
+        self.metrics_port = int(config_values.get("METRICS_PORT", "0"))
 
         # Notification settings
         self.notifications_popups_mentions = config_values.get("NOTIFICATIONS_POPUPS_MENTIONS", "off") == "on"
@@ -120,6 +143,13 @@ class Config:
             f.write(f"FEDERATED_AUTO_REFRESH_INTERVAL={self.federated_auto_refresh_interval}\n")
             f.write(f"IMAGE_SUPPORT={'on' if self.image_support else 'off'}\n")
             f.write(f"IMAGE_RENDERER={self.image_renderer}\n")
+            f.write(f"IMAGE_LOAD_MARGIN={self.image_load_margin}\n")
+            f.write(f"IMAGE_PREFETCH_ITEMS={self.image_prefetch_items}\n")
+            f.write(f"IMAGE_MEMORY_BUDGET_MB={self.image_memory_budget_mb}\n")
+            f.write(f"IMAGE_ENCODED_DISK_CACHE={'on' if self.image_encoded_disk_cache else 'off'}\n")
+            f.write(f"IMAGE_PROCESS_POOL={'on' if self.image_process_pool else 'off'}\n")
+            f.write(f"IMAGE_PROCESS_WORKERS={self.image_process_workers}\n")
+            f.write(f"IMAGE_CACHE_MAX_MB={self.image_cache_max_mb}\n")
             f.write(f"AUTO_PRUNE_CACHE={'on' if self.auto_prune_cache else 'off'}\n")
             f.write(f"HOME_TIMELINE_ENABLED={'on' if self.home_timeline_enabled else 'off'}\n")
             f.write(f"LOCAL_TIMELINE_ENABLED={'on' if self.local_timeline_enabled else 'off'}\n")
@@ -127,6 +157,14 @@ class Config:
             f.write(f"FEDERATED_TIMELINE_ENABLED={'on' if self.federated_timeline_enabled else 'off'}\n")
             f.write(f"DIRECT_TIMELINE_ENABLED={'on' if self.direct_timeline_enabled else 'off'}\n")
             f.write(f"FORCE_SINGLE_COLUMN={'on' if self.force_single_column else 'off'}\n")
+            f.write(f"COMPACT_POSTS={'on' if self.compact_posts else 'off'}\n")
+            f.write(f"MOUNT_FRAME_BUDGET_MS={self.mount_frame_budget_ms}\n")
+            f.write(f"STALL_WATCHDOG={'on' if self.stall_watchdog else 'off'}\n")
+            f.write(f"STALL_THRESHOLD_MS={self.stall_threshold_ms}\n")
+            f.write(f"PROFILER_MODE={self.profiler_mode}\n")
+            f.write(f"METRICS_EXPORT={'on' if self.metrics_export else 'off'}\n")
+            f.write(f"METRICS_EXPORT_INTERVAL={self.metrics_export_interval}\n")
+            f.write(f"METRICS_PORT={self.metrics_port}\n")
             f.write(f"NOTIFICATIONS_POPUPS_MENTIONS={'on' if self.notifications_popups_mentions else 'off'}\n")
             f.write(f"NOTIFICATIONS_POPUPS_FOLLOWS={'on' if self.notifications_popups_follows else 'off'}\n")
             f.write(f"NOTIFICATIONS_POPUPS_REBLOGS={'on' if self.notifications_popups_reblogs else 'off'}\n")
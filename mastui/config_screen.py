@@ -113,6 +113,10 @@ class ConfigScreen(ModalScreen):
                     )
                     yield Static() # Spacer
 
+                    yield Label("Compact post rendering?", classes="config-label")
+                    yield Switch(value=config.compact_posts, id="compact_posts")
+                    yield Static()  # Spacer
+
             with Collapsible(title="Auto-Refresh (in minutes)"):
                 with Grid(classes="config-group-body"):
                     yield Label("Auto-refresh home?", classes="config-label")
@@ -164,7 +168,7 @@ class ConfigScreen(ModalScreen):
                     )
 
                     yield Label(
-                        "Auto-prune cache (older than 30 days)?", classes="config-label"
+                        "Auto-prune cache (unused for 30 days)?", classes="config-label"
                     )
                     yield Switch(value=config.auto_prune_cache, id="auto_prune_cache")
                     yield Static()  # Spacer
@@ -366,6 +370,7 @@ class ConfigScreen(ModalScreen):
             "#direct_timeline_enabled"
         ).value
         config.force_single_column = self.query_one("#force_single_column").value
+        config.compact_posts = self.query_one("#compact_posts").value
 
         # Save notification settings
         config.notifications_popups_mentions = self.query_one("#notifications_popups_mentions").value
@@ -2,7 +2,8 @@ from textual.screen import ModalScreen
 from textual.widgets import Static
 from textual.containers import VerticalScroll, Container
 from mastui.widgets import Post, LikePost, BoostPost
-from mastui.filters import is_status_hidden_by_filter
+from mastui.mounting import ChunkedMounter
+from mastui.view_models import build_status_views
 from mastui.messages import ConversationRead
 from mastui.reply import ReplyScreen
 from mastui.edit_post_screen import EditPostScreen
@@ -57,59 +58,85 @@ class ConversationScreen(ModalScreen):
             # Then fetch the content
             context = self.api.status_context(self.last_status_id)
             main_post_data = self.api.status(self.last_status_id)
-            self.app.call_from_thread(self.render_conversation, context, main_post_data)
+            views = build_status_views(
+                [
+                    *context.get("ancestors", []),
+                    main_post_data,
+                    *context.get("descendants", []),
+                ]
+            )
+            self.app.call_from_thread(
+                self.render_conversation, context, main_post_data, views
+            )
 
         except Exception as e:
             log.error(f"Error loading conversation: {e}", exc_info=True)
             self.app.notify(f"Error loading conversation: {e}", severity="error")
             self.app.call_from_thread(self.dismiss)
 
-    def render_conversation(self, context, main_post_data):
+    def render_conversation(self, context, main_post_data, views=None):
         """Render the conversation."""
         container = self.query_one("#conversation-container")
         container.query("*").remove()
+        views = views or build_status_views(
+            [*context.get("ancestors", []), main_post_data, *context.get("descendants", [])]
+        )
 
         ancestors = context.get("ancestors", [])
         descendants = context.get("descendants", [])
-        mounted_posts = 0
-        
+        widgets = []
+
         for post in ancestors:
-            if is_status_hidden_by_filter(post.get("reblog") or post):
+            view = views[str(post["id"])]
+            if view.hidden:
                 continue
-            container.mount(Post(post, timeline_id="conversation"))
-            mounted_posts += 1
+            widgets.append(Post(post, timeline_id="conversation", view=view))
 
-        if is_status_hidden_by_filter(main_post_data.get("reblog") or main_post_data):
-            container.mount(
+        main_view = views[str(main_post_data["id"])]
+        if main_view.hidden:
+            widgets.append(
                 Static(
                     "The selected direct message is hidden by your filters.",
                     classes="status-message",
                 )
             )
         else:
-            main_post = Post(main_post_data, timeline_id="conversation")
+            main_post = Post(main_post_data, timeline_id="conversation", view=main_view)
             main_post.add_class("main-post")
-            container.mount(main_post)
-            mounted_posts += 1
+            widgets.append(main_post)
 
         for post in descendants:
-            if is_status_hidden_by_filter(post.get("reblog") or post):
+            view = views[str(post["id"])]
+            if view.hidden:
                 continue
-            reply_post = Post(post, timeline_id="conversation")
+            reply_post = Post(post, timeline_id="conversation", view=view)
             reply_post.add_class("reply-post")
-            container.mount(reply_post)
-            mounted_posts += 1
-        
-        if mounted_posts:
-            self.select_first_item()
-        else:
-            container.mount(
+            widgets.append(reply_post)
+
+        mounted_posts = sum(1 for widget in widgets if isinstance(widget, Post))
+        if not mounted_posts:
+            widgets.append(
                 Static(
                     "No visible posts in this conversation due to your filters.",
                     classes="status-message",
                 )
             )
 
+        def on_first_chunk():
+            if mounted_posts:
+                self.select_first_item()
+
+        def mount_posts():
+            ChunkedMounter(
+                container,
+                widgets,
+                budget_ms=self.app.config.mount_frame_budget_ms,
+                on_first_chunk=on_first_chunk,
+                label="conversation",
+            ).start()
+
+        self.call_after_refresh(mount_posts)
+
     def select_first_item(self):
         if self.selected_item:
             self.selected_item.remove_class("selected")
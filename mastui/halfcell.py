@@ -0,0 +1,198 @@
+"""Encode images as coloured half-block cells.
+
+Each terminal cell shows two vertically stacked pixels: the upper one as the
+foreground colour of "▀" and the lower one as the background. The encoder
+resizes and quantizes with Pillow, pairs rows and merges runs of identical
+cells into one segment. When NumPy is installed the pairing and run
+detection are vectorized; otherwise a pure-Python loop does the same work.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+
+from PIL import Image as PILImage
+from rich.color import Color, ColorType
+from rich.color_triplet import ColorTriplet
+from rich.measure import Measurement
+from rich.segment import Segment
+from rich.style import Style
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+log = logging.getLogger(__name__)
+
+HALF_BLOCK = "▀"
+# Images are reduced to an adaptive palette of this many colours before
+# encoding. Cells then share colours far more often, which makes for longer
+# runs and fewer Rich styles; at terminal resolution the loss is invisible.
+PALETTE_COLORS = 256
+
+
+def halfcell_rows(image: PILImage.Image, cells: int) -> int:
+    """Number of terminal rows for an image drawn `cells` wide with half blocks.
+
+    Cells are assumed to be twice as tall as they are wide, so every cell
+    covers a square of 1x2 pixels.
+    """
+    return max(1, round(cells * image.height / image.width / 2))
+
+
+def _color(value: int, colors: dict) -> Color:
+    color = colors.get(value)
+    if color is None:
+        triplet = ColorTriplet(value >> 16, (value >> 8) & 255, value & 255)
+        color = Color(f"#{value:06x}", ColorType.TRUECOLOR, triplet=triplet)
+        colors[value] = color
+    return color
+
+
+def _pair_style(value: int, styles: dict, colors: dict) -> Style:
+    style = styles.get(value)
+    if style is None:
+        style = Style.from_color(
+            _color(value >> 24, colors), _color(value & 0xFFFFFF, colors)
+        )
+        styles[value] = style
+    return style
+
+
+def _lines_numpy(rows: list[tuple[bytes, bytes]], cells: int) -> list[list[Segment]]:
+    upper = np.frombuffer(b"".join(u for u, _ in rows), dtype=np.uint8)
+    lower = np.frombuffer(b"".join(lo for _, lo in rows), dtype=np.uint8)
+    upper = upper.reshape(len(rows), cells, 3).astype(np.uint64)
+    lower = lower.reshape(len(rows), cells, 3).astype(np.uint64)
+    # One 48-bit key per cell: upper RGB in the high half, lower RGB below.
+    keys = (
+        (upper[..., 0] << 40)
+        | (upper[..., 1] << 32)
+        | (upper[..., 2] << 24)
+        | (lower[..., 0] << 16)
+        | (lower[..., 1] << 8)
+        | lower[..., 2]
+    )
+
+    # Start of every run of identical cells, for all rows at once.
+    starts = np.ones(keys.shape, dtype=bool)
+    starts[:, 1:] = keys[:, 1:] != keys[:, :-1]
+
+    styles = {}
+    colors = {}
+    lines = []
+    for row_keys, row_starts in zip(keys, starts):
+        positions = np.flatnonzero(row_starts)
+        lengths = np.diff(np.append(positions, cells)).tolist()
+        values = row_keys[positions].tolist()
+        lines.append(
+            [
+                Segment(HALF_BLOCK * length, _pair_style(value, styles, colors))
+                for value, length in zip(values, lengths)
+            ]
+        )
+    return lines
+
+
+def _lines_python(rows: list[tuple[bytes, bytes]], cells: int) -> list[list[Segment]]:
+    styles = {}
+    colors = {}
+    lines = []
+    for upper, lower in rows:
+        line = []
+        previous = None
+        length = 0
+        for x in range(0, cells * 3, 3):
+            value = (
+                (upper[x] << 40)
+                | (upper[x + 1] << 32)
+                | (upper[x + 2] << 24)
+                | (lower[x] << 16)
+                | (lower[x + 1] << 8)
+                | lower[x + 2]
+            )
+            if value == previous:
+                length += 1
+                continue
+            if previous is not None:
+                line.append(Segment(HALF_BLOCK * length, _pair_style(previous, styles, colors)))
+            previous = value
+            length = 1
+        if previous is not None:
+            line.append(Segment(HALF_BLOCK * length, _pair_style(previous, styles, colors)))
+        lines.append(line)
+    return lines
+
+
+class HalfcellStrips:
+    """An image encoded as half-block cells: one RGB pair per cell.
+
+    `rows` holds (upper, lower) byte strings of packed RGB pixels, so an
+    encoding can be stored as JSON. `prepare` turns them into Rich segments
+    once; after that, drawing the image does no per-pixel work.
+    """
+
+    def __init__(self, width: int, rows: list[tuple[bytes, bytes]]):
+        self.width = width
+        self.rows = rows
+        self._lines = None
+
+    @property
+    def height(self) -> int:
+        return len(self.rows)
+
+    def prepare(self, use_numpy: bool | None = None) -> "HalfcellStrips":
+        """Build the segments now, e.g. in a worker thread. Returns self."""
+        if self._lines is None:
+            if use_numpy is None:
+                use_numpy = np is not None
+            if use_numpy and self.rows:
+                self._lines = _lines_numpy(self.rows, self.width)
+            else:
+                self._lines = _lines_python(self.rows, self.width)
+        return self
+
+    def __rich_console__(self, console, options):
+        self.prepare()
+        new_line = Segment.line()
+        for line in self._lines:
+            yield from line
+            yield new_line
+
+    def __rich_measure__(self, console, options) -> Measurement:
+        return Measurement(self.width, self.width)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "width": self.width,
+                "rows": [[upper.hex(), lower.hex()] for upper, lower in self.rows],
+            }
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "HalfcellStrips":
+        payload = json.loads(data)
+        rows = [(bytes.fromhex(upper), bytes.fromhex(lower)) for upper, lower in payload["rows"]]
+        return cls(int(payload["width"]), rows)
+
+
+def encode_halfcell(
+    image: PILImage.Image, cells: int, palette_colors: int = PALETTE_COLORS
+) -> HalfcellStrips:
+    """Encode `image` as half-block cells, `cells` wide."""
+    rows = halfcell_rows(image, cells)
+    scaled = image.convert("RGB").resize((cells, rows * 2), PILImage.Resampling.BOX)
+    if palette_colors:
+        scaled = scaled.quantize(
+            colors=palette_colors, method=PILImage.Quantize.FASTOCTREE
+        ).convert("RGB")
+    data = scaled.tobytes()
+    stride = cells * 3
+    strips = [
+        (data[y * stride : (y + 1) * stride], data[(y + 1) * stride : (y + 2) * stride])
+        for y in range(0, rows * 2, 2)
+    ]
+    return HalfcellStrips(cells, strips)
@@ -4,7 +4,8 @@ from textual.containers import Container
 from textual.events import Key
 from rich.markup import escape as escape_markup
 from mastui.widgets import Post
-from mastui.filters import is_status_hidden_by_filter
+from mastui.mounting import ChunkedMounter
+from mastui.view_models import build_status_views
 from mastui.timeline_content import TimelineContent
 import logging
 
@@ -48,13 +49,14 @@ class HashtagTimeline(ModalScreen):
         """Load the posts for the hashtag."""
         try:
             posts = self.api.timeline_hashtag(self.hashtag)
-            self.app.call_from_thread(self.render_posts, posts)
+            views = build_status_views(posts)
+            self.app.call_from_thread(self.render_posts, posts, views)
         except Exception as e:
             log.error(f"Error loading hashtag timeline: {e}", exc_info=True)
             self.app.notify(f"Error loading hashtag timeline: {e}", severity="error")
             self.dismiss()
 
-    def render_posts(self, posts):
+    def render_posts(self, posts, views=None):
         """Render the posts."""
         container = self.query_one("#hashtag-timeline-container")
         container.query("*").remove()
@@ -65,22 +67,31 @@ class HashtagTimeline(ModalScreen):
             )
             return
 
-        visible_posts = 0
-        for post in posts:
-            if is_status_hidden_by_filter(post.get("reblog") or post):
-                continue
-            container.mount(Post(post, timeline_id="hashtag"))
-            visible_posts += 1
-
-        if visible_posts:
-            container.select_first_item()
-        else:
+        views = views or build_status_views(posts)
+        widgets = [
+            Post(post, timeline_id="hashtag", view=views[str(post["id"])])
+            for post in posts
+            if not views[str(post["id"])].hidden
+        ]
+        if not widgets:
             container.mount(
                 Static(
                     f"No visible posts for #{self.hashtag} due to your filters.",
                     classes="status-message",
                 )
             )
+            return
+
+        def mount_posts():
+            ChunkedMounter(
+                container,
+                widgets,
+                budget_ms=self.app.config.mount_frame_budget_ms,
+                on_first_chunk=container.select_first_item,
+                label="hashtag",
+            ).start()
+
+        self.call_after_refresh(mount_posts)
 
     def on_key(self, event: Key) -> None:
         if event.key == "up":
@@ -1,99 +1,457 @@
+from __future__ import annotations
+
 from textual.widgets import Static
+from textual.containers import ScrollableContainer
 from textual import events
+from functools import partial
+import hashlib
 import httpx
-from io import BytesIO
 from textual_image.renderable import Image, HalfcellImage, TGPImage
 from textual_image.widget.sixel import Image as SixelWidget
-from PIL import Image as PILImage
-import hashlib
+from rich.color import Color
+from rich.segment import Segment
+from rich.style import Style
+from mastui.blurhash import decode as decode_blurhash
+from mastui.halfcell import encode_halfcell
+from mastui import image_pool
+from mastui.image_cache import (
+    CONTENT_DIGEST_INFO,
+    decoded_images,
+    encoded_images,
+    encoded_key,
+    target_pixel_width,
+)
+from mastui.image_store import CacheHeaders, StoredImage, get_store
+from mastui.messages import ViewImage
+from mastui.metrics import downloaded_bytes
+from mastui.tracing import traced
 import logging
+import os
+import threading
 import time
 
 log = logging.getLogger(__name__)
 MAX_IMAGE_RETRIES = 3
 RETRY_BACKOFF_SECONDS = 0.5
+# Partial downloads smaller than this are restarted rather than resumed.
+MIN_RESUME_BYTES = 64 * 1024
+# Downloads are cancelled once an image is this many load margins away.
+CANCEL_MARGIN_FACTOR = 3
+DEFAULT_ASPECT = 16 / 9
+MAX_PLACEHOLDER_ROWS = 40
+# Blurhashes are decoded at most this many pixels across and down, then
+# scaled up: a hash holds only a few colour components, so decoding it at
+# the full cell size looks the same and costs far more.
+PLACEHOLDER_PIXELS = 32
+# Assumed width of an image that has not been laid out yet.
+DEFAULT_TARGET_CELLS = 80
+RENDERERS = {
+    "auto": Image,
+    "ansi": HalfcellImage,
+    "tgp": TGPImage,
+}
+
+
+def placeholder_rows(width: int, aspect: float | None = None) -> int:
+    """The rows of a placeholder `width` cells wide for an image of `aspect`."""
+    aspect = aspect if aspect and aspect > 0 else DEFAULT_ASPECT
+    return max(1, min(MAX_PLACEHOLDER_ROWS, round(width / aspect / 2)))
+
+
+class BlurhashPlaceholder:
+    """A blurhash drawn with half blocks, two pixels per cell.
+
+    The hash is decoded at most `PLACEHOLDER_PIXELS` square and scaled up
+    to `width` cells with nearest-neighbour sampling.
+    """
+
+    def __init__(self, blurhash: str, width: int, aspect: float | None = None):
+        self.width = width
+        self.rows = placeholder_rows(width, aspect)
+        self.pixels = decode_blurhash(
+            blurhash, min(width, PLACEHOLDER_PIXELS), min(self.rows * 2, PLACEHOLDER_PIXELS)
+        )
+
+    def __rich_console__(self, console, options):
+        new_line = Segment.line()
+        source_rows = len(self.pixels)
+        source_width = len(self.pixels[0])
+        pixel_rows = self.rows * 2
+        for row in range(self.rows):
+            top = self.pixels[2 * row * source_rows // pixel_rows]
+            bottom = self.pixels[(2 * row + 1) * source_rows // pixel_rows]
+            # Each source column covers a run of cells, drawn as one segment.
+            start = 0
+            for column in range(source_width):
+                end = (column + 1) * self.width // source_width
+                if end > start:
+                    yield Segment(
+                        "▀" * (end - start),
+                        Style(
+                            color=Color.from_rgb(*top[column]),
+                            bgcolor=Color.from_rgb(*bottom[column]),
+                        ),
+                    )
+                start = end
+            yield new_line
 
 
 class ImageWidget(Static):
     """A widget to display an image."""
 
-    def __init__(self, url: str, config, **kwargs):
+    def __init__(
+        self,
+        url: str,
+        config,
+        lazy: bool = True,
+        blurhash: str | None = None,
+        aspect: float | None = None,
+        media=None,
+        **kwargs,
+    ):
         super().__init__("🖼️  Loading image...", **kwargs)
         self.url = url
         self.config = config
-        self.pil_image = None
+        self.lazy = lazy
+        self.blurhash = blurhash
+        self.aspect = aspect
+        self.media = media
+        self._image_key = None
         self._is_mounted = False
         self._sixel_widget = None
+        self._scroll_parent = None
+        self._worker = None
+        self._cancel_event = None
+
+    @classmethod
+    def for_media(cls, media, config, **kwargs) -> "ImageWidget":
+        """An inline image for a media attachment.
+
+        Inline images use the small preview; the original is only fetched by
+        the full-size viewer.
+        """
+        return cls(
+            media.preview_url or media.url,
+            config,
+            blurhash=media.blurhash,
+            aspect=media.aspect,
+            media=media,
+            **kwargs,
+        )
 
     def on_mount(self) -> None:
-        """Load the image when the widget is mounted."""
+        """Load the image now, or once it gets close to the visible area."""
         self._is_mounted = True
-        self.run_worker(self.load_image, thread=True)
+        self._scroll_parent = self._find_scroll_parent()
+        if not self.lazy or self._scroll_parent is None:
+            self.start_loading()
+            return
+        self.watch(self._scroll_parent, "scroll_y", self._on_parent_scroll, init=False)
+        self.call_after_refresh(self.check_visibility)
 
     def on_unmount(self) -> None:
-        """Set the mounted flag to False when the widget is unmounted."""
+        """Set the mounted flag to False and stop any download in progress."""
         self._is_mounted = False
+        self.cancel_loading()
+
+    def _find_scroll_parent(self):
+        for ancestor in self.ancestors:
+            if isinstance(ancestor, ScrollableContainer):
+                return ancestor
+        return None
+
+    @property
+    def pil_image(self):
+        """The decoded image, as long as it is still in the shared cache."""
+        if self._image_key is None:
+            return None
+        return decoded_images.peek(self._image_key)
+
+    @property
+    def is_loading(self) -> bool:
+        return self._worker is not None and not self._worker.is_finished
+
+    def _target_width(self) -> int:
+        cells = self.size.width - 4 if self.size.width > 4 else DEFAULT_TARGET_CELLS
+        return target_pixel_width(cells, self.config.image_renderer)
+
+    def start_loading(self) -> None:
+        """Start loading the image, unless it is loaded big enough or loading already."""
+        if self.is_loading or not self._is_mounted:
+            return
+        target_width = self._target_width()
+        if self.pil_image is not None and self._image_key[1] >= target_width:
+            return
+        self._cancel_event = threading.Event()
+        cells = self.size.width - 4 if self.size.width > 4 else None
+        self._worker = self.run_worker(
+            partial(self.load_image, self._cancel_event, target_width, cells),
+            thread=True,
+        )
+
+    def cancel_loading(self) -> None:
+        """Abandon a download in progress; it is started again when needed."""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        if self.is_loading:
+            self._worker.cancel()
+        self._worker = None
+
+    def viewport_distance(self) -> int | None:
+        """Lines between this widget and the visible part of its scroll parent.
+
+        Returns 0 when (partly) visible and None when the widget has no layout
+        yet, e.g. because its column is hidden.
+        """
+        region = self.region
+        if self._scroll_parent is None or not region:
+            return None
+        viewport = self._scroll_parent.scrollable_content_region
+        if region.bottom <= viewport.y:
+            return viewport.y - region.bottom
+        if region.y >= viewport.bottom:
+            return region.y - viewport.bottom
+        return 0
+
+    def check_visibility(self) -> None:
+        """Start or cancel loading depending on the distance to the viewport."""
+        if not self._is_mounted or self.pil_image is not None:
+            return
+        distance = self.viewport_distance()
+        if distance is None:
+            return
+        margin = self.config.image_load_margin
+        if distance <= margin:
+            self.start_loading()
+        elif self.is_loading and distance > margin * CANCEL_MARGIN_FACTOR:
+            log.debug(f"Image scrolled far away, cancelling download: {self.url}")
+            self.cancel_loading()
+
+    def _on_parent_scroll(self, old_value: float, new_value: float) -> None:
+        self.check_visibility()
+
+    def load_image(
+        self,
+        cancel_event: threading.Event | None = None,
+        target_width: int | None = None,
+        cells: int | None = None,
+    ):
+        """Loads the image from the cache or URL.
+
+        If the widget's width is known (`cells`), half-cell output is encoded
+        here as well, so the UI thread only has to draw it.
+        """
+        cancel_event = cancel_event or threading.Event()
+        target_width = target_width or target_pixel_width(
+            DEFAULT_TARGET_CELLS, self.config.image_renderer
+        )
+        key = (self.url, target_width)
+
+        def load():
+            image_data = self._read_image_data(cancel_event)
+            if image_data is None:
+                return None
+            try:
+                image = image_pool.decode(image_data, target_width, self.config)
+            except (OSError, ValueError):
+                # Don't keep serving bytes that cannot be decoded.
+                self._image_store().discard(self.url)
+                raise
+            image.info[CONTENT_DIGEST_INFO] = hashlib.sha256(image_data).hexdigest()
+            return image
 
-    def load_image(self):
-        """Loads the image from the cache or URL."""
         try:
-            # Create a unique filename from the URL
-            filename = hashlib.sha256(self.url.encode()).hexdigest()
-            cache_path = self.config.image_cache_dir / filename
-            log.debug(f"Image cache path: {cache_path}")
-
-            if cache_path.exists():
-                log.debug(f"Loading image from cache: {self.url}")
-                image_data = cache_path.read_bytes()
-            else:
-                image_data = None
-                for attempt in range(1, MAX_IMAGE_RETRIES + 1):
-                    try:
-                        log.debug(
-                            f"Image not in cache, downloading: {self.url} (attempt {attempt}/{MAX_IMAGE_RETRIES})"
-                        )
-                        with httpx.stream(
-                            "GET", self.url, timeout=30, verify=self.config.ssl_verify
-                        ) as response:
-                            response.raise_for_status()
-                            image_data = response.read()
-                        cache_path.write_bytes(image_data)
-                        break
-                    except (httpx.TimeoutException, httpx.NetworkError) as e:
-                        if attempt < MAX_IMAGE_RETRIES:
-                            log.debug(
-                                "Image download retry for %s after network/timeout error: %s",
-                                self.url,
-                                e,
-                            )
-                            time.sleep(RETRY_BACKOFF_SECONDS * attempt)
-                            continue
-                        log.debug(
-                            "Image download failed after %s attempts for %s: %s",
-                            MAX_IMAGE_RETRIES,
-                            self.url,
-                            e,
-                        )
-                        raise
-                    except Exception as e:
-                        log.debug("Image download failed for %s: %s", self.url, e)
-                        raise
-
-                if image_data is None:
-                    raise RuntimeError("Image download did not return data")
-
-            self.pil_image = PILImage.open(BytesIO(image_data))
+            image = decoded_images.get_or_load(key, load)
+            if image is None or cancel_event.is_set():
+                return
+            if cells and self._renderer_class() is HalfcellImage:
+                self._encode_halfcell(image, cells)
+            self._image_key = key
             if self._is_mounted:
                 self.app.call_from_thread(self.render_image)
         except Exception as e:
             log.debug(f"Error loading image: {e}")
-            if self._is_mounted:
+            if self._is_mounted and not cancel_event.is_set():
                 self.app.call_from_thread(self.show_error)
 
+    def _image_store(self):
+        return get_store(self.config.media_cache_dir, self.config.media_cache_max_mb)
+
+    @traced("image")
+    def _read_image_data(self, cancel_event: threading.Event) -> bytes | None:
+        """Returns the image bytes from the disk cache or the network.
+
+        Returns None if the download was cancelled.
+        """
+        store = self._image_store()
+        profile = self.config.profile_name
+        cached = store.get_entry(self.url, profile)
+        if cached is not None and cached.is_fresh():
+            log.debug(f"Loaded image from cache: {self.url}")
+            return cached.data
+
+        # Widgets showing the same image at different sizes share one download.
+        with store.download_lock(self.url):
+            cached = store.get_entry(self.url, profile)
+            if cached is not None and cached.is_fresh():
+                return cached.data
+            try:
+                return self._download_with_retries(store, cancel_event, cached)
+            except httpx.HTTPError as e:
+                if cached is None:
+                    raise
+                log.debug(f"Could not revalidate {self.url}, using the cached image: {e}")
+                return cached.data
+
+    def _download_with_retries(
+        self, store, cancel_event: threading.Event, cached: StoredImage | None = None
+    ) -> bytes | None:
+        for attempt in range(1, MAX_IMAGE_RETRIES + 1):
+            try:
+                log.debug(
+                    f"Image not in cache, downloading: {self.url} (attempt {attempt}/{MAX_IMAGE_RETRIES})"
+                )
+                return self._download(store, cancel_event, cached)
+            except (httpx.TimeoutException, httpx.NetworkError) as e:
+                if attempt < MAX_IMAGE_RETRIES and not cancel_event.is_set():
+                    log.debug(
+                        "Image download retry for %s after network/timeout error: %s",
+                        self.url,
+                        e,
+                    )
+                    time.sleep(RETRY_BACKOFF_SECONDS * attempt)
+                    continue
+                log.debug(
+                    "Image download failed after %s attempts for %s: %s",
+                    MAX_IMAGE_RETRIES,
+                    self.url,
+                    e,
+                )
+                raise
+            except Exception as e:
+                log.debug("Image download failed for %s: %s", self.url, e)
+                raise
+        raise RuntimeError("Image download did not return data")
+
+    @traced("image")
+    def _download(
+        self, store, cancel_event: threading.Event, cached: StoredImage | None = None
+    ) -> bytes | None:
+        """Streams the image into the store's partial file and commits it.
+
+        A partial file left by a cancelled or failed download is resumed with
+        a Range request if it is large enough to be worth it. If-Range makes
+        the server send the whole image instead if it changed in between.
+        A stale `cached` image is revalidated with a conditional request and
+        returned as is on a 304.
+        Returns None if the download was cancelled; the partial file is kept.
+        """
+        part = store.partial_path(self.url)
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {}
+        if offset >= MIN_RESUME_BYTES:
+            headers["Range"] = f"bytes={offset}-"
+            validator = store.partial_validator(self.url)
+            if validator:
+                headers["If-Range"] = validator
+        elif cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        with httpx.stream(
+            "GET", self.url, headers=headers, timeout=30, verify=self.config.ssl_verify
+        ) as response:
+            if response.status_code == 304 and cached is not None:
+                log.debug(f"Cached image is still valid: {self.url}")
+                store.revalidated(
+                    self.url, self.config.profile_name, CacheHeaders.from_response(response.headers)
+                )
+                return cached.data
+            if response.status_code == 416 and offset:
+                # The partial file does not match the image any more.
+                store.discard_partial(self.url)
+                return self._download(store, cancel_event)
+            response.raise_for_status()
+            if response.status_code == 206:
+                if "Range" not in headers:
+                    raise httpx.HTTPStatusError(
+                        "Partial content for a request without Range",
+                        request=response.request,
+                        response=response,
+                    )
+                if not response.headers.get("content-range", "").startswith(f"bytes {offset}-"):
+                    # Not the rest of the partial file: download it all again.
+                    log.debug(f"Unexpected Content-Range, restarting the download: {self.url}")
+                    store.discard_partial(self.url)
+                    return self._download(store, cancel_event)
+            resumed = response.status_code == 206
+            if resumed:
+                log.debug(f"Resuming image download at {offset} bytes: {self.url}")
+            else:
+                store.start_partial(
+                    self.url,
+                    response.headers.get("etag") or response.headers.get("last-modified"),
+                )
+            with open(part, "ab") as f:
+                for chunk in response.iter_bytes():
+                    if cancel_event.is_set():
+                        log.debug(f"Image download cancelled: {self.url}")
+                        return None
+                    f.write(chunk)
+                    downloaded_bytes.add("image", len(chunk))
+                f.flush()
+                os.fsync(f.fileno())
+            cache_headers = CacheHeaders.from_response(response.headers)
+        return store.commit_partial(self.url, self.config.profile_name, cache_headers)
+
     def on_resize(self, event: events.Resize) -> None:
         """Re-render the image when the widget is resized."""
+        self.check_visibility()
+        if self.pil_image is None:
+            self.show_placeholder()
         self.render_image()
 
+    def on_click(self, event: events.Click) -> None:
+        """Open the original of a media attachment in the image viewer."""
+        if self.media is not None:
+            self.post_message(ViewImage([self.media]))
+
+    def show_placeholder(self):
+        """Paints the attachment's blurhash while the image is loading.
+
+        The space is reserved right away; the hash is decoded in a thread.
+        """
+        if not self.blurhash:
+            return
+        width = self.size.width - 4
+        if width <= 0:
+            return
+        self.styles.height = "auto"
+        self.update("\n" * (placeholder_rows(width, self.aspect) - 1))
+        self.run_worker(
+            partial(self._decode_placeholder, self.blurhash, width),
+            thread=True,
+            group="blurhash",
+            exclusive=True,
+        )
+
+    def _decode_placeholder(self, blurhash: str, width: int) -> None:
+        try:
+            placeholder = BlurhashPlaceholder(blurhash, width, self.aspect)
+        except ValueError as e:
+            log.debug(f"Invalid blurhash for {self.url}: {e}")
+            self.blurhash = None
+            return
+        if self._is_mounted:
+            self.app.call_from_thread(self._paint_placeholder, placeholder)
+
+    def _paint_placeholder(self, placeholder: BlurhashPlaceholder) -> None:
+        # The image may have arrived, or the widget resized, in the meantime.
+        if self.pil_image is None and placeholder.width == self.size.width - 4:
+            self.update(placeholder)
+
     def show_error(self):
         """Displays an error message when the image fails to load."""
         self._remove_sixel_widget()
@@ -121,11 +479,36 @@ class ImageWidget(Static):
         self._sixel_widget.styles.height = "auto"
         self.styles.height = "auto"
 
+    def _renderer_class(self):
+        return RENDERERS.get(self.config.image_renderer, Image)
+
+    @traced("image")
+    def _encode_halfcell(self, image, cells: int, redraw: bool = False):
+        """Encodes `image` as half-cell strips `cells` wide (runs in a worker)."""
+        try:
+            encoded_images.get_or_encode(
+                encoded_key(image, "halfcell", cells),
+                lambda: encode_halfcell(image, cells).prepare(),
+            )
+        except Exception as e:
+            log.debug(f"Error encoding image {self.url}: {e}")
+            return
+        if redraw and self._is_mounted:
+            self.app.call_from_thread(self.render_image)
+
+    @traced("image")
     def render_image(self):
         """Renders the image."""
         if not self.pil_image:
+            if self._image_key is not None and not self.is_loading:
+                # Evicted from the shared cache; decode it again.
+                self.start_loading()
             return  # Image not loaded yet
 
+        if self._target_width() > self._image_key[1]:
+            # Grown past the decoded size; fetch a sharper copy meanwhile.
+            self.start_loading()
+
         if self.pil_image.width == 0 or self.pil_image.height == 0:
             self.show_error()
             return
@@ -141,12 +524,26 @@ class ImageWidget(Static):
             return
 
         self._remove_sixel_widget()
-        renderer_map = {
-            "auto": Image,
-            "ansi": HalfcellImage,
-            "tgp": TGPImage,
-        }
-        renderer_class = renderer_map.get(self.config.image_renderer, Image)
-        image = renderer_class(self.pil_image, width=width, height="auto")
+        renderer_class = self._renderer_class()
+        # Encodings are shared between widgets and survive resizes and
+        # re-mounts; a graphics protocol image that was already sent is
+        # only placed again.
+        pil_image = self.pil_image
+        if renderer_class is HalfcellImage:
+            image = encoded_images.get(encoded_key(pil_image, "halfcell", width))
+            if image is None:
+                # Keep showing the current content until the encoding is ready.
+                self.run_worker(
+                    partial(self._encode_halfcell, pil_image, width, True),
+                    thread=True,
+                    group="encode",
+                )
+                return
+        else:
+            renderer_name = renderer_class.__module__.rsplit(".", 1)[-1]
+            key = encoded_key(pil_image, renderer_name, width)
+            image = encoded_images.get_or_encode(
+                key, lambda: renderer_class(pil_image, width=width, height="auto")
+            )
         self.styles.height = "auto"
         self.update(image)
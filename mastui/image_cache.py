@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from threading import Lock
+import hashlib
+import logging
+
+from PIL import Image as PILImage
+
+from mastui.halfcell import HalfcellStrips
+from mastui.render_cache import LRUCache
+
+log = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+DEFAULT_MEMORY_BUDGET_MB = 64
+# Decode targets are rounded up to one of these widths, so a column that is
+# resized by a few cells reuses the image decoded for it before.
+MIN_TARGET_WIDTH = 64
+MAX_TARGET_WIDTH = 2048
+# Horizontal pixels needed per terminal cell, by renderer. Half-cell output
+# uses one pixel per cell; graphics protocols draw real pixels.
+PIXELS_PER_CELL = {"ansi": 1}
+DEFAULT_PIXELS_PER_CELL = 10
+# Very tall images are capped at this many times their target width.
+MAX_HEIGHT_RATIO = 4
+MAX_ENCODED_ENTRIES = 300
+# Subdirectory of the profile's image cache for encodings persisted as JSON.
+ENCODED_DIR_NAME = "encoded"
+# Key in a decoded image's `info` of the sha256 of the bytes it came from.
+CONTENT_DIGEST_INFO = "mastui_content_digest"
+
+
+def target_pixel_width(cells: int, renderer: str) -> int:
+    """Return the bucketed decode width for an image drawn `cells` wide."""
+    pixels = max(cells, 1) * PIXELS_PER_CELL.get(renderer, DEFAULT_PIXELS_PER_CELL)
+    width = MIN_TARGET_WIDTH
+    while width < pixels and width < MAX_TARGET_WIDTH:
+        width *= 2
+    return width
+
+
+def decode_image(data: bytes, target_width: int) -> PILImage.Image:
+    """Decode `data`, downscaled so it is at most `target_width` pixels wide.
+
+    JPEGs are decoded at a reduced scale straight away (`draft`); everything
+    else is decoded in full and then shrunk with `thumbnail`.
+    """
+    image = PILImage.open(BytesIO(data))
+    max_size = (target_width, target_width * MAX_HEIGHT_RATIO)
+    if image.width > target_width:
+        scaled_height = max(1, round(image.height * target_width / image.width))
+        image.draft(None, (target_width, scaled_height))
+    image.thumbnail(max_size)
+    image.load()
+    return image
+
+
+def image_size_bytes(image: PILImage.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+class DecodedImageCache:
+    """A process-wide LRU of decoded images, bounded by their size in bytes.
+
+    Entries are keyed by (url, target width), so the same avatar or boosted
+    image shown in several columns is only decoded once per size.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self._key_locks: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_budget(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def peek(self, key):
+        """Return an entry without counting a hit or changing its recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, image: PILImage.Image) -> None:
+        size = image_size_bytes(image)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (image, size)
+            self.current_bytes += size
+            self._evict()
+
+    def get_or_load(self, key, loader):
+        """Return the cached image for `key`, calling `loader` once on a miss.
+
+        Concurrent callers for the same key wait for the first one instead of
+        decoding the same image again. `loader` may return None (e.g. when the
+        download was cancelled), in which case nothing is cached.
+        """
+        image = self.get(key)
+        if image is not None:
+            return image
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, Lock())
+        try:
+            with key_lock:
+                image = self.peek(key)
+                if image is None:
+                    image = loader()
+                    if image is not None:
+                        self.put(key, image)
+                return image
+        finally:
+            with self._lock:
+                self._key_locks.pop(key, None)
+
+    def _evict(self) -> None:
+        # Keep at least the newest entry, even if it alone exceeds the budget.
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _key, (_image, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+decoded_images = DecodedImageCache(DEFAULT_MEMORY_BUDGET_MB * MB)
+
+
+def content_digest(image: PILImage.Image) -> str:
+    """The digest of the bytes `image` was decoded from, or of its pixels."""
+    digest = image.info.get(CONTENT_DIGEST_INFO)
+    if digest is None:
+        digest = image.info[CONTENT_DIGEST_INFO] = hashlib.sha256(image.tobytes()).hexdigest()
+    return digest
+
+
+def encoded_key(image: PILImage.Image, renderer: str, cells: int) -> str:
+    """Return a stable key for `image` encoded by `renderer` at `cells` width.
+
+    The key names the content rather than its URL, so an image that changed
+    at the same URL, e.g. an updated avatar, is not served an old encoding.
+    """
+    raw = f"{content_digest(image)}\n{image.width}x{image.height}\n{renderer}\n{cells}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class EncodedImageCache:
+    """Terminal-ready encodings of images, keyed by `encoded_key`.
+
+    Half-cell strips can also be written to `disk_dir` as JSON, so re-mounted
+    images survive restarts without being encoded again. Graphics protocol
+    renderables are only kept in memory: they refer to image ids that the
+    terminal forgets when Mastui exits.
+    """
+
+    def __init__(self, max_entries: int, disk_dir: Path | None = None):
+        self._entries = LRUCache(max_entries)
+        self.disk_dir = disk_dir
+
+    def configure(self, disk_dir: Path | None) -> None:
+        self.disk_dir = disk_dir
+        if disk_dir is not None:
+            disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str):
+        encoded = self._entries.get(key)
+        if encoded is None and self.disk_dir is not None:
+            encoded = self._read_disk(key)
+            if encoded is not None:
+                self._entries.put(key, encoded)
+        return encoded
+
+    def put(self, key: str, encoded) -> None:
+        self._entries.put(key, encoded)
+        if self.disk_dir is not None and isinstance(encoded, HalfcellStrips):
+            self._write_disk(key, encoded)
+
+    def get_or_encode(self, key: str, encoder):
+        encoded = self.get(key)
+        if encoded is None:
+            encoded = encoder()
+            self.put(key, encoded)
+        return encoded
+
+    def _read_disk(self, key: str) -> HalfcellStrips | None:
+        path = self.disk_dir / f"{key}.json"
+        try:
+            return HalfcellStrips.from_json(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.debug(f"Ignoring unreadable encoded image {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, encoded: HalfcellStrips) -> None:
+        path = self.disk_dir / f"{key}.json"
+        try:
+            path.write_text(encoded.to_json())
+        except OSError as e:
+            log.debug(f"Could not store encoded image {path}: {e}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+encoded_images = EncodedImageCache(MAX_ENCODED_ENTRIES)
@@ -0,0 +1,173 @@
+"""Decode and downscale images in a pool of worker processes.
+
+Image decoding and resampling hold the GIL for most of their runtime, so
+doing them in thread workers competes with Textual's event loop. With
+`IMAGE_PROCESS_POOL=on` the work runs in separate processes instead.
+
+The compressed bytes are handed to the worker and the decoded pixels come
+back through `multiprocessing.shared_memory` blocks. Only their names and the
+image geometry are pickled. This module is imported by the spawned workers,
+so it must stay light: no Textual imports.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock
+import logging
+import os
+import sys
+
+from PIL import Image as PILImage
+
+from mastui.tracing import traced
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = Lock()
+
+
+class SharedMemoryUnavailable(Exception):
+    """A shared memory block could not be created or attached.
+
+    Kept apart from the OSErrors PIL raises for broken images, which must
+    not be retried in a thread.
+    """
+
+
+def _create_block(size: int) -> SharedMemory:
+    try:
+        return SharedMemory(create=True, size=max(size, 1))
+    except OSError as e:
+        raise SharedMemoryUnavailable(f"Could not create a shared memory block: {e}") from e
+
+
+def _attach_block(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name=name)
+    except OSError as e:
+        raise SharedMemoryUnavailable(f"Could not attach shared memory block {name}: {e}") from e
+
+
+def _pixel_mode(image: PILImage.Image) -> str:
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        return "RGBA"
+    return "RGB"
+
+
+def decode_to_shared_memory(input_name: str, size: int, target_width: int):
+    """Worker side: decode the bytes in `input_name` into a new shared block.
+
+    Returns (block name, mode, width, height).
+    """
+    # Imported here so that spawned workers only load it when needed.
+    from mastui.image_cache import decode_image
+
+    # Workers share the parent's resource tracker, so blocks are registered
+    # once; the parent unlinks both the input and the output block.
+    source = _attach_block(input_name)
+    try:
+        data = bytes(source.buf[:size])
+    finally:
+        source.close()
+
+    image = decode_image(data, target_width)
+    image = image.convert(_pixel_mode(image))
+    pixels = image.tobytes()
+
+    output = _create_block(len(pixels))
+    try:
+        output.buf[: len(pixels)] = pixels
+    finally:
+        output.close()
+    return output.name, image.mode, image.width, image.height
+
+
+def _start_resource_tracker() -> None:
+    # The tracker is started with the process's stderr, which Textual has
+    # replaced with an object without a usable file descriptor.
+    stderr = sys.stderr
+    if sys.__stderr__ is not None:
+        sys.stderr = sys.__stderr__
+    try:
+        resource_tracker.ensure_running()
+    finally:
+        sys.stderr = stderr
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared pool, (re)creating it with `workers` processes."""
+    global _pool, _pool_workers
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            log.info(f"Starting image process pool with {workers} workers")
+            _start_resource_tracker()
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def decode_in_pool(data: bytes, target_width: int, workers: int) -> PILImage.Image:
+    """Decode and downscale `data` in the process pool.
+
+    Blocks the calling (worker) thread until the image is ready. Raises
+    BrokenProcessPool if the pool died and SharedMemoryUnavailable if the
+    pixels could not be passed around; callers fall back to decoding
+    locally. Errors decoding the image itself are raised as they are.
+    """
+    pool = get_pool(workers)
+    source = _create_block(len(data))
+    try:
+        source.buf[: len(data)] = data
+        future = pool.submit(
+            decode_to_shared_memory, source.name, len(data), target_width
+        )
+        output_name, mode, width, height = future.result()
+    finally:
+        source.close()
+        source.unlink()
+
+    output = _attach_block(output_name)
+    try:
+        size = width * height * len(mode)
+        return PILImage.frombytes(mode, (width, height), bytes(output.buf[:size]))
+    finally:
+        output.close()
+        output.unlink()
+
+
+@traced("image", "image_pool.decode")
+def decode(data: bytes, target_width: int, config) -> PILImage.Image:
+    """Decode `data` in the process pool if enabled, otherwise in this thread."""
+    from mastui.image_cache import decode_image
+
+    if not getattr(config, "image_process_pool", False):
+        return decode_image(data, target_width)
+    try:
+        return decode_in_pool(data, target_width, config.image_process_workers)
+    except BrokenProcessPool as e:
+        log.warning(f"Image process pool failed, decoding in thread: {e}")
+        shutdown_pool()
+    except SharedMemoryUnavailable as e:
+        log.warning(f"{e}; decoding in thread")
+    return decode_image(data, target_width)
@@ -0,0 +1,746 @@
+"""The on-disk cache of downloaded image bytes, shared by all profiles.
+
+Images are stored once per content, named by the sha256 of their bytes
+(`blobs/<first two hex digits>/<digest>`), no matter how many URLs or
+profiles use them. An SQLite index (`index.db`) records:
+
+- `blobs`: size, content type and last access time of every stored file;
+- `urls`: which blob a URL points to, with its cache validators;
+- `refs`: which profiles use which URLs, and when they last did.
+
+Eviction, pruning and releasing a profile are queries on that index instead
+of directory scans.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from threading import Lock, Thread, get_ident
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+log = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+DEFAULT_MAX_MB = 512
+INDEX_NAME = "index.db"
+BLOBS_DIR_NAME = "blobs"
+PARTIALS_DIR_NAME = "partials"
+# Eviction frees space down to this fraction of the budget, so that it does
+# not run again after every download once the cache is full.
+EVICTION_TARGET = 0.9
+# Access times of cache hits are written to the index in batches.
+TOUCH_BATCH_SIZE = 50
+# Unfinished downloads are streamed into `partials/<key>.part`, with the
+# response's ETag or Last-Modified stored in `partials/<key>.validator` so
+# that the download can be resumed with a Range request.
+PARTIAL_SUFFIX = ".part"
+VALIDATOR_SUFFIX = ".validator"
+TMP_SUFFIX = ".tmp"
+# Partial downloads not written to for this long are given up and deleted:
+# downloads cancelled by scrolling away are often never resumed.
+PARTIAL_MAX_AGE_SECONDS = 24 * 60 * 60
+# Freshness lifetime for responses that don't state one, and the upper bound
+# of the Last-Modified heuristic (RFC 9111, section 4.2.2).
+DEFAULT_FRESHNESS_SECONDS = 24 * 60 * 60
+HEURISTIC_FRACTION = 0.1
+_HEX_DIGITS = set("0123456789abcdef")
+
+
+def image_key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _is_key(name: str) -> bool:
+    return len(name) == 64 and set(name) <= _HEX_DIGITS
+
+
+def _http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _cache_control(value: str) -> dict[str, str | None]:
+    directives = {}
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers, now: float) -> float:
+    """Return for how many seconds a response with `headers` stays fresh.
+
+    `no-cache` and `no-store` make the entry stale straight away, so it is
+    revalidated on every load.
+    """
+    directives = _cache_control(headers.get("cache-control", ""))
+    if "no-cache" in directives or "no-store" in directives:
+        return 0
+    if directives.get("max-age"):
+        try:
+            age = int(headers.get("age", "0"))
+            return max(0, int(directives["max-age"]) - age)
+        except ValueError:
+            pass
+    date = _http_date(headers.get("date")) or now
+    expires = _http_date(headers.get("expires"))
+    if expires is not None:
+        return max(0, expires - date)
+    last_modified = _http_date(headers.get("last-modified"))
+    if last_modified is not None:
+        return min(DEFAULT_FRESHNESS_SECONDS, max(0, (date - last_modified) * HEURISTIC_FRACTION))
+    return DEFAULT_FRESHNESS_SECONDS
+
+
+@dataclass(frozen=True)
+class CacheHeaders:
+    """What is kept of an image response's headers."""
+
+    content_type: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    expires_at: float | None = None
+
+    @classmethod
+    def from_response(cls, headers, now: float | None = None) -> CacheHeaders:
+        now = now or time.time()
+        return cls(
+            content_type=headers.get("content-type"),
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+            expires_at=now + freshness_lifetime(headers, now),
+        )
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    """A cached image and the validators to revalidate it with."""
+
+    data: bytes
+    etag: str | None = None
+    last_modified: str | None = None
+    expires_at: float | None = None
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        return self.expires_at is not None and self.expires_at > (now or time.time())
+
+
+class ImageStore:
+    """Size-bounded, content-addressed storage of image files under `root`."""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_MB * MB):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = root / INDEX_NAME
+        self.blobs_dir = root / BLOBS_DIR_NAME
+        self.partials_dir = root / PARTIALS_DIR_NAME
+        self.total_bytes = 0
+        # Bytes in partial downloads, as of the last `sweep_partials`.
+        self.partial_bytes = 0
+        self._lock = Lock()
+        # (profile, url key, digest) -> time of the last cache hit
+        self._touched: dict[tuple[str, str, str], float] = {}
+        self._eviction_thread: Thread | None = None
+        # url -> [lock, number of threads holding or waiting for it]
+        self._download_locks: dict[str, list] = {}
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.partials_dir.mkdir(exist_ok=True)
+        self.initialize_index()
+        self.sweep_partials()
+
+    def _get_conn(self):
+        try:
+            return sqlite3.connect(self.index_path, timeout=10)
+        except sqlite3.Error as e:
+            log.error(f"Image index connection failed: {e}", exc_info=True)
+            return None
+
+    def initialize_index(self):
+        conn = self._get_conn()
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    content_type TEXT,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS urls (
+                    key TEXT PRIMARY KEY,
+                    url TEXT,
+                    digest TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    expires_at REAL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS refs (
+                    profile TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (profile, key)
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs (last_access)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_urls_digest ON urls (digest)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_refs_key ON refs (key)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_refs_last_access ON refs (profile, last_access)")
+            conn.commit()
+            cursor.execute("SELECT COALESCE(SUM(size), 0) FROM blobs")
+            self.total_bytes = cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            log.error(f"Failed to create image index: {e}", exc_info=True)
+        finally:
+            conn.close()
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / digest
+
+    def get(self, url: str, profile: str) -> bytes | None:
+        """Return the stored bytes for `url`, or None if they are not cached."""
+        entry = self.get_entry(url, profile)
+        return entry.data if entry else None
+
+    def get_entry(self, url: str, profile: str) -> StoredImage | None:
+        """Return the stored image for `url` with its cache validators.
+
+        The hit is recorded as a use by `profile`. A file whose size does not
+        match the index is treated as corrupt, removed and reported as a miss.
+        """
+        key = image_key(url)
+        conn = self._get_conn()
+        if not conn:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT urls.digest, blobs.size, urls.etag, urls.last_modified, urls.expires_at "
+                "FROM urls JOIN blobs ON blobs.digest = urls.digest WHERE urls.key = ?",
+                (key,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.error(f"Failed to look up cached image {key}: {e}", exc_info=True)
+            return None
+        finally:
+            conn.close()
+        if row is None:
+            return None
+
+        digest, size, etag, last_modified, expires_at = row
+        path = self.blob_path(digest)
+        try:
+            data = path.read_bytes()
+        except OSError as e:
+            log.debug(f"Could not read cached image {path}: {e}")
+            data = None
+        if data is None or len(data) != size:
+            log.warning(f"Discarding corrupt cached image for {url}")
+            self._discard_blob(digest)
+            return None
+        self._touch(profile, key, digest)
+        return StoredImage(data, etag, last_modified, expires_at)
+
+    def put(self, url: str, data: bytes, profile: str, headers: CacheHeaders | None = None) -> None:
+        """Store `data` for `url`, used by `profile`, and evict if over budget."""
+        self.partials_dir.mkdir(exist_ok=True)
+        tmp_path = self.partials_dir / f"{image_key(url)}.{os.getpid()}.{get_ident()}{TMP_SUFFIX}"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self._store_file(tmp_path, url, profile, headers)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    @contextmanager
+    def download_lock(self, url: str):
+        """Hold the lock for downloading `url` into this store."""
+        with self._lock:
+            entry = self._download_locks.setdefault(url, [Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._download_locks[url]
+
+    def partial_path(self, url: str) -> Path:
+        """Return the file an unfinished download of `url` is streamed into."""
+        self.partials_dir.mkdir(exist_ok=True)
+        return self.partials_dir / (image_key(url) + PARTIAL_SUFFIX)
+
+    def partial_validator(self, url: str) -> str | None:
+        """Return the ETag or Last-Modified of the partial download of `url`."""
+        validator_path = self.partial_path(url).with_suffix(VALIDATOR_SUFFIX)
+        try:
+            return validator_path.read_text().strip() or None
+        except OSError:
+            return None
+
+    def start_partial(self, url: str, validator: str | None):
+        """Begin a new partial download of `url`, dropping any earlier one."""
+        part = self.partial_path(url)
+        part.write_bytes(b"")
+        validator_path = part.with_suffix(VALIDATOR_SUFFIX)
+        if validator:
+            validator_path.write_text(validator)
+        else:
+            validator_path.unlink(missing_ok=True)
+
+    def discard_partial(self, url: str):
+        part = self.partial_path(url)
+        part.unlink(missing_ok=True)
+        part.with_suffix(VALIDATOR_SUFFIX).unlink(missing_ok=True)
+
+    def commit_partial(self, url: str, profile: str, headers: CacheHeaders | None = None) -> bytes:
+        """Move a finished download of `url` into the cache and return its bytes."""
+        part = self.partial_path(url)
+        data = self._store_file(part, url, profile, headers)
+        self.discard_partial(url)
+        return data
+
+    def _partial_downloads(self) -> dict[str, list[tuple[Path, os.stat_result]]]:
+        """The files in `partials_dir`, grouped by the key of their URL."""
+        downloads: dict[str, list[tuple[Path, os.stat_result]]] = {}
+        try:
+            paths = list(self.partials_dir.iterdir())
+        except FileNotFoundError:
+            return downloads
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            downloads.setdefault(path.name.split(".", 1)[0], []).append((path, stat))
+        return downloads
+
+    def _active_downloads(self) -> set[str]:
+        with self._lock:
+            return {image_key(url) for url in self._download_locks}
+
+    def sweep_partials(self, max_age: float = PARTIAL_MAX_AGE_SECONDS) -> int:
+        """Delete partial downloads untouched for `max_age` seconds.
+
+        Updates `partial_bytes` with the size of the rest. Returns how many
+        downloads were deleted.
+        """
+        cutoff = time.time() - max_age
+        active = self._active_downloads()
+        removed = 0
+        size = 0
+        for key, files in self._partial_downloads().items():
+            if key not in active and max(stat.st_mtime for _path, stat in files) < cutoff:
+                for path, _stat in files:
+                    path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                size += sum(stat.st_size for _path, stat in files)
+        self.partial_bytes = size
+        if removed:
+            log.info(f"Deleted {removed} abandoned partial image downloads.")
+        return removed
+
+    def _drop_partials(self, excess: int) -> int:
+        """Delete the least recently written idle partial downloads, up to `excess` bytes.
+
+        Returns how many downloads were deleted.
+        """
+        active = self._active_downloads()
+        idle = [
+            (max(stat.st_mtime for _path, stat in files), files)
+            for key, files in self._partial_downloads().items()
+            if key not in active
+        ]
+        removed = freed = 0
+        for _mtime, files in sorted(idle, key=lambda download: download[0]):
+            if freed >= excess:
+                break
+            for path, stat in files:
+                path.unlink(missing_ok=True)
+                freed += stat.st_size
+            removed += 1
+        self.partial_bytes = max(0, self.partial_bytes - freed)
+        return removed
+
+    def _store_file(self, source: Path, url: str, profile: str, headers: CacheHeaders | None) -> bytes:
+        """Move `source` into the blob named by its digest and index it for `url`.
+
+        If the same bytes are already stored (another URL, or another
+        profile's copy), `source` is dropped and the existing blob is used.
+        """
+        data = source.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if path.exists() and path.stat().st_size == len(data):
+            source.unlink()
+        else:
+            path.parent.mkdir(exist_ok=True)
+            os.replace(source, path)
+        self._record(image_key(url), url, digest, len(data), profile, headers)
+        if self.total_bytes + self.partial_bytes > self.max_bytes:
+            self.schedule_eviction()
+        return data
+
+    def _record(
+        self,
+        key: str,
+        url: str | None,
+        digest: str,
+        size: int,
+        profile: str | None,
+        headers: CacheHeaders | None = None,
+        when: float | None = None,
+    ):
+        now = when or time.time()
+        if headers is None:
+            # Nothing is known about entries from older versions; they get the
+            # default lifetime and are then downloaded again.
+            headers = CacheHeaders(expires_at=now + DEFAULT_FRESHNESS_SECONDS)
+        conn = self._get_conn()
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            with self._lock:
+                previous = cursor.execute("SELECT digest FROM urls WHERE key = ?", (key,)).fetchone()
+                known = cursor.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+                cursor.execute(
+                    "INSERT INTO blobs (digest, size, content_type, created_at, last_access) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (digest) DO UPDATE SET last_access = MAX(last_access, excluded.last_access)",
+                    (digest, size, headers.content_type, now, now),
+                )
+                cursor.execute(
+                    "INSERT OR REPLACE INTO urls (key, url, digest, etag, last_modified, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, url, digest, headers.etag, headers.last_modified, headers.expires_at),
+                )
+                if profile is not None:
+                    cursor.execute(
+                        "INSERT OR REPLACE INTO refs (profile, key, last_access) VALUES (?, ?, ?)",
+                        (profile, key, now),
+                    )
+                conn.commit()
+                if not known:
+                    self.total_bytes += size
+        except sqlite3.Error as e:
+            log.error(f"Failed to index cached image {key}: {e}", exc_info=True)
+            return
+        finally:
+            conn.close()
+        if previous and previous[0] != digest:
+            # The image at this URL changed; drop the old bytes if unused.
+            self._collect_garbage([previous[0]])
+
+    def revalidated(self, url: str, profile: str, headers: CacheHeaders):
+        """Record that the server confirmed the cached image for `url` (a 304)."""
+        key = image_key(url)
+        conn = self._get_conn()
+        if not conn:
+            return
+        try:
+            conn.execute(
+                "UPDATE urls SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+                "expires_at = ? WHERE key = ?",
+                (headers.etag, headers.last_modified, headers.expires_at, key),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO refs (profile, key, last_access) VALUES (?, ?, ?)",
+                (profile, key, time.time()),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            log.error(f"Failed to update cached image {url}: {e}", exc_info=True)
+        finally:
+            conn.close()
+
+    def discard(self, url: str):
+        """Remove the cached bytes for `url`, e.g. because they do not decode.
+
+        The bytes are dropped for every URL and profile that shares them.
+        """
+        conn = self._get_conn()
+        if not conn:
+            return
+        try:
+            row = conn.execute("SELECT digest FROM urls WHERE key = ?", (image_key(url),)).fetchone()
+        except sqlite3.Error as e:
+            log.error(f"Failed to look up cached image {url}: {e}", exc_info=True)
+            return
+        finally:
+            conn.close()
+        if row:
+            self._discard_blob(row[0])
+
+    def _discard_blob(self, digest: str):
+        conn = self._get_conn()
+        if not conn:
+            return
+        try:
+            row = conn.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            self._remove_blobs(conn, [(digest, row[0] if row else 0)])
+        except sqlite3.Error as e:
+            log.error(f"Failed to discard cached image {digest}: {e}", exc_info=True)
+        finally:
+            conn.close()
+
+    def _touch(self, profile: str, key: str, digest: str):
+        with self._lock:
+            self._touched[(profile, key, digest)] = time.time()
+            flush = len(self._touched) >= TOUCH_BATCH_SIZE
+        if flush:
+            self.flush_access_times()
+
+    def flush_access_times(self):
+        """Write the access times of recent cache hits to the index."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        conn = self._get_conn()
+        if not conn:
+            return
+        try:
+            conn.executemany(
+                "UPDATE blobs SET last_access = MAX(last_access, ?) WHERE digest = ?",
+                [(when, digest) for (_profile, _key, digest), when in touched.items()],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO refs (profile, key, last_access) VALUES (?, ?, ?)",
+                [(profile, key, when) for (profile, key, _digest), when in touched.items()],
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            log.error(f"Failed to update image access times: {e}", exc_info=True)
+        finally:
+            conn.close()
+
+    def schedule_eviction(self):
+        """Evict least recently used images in a background thread."""
+        with self._lock:
+            if self._eviction_thread is not None and self._eviction_thread.is_alive():
+                return
+            self._eviction_thread = Thread(
+                target=self.evict, name="image-store-evict", daemon=True
+            )
+            self._eviction_thread.start()
+
+    def evict(self) -> int:
+        """Delete least recently used images until the store is within budget.
+
+        The budget covers the whole store, across all profiles, including
+        partial downloads. Abandoned partial downloads go first, then idle
+        ones, then stored images. Returns how many of them were deleted.
+        """
+        swept = self.sweep_partials()
+        if self.total_bytes + self.partial_bytes <= self.max_bytes:
+            return swept
+        self.flush_access_times()
+        target = int(self.max_bytes * EVICTION_TARGET)
+        swept += self._drop_partials(self.total_bytes + self.partial_bytes - target)
+        excess = self.total_bytes + self.partial_bytes - target
+        if excess <= 0:
+            return swept
+        conn = self._get_conn()
+        if not conn:
+            return swept
+        removed = []
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT digest, size FROM blobs ORDER BY last_access")
+            for digest, size in cursor:
+                if excess <= 0:
+                    break
+                removed.append((digest, size))
+                excess -= size
+            cursor.close()
+            return swept + self._remove_blobs(conn, removed)
+        except sqlite3.Error as e:
+            log.error(f"Failed to evict cached images: {e}", exc_info=True)
+            return swept
+        finally:
+            conn.close()
+
+    def prune(self, days: int, profile: str) -> int:
+        """Release the images `profile` has not used for `days` days.
+
+        Images no other profile uses any more are deleted; returns how many.
+        """
+        self.flush_access_times()
+        cutoff = time.time() - days * 24 * 60 * 60
+        return self._release("profile = ? AND last_access < ?", (profile, cutoff)) + self.sweep_partials()
+
+    def release_profile(self, profile: str) -> int:
+        """Release every image used by `profile`, e.g. when it is deleted."""
+        self.flush_access_times()
+        return self._release("profile = ?", (profile,))
+
+    def _release(self, condition: str, params: tuple) -> int:
+        conn = self._get_conn()
+        if not conn:
+            return 0
+        try:
+            with self._lock:
+                conn.execute(f"DELETE FROM refs WHERE {condition}", params)  # nosec B608
+                orphaned = conn.execute(
+                    "SELECT key, digest FROM urls WHERE key NOT IN (SELECT key FROM refs)"
+                ).fetchall()
+                conn.executemany("DELETE FROM urls WHERE key = ?", [(key,) for key, _digest in orphaned])
+                conn.commit()
+        except sqlite3.Error as e:
+            log.error(f"Failed to release cached images: {e}", exc_info=True)
+            return 0
+        finally:
+            conn.close()
+        return self._collect_garbage({digest for _key, digest in orphaned})
+
+    def _collect_garbage(self, digests) -> int:
+        """Delete the blobs among `digests` that no URL points to any more."""
+        digests = list(digests)
+        if not digests:
+            return 0
+        conn = self._get_conn()
+        if not conn:
+            return 0
+        try:
+            placeholders = ",".join("?" for _ in digests)
+            unused = conn.execute(
+                f"SELECT digest, size FROM blobs WHERE digest IN ({placeholders}) "  # nosec B608
+                "AND digest NOT IN (SELECT digest FROM urls)",
+                digests,
+            ).fetchall()
+            return self._remove_blobs(conn, unused)
+        except sqlite3.Error as e:
+            log.error(f"Failed to delete unused cached images: {e}", exc_info=True)
+            return 0
+        finally:
+            conn.close()
+
+    def _remove_blobs(self, conn, entries) -> int:
+        """Delete blobs with the URLs and references pointing at them."""
+        for digest, _size in entries:
+            try:
+                self.blob_path(digest).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.error(f"Error removing cached image {digest}: {e}", exc_info=True)
+        digests = [(digest,) for digest, _size in entries]
+        with self._lock:
+            conn.executemany(
+                "DELETE FROM refs WHERE key IN (SELECT key FROM urls WHERE digest = ?)", digests
+            )
+            conn.executemany("DELETE FROM urls WHERE digest = ?", digests)
+            conn.executemany("DELETE FROM blobs WHERE digest = ?", digests)
+            conn.commit()
+            self.total_bytes -= sum(size for _digest, size in entries)
+        if entries:
+            log.info(f"Removed {len(entries)} images from the image cache.")
+        return len(entries)
+
+    def migrate_profile_cache(self, profile: str, cache_dir: Path) -> int:
+        """Move a profile's own image cache from older versions into the store.
+
+        Older versions kept each image directly in the profile's
+        `image_cache` directory, named by the sha256 of its URL. Returns the
+        number of images moved.
+        """
+        count = 0
+        try:
+            with os.scandir(cache_dir) as entries:
+                names = [entry.name for entry in entries if _is_key(entry.name)]
+        except OSError as e:
+            log.error(f"Failed to migrate the image cache in {cache_dir}: {e}", exc_info=True)
+            return count
+        for name in names:
+            if self._migrate_file(cache_dir / name, name, profile):
+                count += 1
+        if count:
+            log.info(f"Moved {count} images of profile {profile} to the shared image cache.")
+        if self.total_bytes + self.partial_bytes > self.max_bytes:
+            self.evict()
+        return count
+
+    def _migrate_file(self, path: Path, key: str, profile: str) -> bool:
+        try:
+            stat = path.stat()
+            data = path.read_bytes()
+        except OSError:
+            return False
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.blob_path(digest)
+        try:
+            if target.exists():
+                path.unlink()
+            else:
+                target.parent.mkdir(exist_ok=True)
+                os.replace(path, target)
+        except OSError as e:
+            log.debug(f"Could not migrate cached image {path}: {e}")
+            return False
+        self._record(key, None, digest, len(data), profile, None, when=stat.st_mtime)
+        return True
+
+    def stats(self) -> dict:
+        conn = self._get_conn()
+        stats = {"blobs": 0, "urls": 0, "profiles": 0}
+        if conn:
+            try:
+                stats["blobs"] = conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+                stats["urls"] = conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+                stats["profiles"] = conn.execute("SELECT COUNT(DISTINCT profile) FROM refs").fetchone()[0]
+            except sqlite3.Error as e:
+                log.error(f"Failed to count cached images: {e}", exc_info=True)
+            finally:
+                conn.close()
+        return {**stats, "bytes": self.total_bytes, "max_bytes": self.max_bytes}
+
+
+def needs_migration(cache_dir: Path) -> bool:
+    """Whether a profile's image cache directory holds images from older versions."""
+    try:
+        with os.scandir(cache_dir) as entries:
+            return any(_is_key(entry.name) for entry in entries)
+    except OSError:
+        return False
+
+
+_stores: dict[Path, ImageStore] = {}
+_stores_lock = Lock()
+
+
+def get_store(root: Path, max_mb: int | None = None) -> ImageStore:
+    """Return the store for `root`, shared by every user of that directory.
+
+    `max_mb` caps the whole store, so it must be the same for every profile
+    (`ProfileManager.media_cache_max_mb`).
+    """
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = ImageStore(root)
+    if max_mb is not None and store.max_bytes != max_mb * MB:
+        store.max_bytes = max_mb * MB
+        if store.total_bytes + store.partial_bytes > store.max_bytes:
+            store.schedule_eviction()
+    return store
@@ -0,0 +1,62 @@
+from textual.screen import ModalScreen
+from textual.widgets import Static
+from textual.containers import Container, VerticalScroll
+from mastui.image import ImageWidget
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class ImageViewerScreen(ModalScreen):
+    """A modal screen to display the full-size original of media attachments."""
+
+    BINDINGS = [
+        ("escape", "dismiss", "Close"),
+        ("left", "previous_image", "Previous image"),
+        ("right", "next_image", "Next image"),
+    ]
+
+    def __init__(self, media: list, config, index: int = 0, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.media = list(media)
+        self.config = config
+        self.index = index
+
+    def compose(self):
+        with Container(id="image-viewer-dialog") as dialog:
+            dialog.border_title = "Image"
+            yield VerticalScroll(id="image-viewer-container")
+            yield Static(id="image-viewer-caption")
+
+    def on_mount(self):
+        self.show_image(self.index)
+
+    def show_image(self, index: int):
+        if not self.media:
+            return
+        self.index = index % len(self.media)
+        media = self.media[self.index]
+        container = self.query_one("#image-viewer-container")
+        container.remove_children()
+        container.mount(
+            ImageWidget(
+                media.url,
+                self.config,
+                lazy=False,
+                blurhash=media.blurhash,
+                aspect=media.aspect,
+                id="image-viewer-image",
+            )
+        )
+
+        dialog = self.query_one("#image-viewer-dialog")
+        if len(self.media) > 1:
+            dialog.border_title = f"Image {self.index + 1}/{len(self.media)}"
+        caption = media.description or ""
+        self.query_one("#image-viewer-caption").update(caption)
+
+    def action_previous_image(self):
+        self.show_image(self.index - 1)
+
+    def action_next_image(self):
+        self.show_image(self.index + 1)
@@ -18,6 +18,7 @@ class KeybindManager:
             "edit_post": "e",
             "delete_post": "delete",
             "show_urls": "x",
+            "view_image": "v",
             "open_options": "o",
             "open_filters": "i",
             "search": "/",
@@ -32,6 +33,8 @@ class KeybindManager:
             "focus_next_column": "right",
             "show_help": "?",
             "view_log": "f12",
+            "toggle_performance_hud": "f11",
+            "toggle_profiling": "f10",
         }
         self.action_descriptions = {
             "quit": "Quit the application",
@@ -43,6 +46,7 @@ class KeybindManager:
             "edit_post": "Edit your own post",
             "delete_post": "Delete your own post",
             "show_urls": "Show urls in post",
+            "view_image": "View images in post at full size",
             "open_options": "Open options screen",
             "open_filters": "Open filter manager",
             "search": "Open search screen",
@@ -57,6 +61,8 @@ class KeybindManager:
             "focus_next_column": "Focus next column",
             "show_help": "Show this help screen",
             "view_log": "View Log File (Debug)",
+            "toggle_performance_hud": "Toggle performance HUD",
+            "toggle_profiling": "Start / stop profiling",
         }
 
     def load_keymap(self):
@@ -1,13 +1,19 @@
 import logging
 from pathlib import Path
 
+
+def get_log_dir() -> Path:
+    """The directory of the debug log, where session profiles are written too."""
+    return Path.home() / ".config" / "mastui"
+
+
 def setup_logging(debug=False):
     """Set up logging to a file if debug mode is enabled."""
     if not debug:
         logging.basicConfig(level=logging.WARNING)
         return None
 
-    config_dir = Path.home() / ".config" / "mastui"
+    config_dir = get_log_dir()
     config_dir.mkdir(parents=True, exist_ok=True)
     log_file = config_dir / "mastui.log"
 
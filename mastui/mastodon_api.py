@@ -3,18 +3,27 @@ from requests import Session
 from requests.exceptions import RequestException
 import logging
 
+from mastui.metrics import count_http_response
+from mastui.tracing import trace_http_response
+
 log = logging.getLogger(__name__)
 
 
-def get_api(config_obj):
-    """Initializes and returns a Mastodon API instance."""
+def get_api(config_obj, api_base_url=None):
+    """Initializes and returns a Mastodon API instance.
+
+    `api_base_url` overrides the profile's instance, e.g. to test against a
+    local mock server.
+    """
     conf = config_obj
     if conf.mastodon_access_token:
         s = Session()
         s.verify = conf.ssl_verify
+        s.hooks["response"].append(trace_http_response)
+        s.hooks["response"].append(count_http_response)
         return Mastodon(
             access_token=conf.mastodon_access_token,
-            api_base_url=f"https://{conf.mastodon_host}",
+            api_base_url=api_base_url or f"https://{conf.mastodon_host}",
             session=s,
             mastodon_version="4.0.0",
         )
@@ -1,5 +1,6 @@
 from textual.message import Message
 from textual.widget import Widget
+from time import perf_counter
 
 class PostStatusUpdate(Message):
     """A message to update a post's status."""
@@ -34,11 +35,26 @@ class FocusPreviousTimeline(Message):
 
 
 class TimelineUpdate(Message):
-    """A message to update the timeline with new posts."""
-    def __init__(self, posts: list, since_id: str = None, max_id: str = None) -> None:
+    """A message to update the timeline with new posts.
+
+    `items` carries the view models prepared by the fetch worker, so the
+    receiving timeline only has to mount them. `request_id` and `sent_at`
+    let tracing follow the update across the hop to the UI thread.
+    """
+    def __init__(
+        self,
+        posts: list,
+        since_id: str = None,
+        max_id: str = None,
+        items: list = None,
+        request_id: int = None,
+    ) -> None:
         self.posts = posts
         self.since_id = since_id
         self.max_id = max_id
+        self.items = items
+        self.request_id = request_id
+        self.sent_at = perf_counter()
         super().__init__()
 
 
@@ -49,6 +65,14 @@ class ViewProfile(Message):
         super().__init__()
 
 
+class ViewImage(Message):
+    """A message to view media attachments at full size."""
+    def __init__(self, media: list, index: int = 0) -> None:
+        self.media = media
+        self.index = index
+        super().__init__()
+
+
 class ViewHashtag(Message):
     """A message to view a hashtag timeline."""
     def __init__(self, hashtag: str) -> None:
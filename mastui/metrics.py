@@ -0,0 +1,285 @@
+"""Live performance measurements, cheap enough to collect all the time.
+
+`api_metrics` records the latency of every API call per endpoint (the
+client method, e.g. `timeline_home`), filled in by `InstrumentedApi`.
+`frame_times` records how long the app takes to write each frame to the
+terminal, `render_times` and `refresh_times` how long each timeline takes
+to mount new posts and to fetch them, and `downloaded_bytes` the bytes
+received from the API and for images. `LoopLagProbe` measures how late the
+event loop runs a callback it scheduled. The performance HUD
+(`mastui/performance_hud.py`) shows them next to the worker, cache, widget
+and memory figures it reads directly, and `mastui/metrics_export.py`
+exports them for scraping.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+import asyncio
+import logging
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+from mastui.tracing import tracer
+
+log = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, in milliseconds.
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000)
+FRAME_BUCKETS_MS = (1, 2, 4, 8, 16, 33, 50, 100, 250)
+LAG_PROBE_SECONDS = 0.25
+
+
+class Histogram:
+    """Counts observations (in ms) per bucket, plus their count, sum and max."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # The last count is for observations above the largest bucket.
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, ms)] += 1
+            self.count += 1
+            self.total += ms
+            self.max = max(self.max, ms)
+
+    def snapshot(self) -> tuple[list[int], int, float]:
+        """The bucket counts, count and sum (ms), read together."""
+        with self._lock:
+            return list(self.counts), self.count, self.total
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """The upper bound of the bucket holding the given fraction of observations.
+
+        It is capped at the largest observation, which is known exactly.
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            threshold = fraction * self.count
+            seen = 0
+            for bound, count in zip(self.buckets, self.counts):
+                seen += count
+                if seen >= threshold:
+                    return min(bound, self.max)
+            return self.max
+
+
+def call_status(error: BaseException | None) -> str:
+    """`ok`, the HTTP status of a failed API call, or the name of its error."""
+    if error is None:
+        return "ok"
+    # Mastodon.py raises API errors with (message, status, reason, error).
+    args = getattr(error, "args", ())
+    if len(args) > 1 and isinstance(args[1], int):
+        return str(args[1])
+    return type(error).__name__
+
+
+class HistogramsByLabel:
+    """A latency histogram per label, e.g. per timeline."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._lock = Lock()
+        self.histograms: dict[str, Histogram] = {}
+
+    def observe(self, label: str, ms: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(label)
+            if histogram is None:
+                histogram = self.histograms[label] = Histogram(self.buckets)
+        histogram.observe(ms)
+
+    def items(self) -> list[tuple[str, Histogram]]:
+        with self._lock:
+            return list(self.histograms.items())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+
+
+class Counters:
+    """Named counters, safe to add to from any thread."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.values: dict[str, int] = {}
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+    def items(self) -> list[tuple[str, int]]:
+        with self._lock:
+            return list(self.values.items())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.values.clear()
+
+
+class ApiMetrics(HistogramsByLabel):
+    """Latency histograms, and call counts by status, per API endpoint."""
+
+    def __init__(self):
+        super().__init__()
+        self.errors: dict[str, int] = {}
+        self.calls: dict[tuple[str, str], int] = {}
+
+    @property
+    def endpoints(self) -> dict[str, Histogram]:
+        return self.histograms
+
+    def record(self, endpoint: str, seconds: float, error: BaseException | None = None) -> None:
+        key = (endpoint, call_status(error))
+        with self._lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+            if error is not None:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        self.observe(endpoint, seconds * 1000)
+
+    def call_counts(self) -> list[tuple[tuple[str, str], int]]:
+        with self._lock:
+            return list(self.calls.items())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.errors.clear()
+            self.calls.clear()
+
+
+api_metrics = ApiMetrics()
+frame_times = Histogram(FRAME_BUCKETS_MS)
+# From a timeline starting to render new posts to the last one mounted.
+render_times = HistogramsByLabel()
+# A timeline's fetch worker: API calls, cache writes and view models.
+refresh_times = HistogramsByLabel()
+# Bytes received, by source: "api" or "image".
+downloaded_bytes = Counters()
+
+
+def reset_session_metrics() -> None:
+    """Forget what was measured for the previous profile."""
+    api_metrics.reset()
+    render_times.reset()
+    refresh_times.reset()
+    downloaded_bytes.reset()
+
+
+def count_http_response(response, *args, **kwargs) -> None:
+    """A `requests` response hook counting the bytes the API sent.
+
+    Streaming responses are not counted: reading them here would block.
+    """
+    if kwargs.get("stream"):
+        return
+    downloaded_bytes.add("api", len(response.content))
+
+
+class InstrumentedApi:
+    """Forwards calls to an API client and times them in `api_metrics`.
+
+    Each call is also a span while tracing (`mastui.tracing`) is on.
+
+    Attributes such as `ratelimit_remaining` are read through from the
+    wrapped client. Streaming calls are not timed: they last until closed.
+    """
+
+    def __init__(self, api, metrics: ApiMetrics = api_metrics):
+        self._api = api
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attribute = getattr(self._api, name)
+        if name.startswith("_") or not callable(attribute) or name.startswith("stream_"):
+            return attribute
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                with tracer.span(name, "api"):
+                    result = attribute(*args, **kwargs)
+            except Exception as e:
+                self._metrics.record(name, perf_counter() - start, e)
+                raise
+            self._metrics.record(name, perf_counter() - start)
+            return result
+
+        return timed
+
+
+class LoopLagProbe:
+    """Measures how late the event loop runs a callback it scheduled.
+
+    While started, a callback is due every `interval` seconds; the time it
+    runs past that is the lag, e.g. while the loop runs blocking code.
+    `start` must be called from the event loop's thread.
+    """
+
+    def __init__(self, interval: float = LAG_PROBE_SECONDS):
+        self.interval = interval
+        self.lag = Histogram(FRAME_BUCKETS_MS)
+        self.last_ms = 0.0
+        self._handle: asyncio.TimerHandle | None = None
+        self._due = 0.0
+
+    def start(self) -> None:
+        if self._handle is None:
+            self._schedule(asyncio.get_running_loop())
+
+    def stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._due = loop.time() + self.interval
+        self._handle = loop.call_at(self._due, self._tick, loop)
+
+    def _tick(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.last_ms = max(0.0, loop.time() - self._due) * 1000
+        self.lag.observe(self.last_ms)
+        self._schedule(loop)
+
+
+def rss_mb() -> float:
+    """The resident set size of this process, in MB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError, AttributeError):
+        if resource is None:
+            return 0.0
+        # Peak rather than current RSS, in KB on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def hit_ratio(hits: int, misses: int) -> float | None:
+    """The share of lookups that hit, or None before the first lookup."""
+    lookups = hits + misses
+    return hits / lookups if lookups else None
@@ -0,0 +1,264 @@
+"""Export client health in the Prometheus text format for scraping.
+
+While `METRICS_EXPORT=on`, `metrics_exporter` writes the counters and
+histograms of `mastui.metrics`, the cache statistics and the memory in use
+to `mastui.prom` in the profile directory every `METRICS_EXPORT_INTERVAL`
+seconds, e.g. for node-exporter's textfile collector. With `METRICS_PORT`
+set, the same text is served at `http://127.0.0.1:<port>/metrics`, built
+afresh for each scrape. The server only listens on localhost.
+
+The output is the Prometheus text format 0.0.4, which the textfile
+collector parses and Prometheus scrapes; OpenMetrics-only features (the
+`info` type, `# UNIT`, `# EOF`) are left out.
+"""
+
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Event, Lock, Thread
+import logging
+import os
+
+from mastui import __version__ as package_version
+from mastui.image_cache import MB, decoded_images, encoded_images
+from mastui.metrics import (
+    Histogram,
+    api_metrics,
+    downloaded_bytes,
+    frame_times,
+    refresh_times,
+    render_times,
+    rss_mb,
+)
+from mastui.render_cache import converted_content, rendered_lines
+from mastui.watchdog import stall_watchdog
+
+log = logging.getLogger(__name__)
+
+METRICS_FILE_NAME = "mastui.prom"
+DEFAULT_INTERVAL_SECONDS = 30.0
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class PrometheusText:
+    """Builds a Prometheus text exposition, one metric family at a time.
+
+    Counter families are named with their `_total` suffix, like their samples.
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {_escape(help_text)}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value, **labels) -> None:
+        if labels:
+            pairs = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+            name = f"{name}{{{pairs}}}"
+        self.lines.append(f"{name} {_number(value)}")
+
+    def histogram(self, name: str, histogram: Histogram, **labels) -> None:
+        """The samples of a histogram kept in milliseconds, in seconds."""
+        counts, count, total = histogram.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            self.sample(f"{name}_bucket", cumulative, **labels, le=repr(bound / 1000))
+        self.sample(f"{name}_bucket", count, **labels, le="+Inf")
+        self.sample(f"{name}_count", count, **labels)
+        self.sample(f"{name}_sum", total / 1000, **labels)
+
+    def text(self) -> str:
+        return "\n".join(self.lines + [""])
+
+
+class MetricsExporter:
+    """Writes the app's metrics to a file periodically, and optionally serves them."""
+
+    def __init__(self):
+        self.path: Path | None = None
+        self.interval = DEFAULT_INTERVAL_SECONDS
+        self.port = 0
+        self._cache = None
+        self._api = None
+        self._store = None
+        self._profile = ""
+        self._write_lock = Lock()
+        self._stopping = Event()
+        self._thread: Thread | None = None
+        self._server: ThreadingHTTPServer | None = None
+        self._server_thread: Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(
+        self,
+        path: Path,
+        cache=None,
+        api=None,
+        store=None,
+        profile: str = "",
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+        port: int = 0,
+    ) -> None:
+        """Export the metrics of a profile, replacing any running export."""
+        self.stop()
+        self.path = Path(path)
+        self.interval = max(interval, 1.0)
+        self.port = port
+        self._cache, self._api, self._store, self._profile = cache, api, store, profile
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name="mastui-metrics-export", daemon=True)
+        self._thread.start()
+        if port:
+            self._serve(port)
+        log.debug(f"Exporting metrics to {self.path} every {self.interval:g}s")
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server_thread.join(timeout=1)
+            self._server = self._server_thread = None
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self._cache = self._api = self._store = None
+
+    def _serve(self, port: int) -> None:
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), MetricsRequestHandler)
+        except OSError as e:
+            log.error(f"Could not serve metrics on 127.0.0.1:{port}: {e}")
+            return
+        self._server.daemon_threads = True
+        self._server.exporter = self
+        self._server_thread = Thread(
+            target=self._server.serve_forever, name="mastui-metrics-server", daemon=True
+        )
+        self._server_thread.start()
+        log.info(f"Serving metrics at http://127.0.0.1:{port}/metrics")
+
+    def _run(self) -> None:
+        self.write()
+        while not self._stopping.wait(self.interval):
+            self.write()
+        # A last write, so the file ends with the profile's final figures.
+        self.write()
+
+    def write(self) -> None:
+        """Replace the metrics file with the current figures."""
+        if self.path is None:
+            return
+        with self._write_lock:
+            try:
+                partial = self.path.with_name(self.path.name + ".tmp")
+                partial.write_text(self.render(), encoding="utf-8")
+                os.replace(partial, self.path)
+            except Exception as e:
+                log.error(f"Could not write metrics to {self.path}: {e}", exc_info=True)
+
+    def render(self) -> str:
+        """The current metrics in the Prometheus text format."""
+        out = PrometheusText()
+        out.family("mastui_build_info", "gauge", "The mastui version and the loaded profile; always 1.")
+        out.sample("mastui_build_info", 1, version=package_version, profile=self._profile)
+
+        out.family("mastui_api_calls_total", "counter", "API calls by endpoint and status (ok, HTTP status or error).")
+        for (endpoint, status), count in sorted(api_metrics.call_counts()):
+            out.sample("mastui_api_calls_total", count, endpoint=endpoint, status=status)
+        out.family("mastui_api_call_duration_seconds", "histogram", "API call latency by endpoint.")
+        for endpoint, histogram in sorted(api_metrics.items()):
+            out.histogram("mastui_api_call_duration_seconds", histogram, endpoint=endpoint)
+        remaining = getattr(self._api, "ratelimit_remaining", None)
+        if isinstance(remaining, int):
+            out.family("mastui_ratelimit_remaining", "gauge", "API calls left before the rate limit resets.")
+            out.sample("mastui_ratelimit_remaining", remaining)
+
+        out.family("mastui_downloaded_bytes_total", "counter", "Bytes received, by source (api or image).")
+        for source, count in sorted(downloaded_bytes.items()):
+            out.sample("mastui_downloaded_bytes_total", count, source=source)
+
+        out.family("mastui_refresh_duration_seconds", "histogram", "Timeline fetches, from the API to view models.")
+        for timeline, histogram in sorted(refresh_times.items()):
+            out.histogram("mastui_refresh_duration_seconds", histogram, timeline=timeline)
+        out.family("mastui_render_duration_seconds", "histogram", "Rendering and mounting new posts in a timeline.")
+        for timeline, histogram in sorted(render_times.items()):
+            out.histogram("mastui_render_duration_seconds", histogram, timeline=timeline)
+        out.family("mastui_frame_duration_seconds", "histogram", "Writing a frame to the terminal.")
+        out.histogram("mastui_frame_duration_seconds", frame_times)
+        out.family("mastui_event_loop_stalls_total", "counter", "Times the event loop was blocked past the stall threshold.")
+        out.sample("mastui_event_loop_stalls_total", stall_watchdog.stalls)
+
+        self._cache_metrics(out)
+
+        out.family("mastui_resident_memory_bytes", "gauge", "Resident set size of the process.")
+        out.sample("mastui_resident_memory_bytes", round(rss_mb() * MB))
+        return out.text()
+
+    def _cache_metrics(self, out: PrometheusText) -> None:
+        lookups = []
+        if self._cache is not None:
+            stats = self._cache.stats()
+            out.family("mastui_cache_rows", "gauge", "Rows in the profile's cache database, by table.")
+            for table, rows in stats["rows"].items():
+                out.sample("mastui_cache_rows", rows, table=table)
+            out.family("mastui_cache_database_bytes", "gauge", "Size of the cache database file.")
+            out.sample("mastui_cache_database_bytes", stats["bytes"])
+            lookups.append(("posts", self._cache.hits, self._cache.misses))
+        for name, cache in (
+            ("converted_content", converted_content),
+            ("rendered_lines", rendered_lines),
+            ("decoded_images", decoded_images),
+            ("encoded_images", encoded_images),
+        ):
+            stats = cache.stats()
+            lookups.append((name, stats["hits"], stats["misses"]))
+        out.family("mastui_cache_lookups_total", "counter", "Cache lookups by cache and result (hit or miss).")
+        for name, hits, misses in lookups:
+            out.sample("mastui_cache_lookups_total", hits, cache=name, result="hit")
+            out.sample("mastui_cache_lookups_total", misses, cache=name, result="miss")
+
+        out.family("mastui_image_cache_bytes", "gauge", "Image bytes held in memory (decoded) and on disk (stored).")
+        out.sample("mastui_image_cache_bytes", decoded_images.stats()["bytes"], cache="decoded")
+        if self._store is not None:
+            out.sample("mastui_image_cache_bytes", self._store.total_bytes, cache="stored")
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        log.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        try:
+            body = self.server.exporter.render().encode("utf-8")
+        except Exception as e:
+            log.error(f"Could not render metrics: {e}", exc_info=True)
+            self.send_error(500)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+metrics_exporter = MetricsExporter()
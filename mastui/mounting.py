@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from time import perf_counter
+import logging
+
+from mastui.tracing import tracer
+
+log = logging.getLogger(__name__)
+
+DEFAULT_FRAME_BUDGET_MS = 12.0
+MIN_CHUNK_SIZE = 1
+MAX_CHUNK_SIZE = 50
+# Rough height of a post in lines, used to guess how many items fill the viewport.
+ESTIMATED_ITEM_HEIGHT = 6
+
+
+@dataclass
+class MountStats:
+    """Timing of a single chunked mount."""
+
+    label: str
+    widgets: int = 0
+    chunks: int = 0
+    total_ms: float = 0.0
+    max_chunk_ms: float = 0.0
+    first_chunk_ms: float = 0.0
+    over_budget_chunks: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.label}: {self.widgets} widgets in {self.chunks} chunks, "
+            f"{self.total_ms:.1f} ms mounting (first {self.first_chunk_ms:.1f} ms, "
+            f"max {self.max_chunk_ms:.1f} ms, {self.over_budget_chunks} over budget)"
+        )
+
+
+def visible_item_estimate(container) -> int:
+    """Guess how many items are needed to fill the visible part of `container`."""
+    height = container.size.height or container.app.size.height
+    return max(MIN_CHUNK_SIZE, height // ESTIMATED_ITEM_HEIGHT + 1)
+
+
+class ChunkedMounter:
+    """Mount a list of widgets a chunk at a time, yielding a frame in between.
+
+    The first chunk is sized to fill the viewport and mounted at `before` (or
+    appended); every later chunk is mounted right after the last widget of the
+    earlier chunks that is still attached, so the final order matches
+    `widgets` even if some were removed meanwhile. If all of them were, the
+    mount stops: the container was cleared under it. Chunk sizes adapt so that each one takes
+    about `budget_ms` to mount. `on_chunk` runs after every chunk (e.g. to
+    restore the scroll anchor), `on_first_chunk` once the first chunk is in and
+    `on_complete` after the last one. Chunks and the frames between them
+    are traced as part of `request_id`.
+    """
+
+    def __init__(
+        self,
+        container,
+        widgets: list,
+        *,
+        budget_ms: float = DEFAULT_FRAME_BUDGET_MS,
+        before=None,
+        first_chunk: int | None = None,
+        on_chunk=None,
+        on_first_chunk=None,
+        on_complete=None,
+        label: str = "mount",
+        request_id: int | None = None,
+    ):
+        self.container = container
+        self.widgets = list(widgets)
+        self.budget_ms = budget_ms if budget_ms > 0 else DEFAULT_FRAME_BUDGET_MS
+        self.before = before
+        self.first_chunk = first_chunk or visible_item_estimate(container)
+        self.on_chunk = on_chunk
+        self.on_first_chunk = on_first_chunk
+        self.on_complete = on_complete
+        self.stats = MountStats(label=label)
+        self.request_id = request_id
+        self.done = False
+
+    def start(self):
+        """Start mounting in a worker owned by the container."""
+        return self.container.run_worker(
+            self._run(), group="chunked-mount", exit_on_error=False
+        )
+
+    async def _next_frame(self):
+        refreshed = asyncio.Event()
+        self.container.call_after_refresh(refreshed.set)
+        await refreshed.wait()
+
+    async def _run(self):
+        index = 0
+        chunk_size = self.first_chunk
+        try:
+            while index < len(self.widgets):
+                chunk = self.widgets[index : index + chunk_size]
+                start = perf_counter()
+                if index:
+                    previous = self._last_attached(index)
+                    if previous is None:
+                        log.debug(f"{self.stats.label}: mounted widgets were removed, stopping")
+                        break
+                    await self.container.mount_all(chunk, after=previous)
+                elif self.before is not None:
+                    await self.container.mount_all(chunk, before=self.before)
+                else:
+                    await self.container.mount_all(chunk)
+                elapsed_ms = (perf_counter() - start) * 1000
+                self._record(len(chunk), elapsed_ms)
+                tracer.complete(
+                    f"mount {self.stats.label}", "mount", start, request_id=self.request_id, widgets=len(chunk)
+                )
+
+                index += len(chunk)
+                if self.on_chunk:
+                    self.on_chunk()
+                if self.stats.chunks == 1 and self.on_first_chunk:
+                    self.on_first_chunk()
+
+                if elapsed_ms > 0:
+                    per_widget_ms = elapsed_ms / len(chunk)
+                    chunk_size = int(self.budget_ms / per_widget_ms)
+                chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, chunk_size))
+
+                if index < len(self.widgets):
+                    start = perf_counter()
+                    await self._next_frame()
+                    tracer.complete("next frame", "render", start, request_id=self.request_id)
+        except Exception as e:
+            log.error(f"Chunked mount for {self.stats.label} failed: {e}", exc_info=True)
+        finally:
+            self.done = True
+        log.debug(self.stats.summary())
+        if self.on_complete:
+            self.on_complete()
+        if tracer.enabled and self.request_id is not None:
+            # The frame that shows the last chunk ends the request.
+            start = perf_counter()
+            await self._next_frame()
+            tracer.complete("next frame", "render", start, request_id=self.request_id)
+
+    def _last_attached(self, mounted: int):
+        """The last of the first `mounted` widgets that is still attached."""
+        for widget in reversed(self.widgets[:mounted]):
+            if widget.is_attached:
+                return widget
+        return None
+
+    def _record(self, count: int, elapsed_ms: float):
+        stats = self.stats
+        if stats.chunks == 0:
+            stats.first_chunk_ms = elapsed_ms
+        stats.widgets += count
+        stats.chunks += 1
+        stats.total_ms += elapsed_ms
+        stats.max_chunk_ms = max(stats.max_chunk_ms, elapsed_ms)
+        if elapsed_ms > self.budget_ms:
+            stats.over_budget_chunks += 1
@@ -0,0 +1,187 @@
+"""An overlay showing live performance figures, toggled with F11 by default.
+
+Everything shown is either a counter the app keeps anyway (`mastui.metrics`,
+the cache statistics) or cheap to read once per update, so leaving the HUD
+open barely changes what it measures. Only the event-loop lag probe runs
+just while the HUD is shown.
+"""
+
+from __future__ import annotations
+
+import logging
+from time import time
+
+from rich.console import Group
+from rich.table import Table
+from rich.text import Text
+from textual.widgets import Static
+from textual.worker import WorkerState
+
+from mastui.image_cache import MB, decoded_images, encoded_images
+from mastui.metrics import (
+    LATENCY_BUCKETS_MS,
+    LoopLagProbe,
+    api_metrics,
+    frame_times,
+    hit_ratio,
+    rss_mb,
+)
+from mastui.render_cache import converted_content, rendered_lines
+from mastui.timeline import Timeline
+from mastui.watchdog import stall_watchdog
+
+log = logging.getLogger(__name__)
+
+UPDATE_SECONDS = 1.0
+MAX_ENDPOINTS = 8
+BARS = " ▁▂▃▄▅▆▇█"
+
+
+def _ms(value: float) -> str:
+    return f"{value:.0f}" if value >= 10 else f"{value:.1f}"
+
+
+def _ratio(hits: int, misses: int) -> str:
+    ratio = hit_ratio(hits, misses)
+    return "–" if ratio is None else f"{ratio:.0%} of {hits + misses}"
+
+
+def _sparkline(counts: list[int]) -> str:
+    """One bar per histogram bucket, scaled to the fullest bucket."""
+    peak = max(counts) or 1
+    return "".join(BARS[round(count / peak * (len(BARS) - 1))] for count in counts)
+
+
+class PerformanceHud(Static):
+    """Frame time, event-loop lag and stalls, workers, API latency, caches and memory."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lag_probe = LoopLagProbe()
+        self._frames_seen = frame_times.count
+        self._frame_ms_seen = frame_times.total
+
+    def on_mount(self) -> None:
+        self.border_title = "Performance"
+        self.lag_probe.start()
+        self.update_figures()
+        self.set_interval(UPDATE_SECONDS, self.update_figures)
+
+    def on_unmount(self) -> None:
+        self.lag_probe.stop()
+
+    def update_figures(self) -> None:
+        try:
+            self.update(Group(self._loop_table(), self._api_table(), self._cache_table(), self._widget_table()))
+        except Exception as e:
+            log.error(f"Could not update the performance HUD: {e}", exc_info=True)
+
+    def _loop_table(self) -> Table:
+        table = Table.grid(padding=(0, 1))
+        table.add_column(style="bold")
+        table.add_column()
+
+        frames = frame_times.count - self._frames_seen
+        frame_ms = frame_times.total - self._frame_ms_seen
+        self._frames_seen, self._frame_ms_seen = frame_times.count, frame_times.total
+        if frames:
+            table.add_row(
+                "Frames",
+                f"{frames / UPDATE_SECONDS:.0f}/s, {_ms(frame_ms / frames)} ms "
+                f"(p95 {_ms(frame_times.percentile(0.95))}, max {_ms(frame_times.max)})",
+            )
+        else:
+            table.add_row("Frames", "idle")
+
+        lag = self.lag_probe.lag
+        table.add_row(
+            "Loop lag",
+            f"{_ms(self.lag_probe.last_ms)} ms (p95 {_ms(lag.percentile(0.95))}, max {_ms(lag.max)})",
+        )
+
+        if stall_watchdog.running:
+            worst = stall_watchdog.worst(1)
+            text = f"{stall_watchdog.stalls} over {stall_watchdog.threshold_ms:g} ms"
+            if worst:
+                text += f", most in {worst[0].where}"
+            table.add_row("Stalls", text)
+
+        states = [worker.state for worker in self.app.workers]
+        running = states.count(WorkerState.RUNNING)
+        queued = states.count(WorkerState.PENDING)
+        table.add_row("Workers", f"{running} running, {queued} queued")
+
+        api = self.app.api
+        remaining = getattr(api, "ratelimit_remaining", None)
+        if isinstance(remaining, int):
+            limit = getattr(api, "ratelimit_limit", None)
+            reset = getattr(api, "ratelimit_reset", None)
+            text = f"{remaining}/{limit}" if isinstance(limit, int) else str(remaining)
+            if isinstance(reset, (int, float)) and reset:
+                text += f", resets in {max(0, int(reset - time()))}s"
+            table.add_row("Rate limit", text)
+
+        table.add_row("RSS", f"{rss_mb():.0f} MB")
+        return table
+
+    def _api_table(self) -> Table:
+        table = Table(box=None, padding=(0, 1), show_edge=False, title="API latency (ms)", title_justify="left")
+        table.add_column("Endpoint", no_wrap=True)
+        table.add_column("Calls", justify="right")
+        table.add_column("Err", justify="right")
+        table.add_column("Mean", justify="right")
+        table.add_column("p95", justify="right")
+        table.add_column("Max", justify="right")
+        table.add_column(f"≤{LATENCY_BUCKETS_MS[0]}…>{LATENCY_BUCKETS_MS[-1]}", no_wrap=True)
+
+        endpoints = sorted(api_metrics.items(), key=lambda item: item[1].total, reverse=True)
+        for name, histogram in endpoints[:MAX_ENDPOINTS]:
+            errors = api_metrics.errors.get(name, 0)
+            table.add_row(
+                name,
+                str(histogram.count),
+                Text(str(errors), style="red" if errors else ""),
+                _ms(histogram.mean),
+                _ms(histogram.percentile(0.95)),
+                _ms(histogram.max),
+                _sparkline(histogram.counts),
+            )
+        if not endpoints:
+            table.add_row("no calls yet", "", "", "", "", "", "")
+        return table
+
+    def _cache_table(self) -> Table:
+        table = Table(box=None, padding=(0, 1), show_edge=False, title="Cache hits", title_justify="left")
+        table.add_column("Cache", no_wrap=True)
+        table.add_column("Hits", justify="right")
+        table.add_column("Size", justify="right")
+
+        cache = self.app.cache
+        if cache is not None:
+            table.add_row("Posts", _ratio(cache.hits, cache.misses), "")
+        for name, lru in (("Converted HTML", converted_content), ("Rendered lines", rendered_lines)):
+            stats = lru.stats()
+            table.add_row(name, _ratio(stats["hits"], stats["misses"]), str(stats["entries"]))
+        stats = decoded_images.stats()
+        table.add_row(
+            "Decoded images",
+            _ratio(stats["hits"], stats["misses"]),
+            f"{stats['bytes'] / MB:.0f}/{stats['max_bytes'] / MB:.0f} MB",
+        )
+        stats = encoded_images.stats()
+        table.add_row("Encoded images", _ratio(stats["hits"], stats["misses"]), str(stats["entries"]))
+        return table
+
+    def _widget_table(self) -> Table:
+        table = Table.grid(padding=(0, 1))
+        table.add_column(style="bold")
+        table.add_column()
+        columns = [
+            f"{timeline.id} {len(timeline.query('*'))}"
+            for screen in self.app.screen_stack
+            for timeline in screen.query(Timeline)
+        ]
+        if columns:
+            table.add_row("Widgets", ", ".join(columns))
+        table.add_row("On screen", str(len(self.screen.query("*"))))
+        return table
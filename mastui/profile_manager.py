@@ -3,6 +3,10 @@ from pathlib import Path
 import shutil
 import logging
 
+from dotenv import dotenv_values
+
+from mastui.image_store import DEFAULT_MAX_MB, get_store
+
 log = logging.getLogger(__name__)
 
 
@@ -21,6 +25,8 @@ class ProfileManager:
         self.profiles_dir = self.config_dir / "profiles"
         self.profiles_dir.mkdir(parents=True, exist_ok=True)
         self.last_profile_file = self.config_dir / "last_profile.txt"
+        # Downloaded media, shared by all profiles.
+        self.media_cache_dir = self.config_dir / "media_cache"
 
     def get_last_profile(self) -> str | None:
         """Reads the name of the last used profile."""
@@ -48,6 +54,22 @@ class ProfileManager:
         """Returns the path to a specific profile directory."""
         return self.profiles_dir / profile_name
 
+    def media_cache_max_mb(self) -> int:
+        """The cap of the shared media cache: the largest IMAGE_CACHE_MAX_MB of any profile.
+
+        The cache is shared, so it must not depend on which profile was loaded last.
+        """
+        limits = []
+        for profile_name in self.get_profiles():
+            env_file = self.get_profile_path(profile_name) / ".env"
+            if not env_file.exists():
+                continue
+            try:
+                limits.append(int(dotenv_values(env_file).get("IMAGE_CACHE_MAX_MB", DEFAULT_MAX_MB)))
+            except (OSError, ValueError) as e:
+                log.error(f"Failed to read IMAGE_CACHE_MAX_MB of {profile_name}: {e}")
+        return max(limits, default=DEFAULT_MAX_MB)
+
     def create_profile(self, profile_name: str, env_content: str):
         """Creates a new profile directory and .env file."""
         profile_path = self.get_profile_path(profile_name)
@@ -61,6 +83,10 @@ class ProfileManager:
         profile_path = self.get_profile_path(profile_name)
         if profile_path.exists():
             shutil.rmtree(profile_path)
+        try:
+            get_store(self.media_cache_dir).release_profile(profile_name)
+        except Exception as e:
+            log.error(f"Failed to release cached images of {profile_name}: {e}", exc_info=True)
 
     def migrate_old_profile(self) -> bool:
         """Migrates the old single-profile setup to the new profiles directory."""
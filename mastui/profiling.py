@@ -0,0 +1,170 @@
+"""Profile a whole session, or just the slow interaction.
+
+Two profilers are available, both from the standard library:
+
+- `sample` (`SamplingProfiler`) looks at the stack of every thread every
+  `SAMPLE_INTERVAL_MS` from a thread of its own, so it sees the workers
+  too and barely slows the app down. It writes collapsed stacks
+  (`.folded`), one line per stack with its sample count, which speedscope
+  (https://www.speedscope.app) and `flamegraph.pl` read.
+- `cprofile` (`cProfile`) counts every call on the UI thread, the thread
+  that started it. It writes a `pstats` file (`.prof`) for
+  `python -m pstats` or snakeviz, and is slower.
+
+`mastui --profile [MODE]` profiles the whole session; the
+`toggle_profiling` key starts and stops a profiling window. Profiles are
+written next to the debug log (`mastui.logging_config.get_log_dir`).
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from threading import Event, Lock, Thread, enumerate as enumerate_threads, get_ident
+import cProfile
+import io
+import logging
+import pstats
+import sys
+
+from mastui.logging_config import get_log_dir
+
+log = logging.getLogger(__name__)
+
+PROFILER_MODES = ("sample", "cprofile")
+DEFAULT_PROFILER_MODE = "sample"
+SAMPLE_INTERVAL_MS = 10.0
+SUMMARY_FUNCTIONS = 15
+
+
+def profile_path(kind: str, mode: str) -> Path:
+    """A new file for a `session` or `window` profile next to the debug log."""
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    suffix = ".prof" if mode == "cprofile" else ".folded"
+    return get_log_dir() / f"mastui-{kind}-{stamp}{suffix}"
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    # ";" separates frames in the collapsed format.
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Counts the stacks of all threads, sampled every `interval_ms`."""
+
+    def __init__(self, interval_ms: float = SAMPLE_INTERVAL_MS):
+        self.interval_ms = interval_ms
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._lock = Lock()
+        self._stopping = Event()
+        self._thread: Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name="mastui-sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    def _run(self) -> None:
+        own_id = get_ident()
+        while not self._stopping.wait(self.interval_ms / 1000):
+            names = {thread.ident: thread.name for thread in enumerate_threads()}
+            sampled = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)).replace(";", ":"))
+                sampled.append(tuple(reversed(stack)))
+            with self._lock:
+                self.stacks.update(sampled)
+                self.samples += 1
+
+    def write(self, path: Path) -> None:
+        with self._lock:
+            stacks = self.stacks.most_common()
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks:
+                f.write(f"{';'.join(stack)} {count}\n")
+
+    def summary(self, count: int = SUMMARY_FUNCTIONS) -> str:
+        """The functions seen on top of the stack most often."""
+        with self._lock:
+            leaves = Counter()
+            for stack, samples in self.stacks.items():
+                leaves[stack[-1]] += samples
+        lines = [f"{self.samples} samples every {self.interval_ms:g} ms; most often running:"]
+        lines += [f"  {samples:6d}  {name}" for name, samples in leaves.most_common(count)]
+        return "\n".join(lines)
+
+
+class Profiler:
+    """Runs one profile in the given mode and writes it when stopped.
+
+    A `cprofile` profiler must be started and stopped on the same thread,
+    the one it profiles.
+    """
+
+    def __init__(self, mode: str = DEFAULT_PROFILER_MODE):
+        if mode not in PROFILER_MODES:
+            raise ValueError(f"Unknown profiler mode: {mode}")
+        self.mode = mode
+        self._profile: cProfile.Profile | SamplingProfiler | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    def start(self) -> None:
+        if self._profile is not None:
+            return
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._profile = SamplingProfiler()
+            self._profile.start()
+        log.info(f"Started the {self.mode} profiler")
+
+    def stop(self, path: Path) -> Path | None:
+        """Stop profiling, write the profile to `path` and log its summary."""
+        profile, self._profile = self._profile, None
+        if profile is None:
+            return None
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(profile, SamplingProfiler):
+                profile.stop()
+                profile.write(path)
+                summary = profile.summary()
+            else:
+                profile.disable()
+                profile.dump_stats(path)
+                summary = self._cprofile_summary(profile)
+        except Exception as e:
+            log.error(f"Could not write the profile to {path}: {e}", exc_info=True)
+            return None
+        log.info(f"Profile written to {path}\n{summary}")
+        return path
+
+    @staticmethod
+    def _cprofile_summary(profile: cProfile.Profile) -> str:
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(SUMMARY_FUNCTIONS)
+        return out.getvalue()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+import logging
+
+from rich.measure import Measurement
+from rich.segment import Segment
+
+log = logging.getLogger(__name__)
+
+MAX_CONVERTED_ENTRIES = 2000
+MAX_RENDERED_LINE_ENTRIES = 500
+
+
+class LRUCache:
+    """A thread-safe mapping that evicts the least recently used entries."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+# Markdown converted from status HTML, keyed by (status id, edited_at).
+converted_content = LRUCache(MAX_CONVERTED_ENTRIES)
+# Wrapped lines of rendered content, keyed by (status id, edited_at, width, theme).
+rendered_lines = LRUCache(MAX_RENDERED_LINE_ENTRIES)
+
+
+def content_key(status: dict | None) -> tuple[str, str | None] | None:
+    """Return the cache key for a status, or None if it can't be cached.
+
+    Only real statuses are cached; account dicts (which also carry an `id`
+    and are converted for their `note`) are skipped to avoid id collisions.
+    """
+    if not status or "content" not in status or not status.get("id"):
+        return None
+    edited_at = status.get("edited_at")
+    if edited_at is not None:
+        edited_at = str(edited_at)
+    return str(status["id"]), edited_at
+
+
+def clear_render_caches() -> None:
+    """Forget everything, e.g. when switching to another instance's profile."""
+    converted_content.clear()
+    rendered_lines.clear()
+
+
+class CachedLines:
+    """A renderable that wraps `renderable` once per width and theme.
+
+    The wrapped lines are stored in `rendered_lines`, so a post that is
+    pruned and mounted again, or shown in two columns, reuses the layout.
+    """
+
+    def __init__(self, renderable, key: tuple | None, theme: str | None = None):
+        self.renderable = renderable
+        self.key = key
+        self.theme = theme
+
+    def __rich_console__(self, console, options):
+        if self.key is None:
+            yield self.renderable
+            return
+
+        cache_key = (*self.key, options.max_width, self.theme)
+        lines = rendered_lines.get(cache_key)
+        if lines is None:
+            lines = console.render_lines(
+                self.renderable, options.update(height=None), pad=False
+            )
+            rendered_lines.put(cache_key, lines)
+
+        new_line = Segment.line()
+        for line in lines:
+            yield from line
+            yield new_line
+
+    def __rich_measure__(self, console, options) -> Measurement:
+        return Measurement.get(console, options, self.renderable)
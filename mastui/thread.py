@@ -3,7 +3,8 @@ from textual.widgets import Static
 from textual.containers import VerticalScroll, Container
 from textual.events import Key
 from mastui.widgets import Post, LikePost, BoostPost
-from mastui.filters import is_status_hidden_by_filter
+from mastui.view_models import build_status_views
+from mastui.mounting import ChunkedMounter
 from mastui.reply import ReplyScreen
 from mastui.url_selector import URLSelectorScreen
 import logging
@@ -50,66 +51,90 @@ class ThreadScreen(ModalScreen):
         try:
             context = self.api.status_context(self.post_id)
             main_post_data = self.api.status(self.post_id)
-            self.app.call_from_thread(self.render_thread, context, main_post_data)
+            views = build_status_views(
+                [
+                    *context.get("ancestors", []),
+                    main_post_data,
+                    *context.get("descendants", []),
+                ]
+            )
+            self.app.call_from_thread(
+                self.render_thread, context, main_post_data, views
+            )
         except Exception as e:
             log.error(f"Error loading thread: {e}", exc_info=True)
             self.app.notify(f"Error loading thread: {e}", severity="error")
             self.dismiss()
 
-    def render_thread(self, context, main_post_data):
+    def render_thread(self, context, main_post_data, views=None):
         """Render the thread."""
         if self._rendering:
             return
 
-        self._rendering = True
         container = self.query_one("#thread-container")
         container.query("*").remove()
+        views = views or build_status_views(
+            [*context.get("ancestors", []), main_post_data, *context.get("descendants", [])]
+        )
+
+        ancestors = context.get("ancestors", [])
+        descendants = context.get("descendants", [])
+        widgets = []
+
+        for post in ancestors:
+            view = views[str(post["id"])]
+            if view.hidden:
+                continue
+            widgets.append(Post(post, timeline_id="thread", view=view))
+
+        main_view = views[str(main_post_data["id"])]
+        if main_view.hidden:
+            widgets.append(
+                Static(
+                    "The selected post is hidden by your filters.",
+                    classes="status-message",
+                )
+            )
+        else:
+            main_post = Post(main_post_data, timeline_id="thread", view=main_view)
+            main_post.add_class("main-post")
+            widgets.append(main_post)
+
+        for post in descendants:
+            view = views[str(post["id"])]
+            if view.hidden:
+                continue
+            reply_post = Post(post, timeline_id="thread", view=view)
+            reply_post.add_class("reply-post")
+            widgets.append(reply_post)
+
+        mounted_posts = sum(1 for widget in widgets if isinstance(widget, Post))
+        if not mounted_posts:
+            widgets.append(
+                Static(
+                    "No visible posts in this thread due to your filters.",
+                    classes="status-message",
+                )
+            )
+
+        def on_first_chunk():
+            if mounted_posts:
+                self.select_first_item()
+
+        def on_complete():
+            self._rendering = False
 
         def mount_posts():
-            try:
-                ancestors = context.get("ancestors", [])
-                descendants = context.get("descendants", [])
-                mounted_posts = 0
-
-                for post in ancestors:
-                    if is_status_hidden_by_filter(post.get("reblog") or post):
-                        continue
-                    container.mount(Post(post, timeline_id="thread"))
-                    mounted_posts += 1
-
-                if is_status_hidden_by_filter(main_post_data.get("reblog") or main_post_data):
-                    container.mount(
-                        Static(
-                            "The selected post is hidden by your filters.",
-                            classes="status-message",
-                        )
-                    )
-                else:
-                    main_post = Post(main_post_data, timeline_id="thread")
-                    main_post.add_class("main-post")
-                    container.mount(main_post)
-                    mounted_posts += 1
-
-                for post in descendants:
-                    if is_status_hidden_by_filter(post.get("reblog") or post):
-                        continue
-                    reply_post = Post(post, timeline_id="thread")
-                    reply_post.add_class("reply-post")
-                    container.mount(reply_post)
-                    mounted_posts += 1
-
-                if mounted_posts:
-                    self.select_first_item()
-                else:
-                    container.mount(
-                        Static(
-                            "No visible posts in this thread due to your filters.",
-                            classes="status-message",
-                        )
-                    )
-            finally:
-                self._rendering = False
+            ChunkedMounter(
+                container,
+                widgets,
+                budget_ms=self.app.config.mount_frame_budget_ms,
+                on_first_chunk=on_first_chunk,
+                on_complete=on_complete,
+                label="thread",
+            ).start()
 
+        self._rendering = True
         self.call_after_refresh(mount_posts)
 
     def on_key(self, event: Key) -> None:
@@ -2,13 +2,24 @@ from textual.widgets import Static, LoadingIndicator
 from textual.containers import Horizontal
 from textual import events
 from textual._context import NoActiveAppError
-from mastui.widgets import Post, Notification, GapIndicator, ConversationSummary
+from mastui.widgets import (
+    Post,
+    CompactPost,
+    Notification,
+    GapIndicator,
+    ConversationSummary,
+)
 from mastui.messages import TimelineUpdate, ViewConversation
 from mastui.timeline_content import TimelineContent
-from mastui.filters import is_notification_hidden_by_filter, is_status_hidden_by_filter
+from mastui.view_models import build_timeline_items
+from mastui.mounting import ChunkedMounter
+from mastui.metrics import refresh_times, render_times
+from mastui.tracing import tracer
 from mastodon import MastodonNetworkError
 import logging
 from datetime import datetime, timezone, timedelta
+from functools import partial
+from time import perf_counter
 
 log = logging.getLogger(__name__)
 
@@ -29,6 +40,8 @@ class Timeline(Static, can_focus=True):
         self.loading_more = False
         self.scroll_anchor_id = None
         self.initial_render_done = False
+        self._mounter = None
+        self._pending_renders = []
 
     @property
     def content_container(self) -> TimelineContent:
@@ -74,12 +87,23 @@ class Timeline(Static, can_focus=True):
 
     def on_timeline_update(self, message: TimelineUpdate) -> None:
         """Handle a timeline update message."""
+        tracer.complete(
+            f"TimelineUpdate {self.id}", "message", message.sent_at, request_id=message.request_id
+        )
         self.render_posts(
-            message.posts, since_id=message.since_id, max_id=message.max_id
+            message.posts,
+            since_id=message.since_id,
+            max_id=message.max_id,
+            items=message.items,
+            request_id=message.request_id,
         )
 
-    def refresh_posts(self):
-        """Refresh the timeline with new posts."""
+    def refresh_posts(self, request_id=None):
+        """Refresh the timeline with new posts.
+
+        `request_id` joins the refresh to a traced request, e.g. one key
+        press refreshing every timeline.
+        """
         if self.loading_more:
             return
 
@@ -107,8 +131,10 @@ class Timeline(Static, can_focus=True):
         self.loading_more = True
         log.info(f"Refreshing {self.id} timeline...")
         self.loading_indicator.display = True
+        if request_id is None:
+            request_id = tracer.new_request(f"refresh {self.id}")
         self.run_worker(
-            lambda: self.do_fetch_posts(since_id=self.latest_post_id),
+            lambda: self._fetch_in_request(request_id, since_id=self.latest_post_id),
             exclusive=True,
             thread=True,
         )
@@ -118,9 +144,17 @@ class Timeline(Static, can_focus=True):
             return
         log.info(f"Loading posts for {self.id} timeline...")
         self.loading_indicator.display = True
-        self.run_worker(self.do_fetch_posts, thread=True)
+        request_id = tracer.new_request(f"load {self.id}")
+        self.run_worker(partial(self._fetch_in_request, request_id), thread=True)
         log.info(f"Worker requested for {self.id} timeline.")
 
+    def _fetch_in_request(self, request_id, since_id=None, max_id=None):
+        """Run `do_fetch_posts` as part of a traced request."""
+        started = perf_counter()
+        with tracer.request(request_id), tracer.span(f"fetch {self.id}", "fetch"):
+            self.do_fetch_posts(since_id=since_id, max_id=max_id)
+        refresh_times.observe(self.id, (perf_counter() - started) * 1000)
+
     def do_fetch_posts(self, since_id=None, max_id=None):
         """Worker method to fetch posts and post a message with the result."""
         is_initial_load = (
@@ -147,13 +181,13 @@ class Timeline(Static, can_focus=True):
                 # Step 1: Load from cache immediately for instant UI
                 cached_convos = app.cache.get_conversations()
                 if cached_convos:
-                    self.post_message(TimelineUpdate(cached_convos))
+                    self._post_timeline_update(cached_convos)
 
                 # Step 2: Fetch from API in the background
                 fresh_convos = self.fetch_posts()
                 if fresh_convos:
                     app.cache.bulk_insert_conversations(fresh_convos)
-                    self.post_message(TimelineUpdate(fresh_convos))
+                    self._post_timeline_update(fresh_convos)
                 elif not cached_convos:
                     # Ensure initial load completes even when there are no DMs.
                     self.post_message(TimelineUpdate([]))
@@ -166,7 +200,7 @@ class Timeline(Static, can_focus=True):
                     app.cache.bulk_insert_posts(self.id, posts)
                     if self.id == "notifications":
                         self._handle_popups(posts)
-                self.post_message(TimelineUpdate(posts, since_id=since_id))
+                self._post_timeline_update(posts, since_id=since_id)
                 return
 
             # Case 2: Scrolling down for older posts
@@ -178,7 +212,7 @@ class Timeline(Static, can_focus=True):
                     log.info(
                         f"Loaded {len(cached_posts)} older posts from cache for {self.id}"
                     )
-                    self.post_message(TimelineUpdate(cached_posts, max_id=max_id))
+                    self._post_timeline_update(cached_posts, max_id=max_id)
                     return  # We're done for now, wait for next scroll
 
                 # If cache is exhausted for this scroll, fetch from server
@@ -186,7 +220,7 @@ class Timeline(Static, can_focus=True):
                 server_posts = self.fetch_posts(max_id=max_id)
                 if server_posts:
                     app.cache.bulk_insert_posts(self.id, server_posts)
-                self.post_message(TimelineUpdate(server_posts, max_id=max_id))
+                self._post_timeline_update(server_posts, max_id=max_id)
                 return
 
             # Case 3: Initial load (no since_id or max_id)
@@ -201,7 +235,7 @@ class Timeline(Static, can_focus=True):
                     app.cache.bulk_insert_posts(self.id, gap_posts)
 
                 all_posts = app.cache.get_posts(self.id, limit=20)
-                self.post_message(TimelineUpdate(all_posts))
+                self._post_timeline_update(all_posts)
             else:
                 log.info(
                     f"Gap is large or cache is empty for {self.id}, fetching latest."
@@ -209,7 +243,7 @@ class Timeline(Static, can_focus=True):
                 posts = self.fetch_posts(limit=10)
                 if posts:
                     app.cache.bulk_insert_posts(self.id, posts)
-                self.post_message(TimelineUpdate(posts))
+                self._post_timeline_update(posts)
 
         except Exception as e:
             log.error(
@@ -217,6 +251,21 @@ class Timeline(Static, can_focus=True):
             )
             self.post_message(TimelineUpdate([]))
 
+    def _post_timeline_update(self, posts, since_id=None, max_id=None):
+        """Build view models in the worker thread and hand them to the UI."""
+        items = build_timeline_items(self.id, posts)
+        if self.id != "direct":
+            self.app.cache.bulk_insert_rendered_content(posts)
+        self.post_message(
+            TimelineUpdate(
+                posts,
+                since_id=since_id,
+                max_id=max_id,
+                items=items,
+                request_id=tracer.current_request(),
+            )
+        )
+
     def get_latest_post_id_from_cache(self, app):
         """Helper to get the ID of the very latest post in the cache."""
         latest_posts = app.cache.get_posts(self.id, limit=1)
@@ -278,14 +327,28 @@ class Timeline(Static, can_focus=True):
         self.loading_more = True
         log.info(f"Loading older posts for {self.id} timeline...")
         self.loading_indicator.display = True
+        request_id = tracer.new_request(f"load older {self.id}")
         self.run_worker(
-            lambda: self.do_fetch_posts(max_id=self.oldest_post_id),
+            lambda: self._fetch_in_request(request_id, max_id=self.oldest_post_id),
             exclusive=True,
             thread=True,
         )
 
-    def render_posts(self, posts_data, since_id=None, max_id=None):
-        """Renders the given posts data in the timeline."""
+    def render_posts(self, posts_data, since_id=None, max_id=None, items=None, request_id=None):
+        """Renders the given posts data in the timeline.
+
+        `items` are the view models built by the fetch worker; they are only
+        built here as a fallback for data handed to the widget directly.
+        """
+        if self._mounter is not None:
+            # Keep the DOM order consistent: render this batch once the
+            # previous one has finished streaming in.
+            log.debug(f"Queueing render for {self.id} until the current mount completes")
+            self._pending_renders.append((posts_data, since_id, max_id, items, request_id))
+            return
+
+        started = perf_counter()
+
         log.info(f"render_posts called for {self.id} with {len(posts_data)} posts.")
         self.loading_indicator.display = False
         self.loading_more = False
@@ -317,6 +380,9 @@ class Timeline(Static, can_focus=True):
                 f"Initial load for {self.id} returned {len(posts_data)} posts; rendering only {INITIAL_RENDER_LIMIT}"
             )
             posts_data = posts_data[:INITIAL_RENDER_LIMIT]
+            if items is not None:
+                rendered_ids = {id(item) for item in posts_data}
+                items = [item for item in items if id(item.data) in rendered_ids]
 
         if posts_data:
             new_latest_post_id_str = posts_data[0]["id"]
@@ -337,37 +403,32 @@ class Timeline(Static, can_focus=True):
             for item in self.content_container.query(".status-message"):
                 item.remove()
 
+        if items is None:
+            items = build_timeline_items(self.id, posts_data)
+
+        post_class = CompactPost if self.app.config.compact_posts else Post
         new_widgets = []
-        for item in posts_data:
-            if self.id in {"home", "local", "federated"}:
-                status = item.get("reblog") or item
-                if is_status_hidden_by_filter(status):
-                    continue
-            elif self.id == "notifications":
-                if is_notification_hidden_by_filter(item):
-                    continue
-
-            widget_id = ""
-            if self.id == "notifications":
-                status = item.get("status") or {}
-                status_id = status.get("id", "")
-                unique_part = f"{item['type']}-{item['account']['id']}-{status_id}"
-                # Replace periods with underscores to ensure valid HTML id (admin notifications have periods in IDs)
-                unique_part = unique_part.replace(".", "_")
-                widget_id = f"notif-{unique_part}"
-            elif self.id == "direct":
-                widget_id = f"conv-{item['id']}"
-            else:
-                widget_id = f"post-{item['id']}"
+        for item in items:
+            if item.hidden:
+                continue
 
+            widget_id = item.widget_id
             if widget_id not in self.post_ids:
                 self.post_ids.add(widget_id)
                 if self.id == "home" or self.id == "federated" or self.id == "local":
-                    new_widgets.append(Post(item, timeline_id=self.id, id=widget_id))
+                    new_widgets.append(
+                        post_class(
+                            item.data, timeline_id=self.id, view=item.status, id=widget_id
+                        )
+                    )
                 elif self.id == "notifications":
-                    new_widgets.append(Notification(item, id=widget_id))
+                    new_widgets.append(
+                        Notification(item.data, view=item.status, id=widget_id)
+                    )
                 elif self.id == "direct":
-                    new_widgets.append(ConversationSummary(item, id=widget_id))
+                    new_widgets.append(
+                        ConversationSummary(item.data, snippet=item.snippet_md, id=widget_id)
+                    )
 
         if is_initial_load and posts_data and not new_widgets:
             self.content_container.mount(
@@ -376,31 +437,58 @@ class Timeline(Static, can_focus=True):
             self._notify_initial_render_complete()
             return
 
-        if new_widgets:
-            log.info(f"Mounting {len(new_widgets)} new posts in {self.id}")
-            if max_id:  # older posts
-                # Check for gap
-                first_new_post_ts = new_widgets[0].get_created_at()
-                last_old_post = self.content_container.query(
-                    "Post, Notification"
-                ).last()
-
-                if last_old_post and first_new_post_ts:
-                    last_old_post_ts = last_old_post.get_created_at()
-                    if (
-                        last_old_post_ts
-                        and first_new_post_ts < last_old_post_ts - timedelta(minutes=30)
-                    ):
-                        self.content_container.mount(GapIndicator())
-
-                self.content_container.mount_all(new_widgets)
-            else:  # newer posts or initial load
-                self.content_container.mount_all(new_widgets, before=0)
-
-        if new_widgets and is_initial_load:
-            self.content_container.select_first_item()
-            self._notify_initial_render_complete()
+        if not new_widgets:
+            self._finish_render(since_id, max_id, is_initial_load)
+            return
 
+        tracer.complete(
+            f"build widgets {self.id}", "render", started, request_id=request_id, widgets=len(new_widgets)
+        )
+        log.info(f"Mounting {len(new_widgets)} new posts in {self.id}")
+        before = 0
+        if max_id:  # older posts
+            before = None
+            # Check for gap
+            first_new_post_ts = new_widgets[0].get_created_at()
+            last_old_post = self.content_container.query(
+                "Post, Notification"
+            ).last()
+
+            if last_old_post and first_new_post_ts:
+                last_old_post_ts = last_old_post.get_created_at()
+                if (
+                    last_old_post_ts
+                    and first_new_post_ts < last_old_post_ts - timedelta(minutes=30)
+                ):
+                    self.content_container.mount(GapIndicator())
+
+        def on_first_chunk():
+            if is_initial_load:
+                self.content_container.select_first_item()
+                self._notify_initial_render_complete()
+
+        def on_complete():
+            render_times.observe(self.id, (perf_counter() - started) * 1000)
+            self._mounter = None
+            self._finish_render(since_id, max_id, is_initial_load)
+            if self._pending_renders:
+                self.render_posts(*self._pending_renders.pop(0))
+
+        self._mounter = ChunkedMounter(
+            self.content_container,
+            new_widgets,
+            budget_ms=self.app.config.mount_frame_budget_ms,
+            before=before,
+            on_chunk=self._restore_scroll_anchor if since_id else None,
+            on_first_chunk=on_first_chunk,
+            on_complete=on_complete,
+            label=self.id,
+            request_id=request_id,
+        )
+        self._mounter.start()
+
+    def _finish_render(self, since_id, max_id, is_initial_load):
+        """Prune, sort and restore the scroll position once all new items are mounted."""
         prune_direction = "top" if max_id else "bottom"
         self.prune_posts(direction=prune_direction)
 
@@ -416,25 +504,28 @@ class Timeline(Static, can_focus=True):
 
             self.content_container.sort_children(key=get_sort_key, reverse=True)
 
-        # --- Start of scroll restoration logic ---
-        if self.scroll_anchor_id and since_id:  # Only restore on a refresh
-            try:
-                anchor_widget = self.content_container.query_one(
-                    f"#{self.scroll_anchor_id}"
-                )
-                self.content_container.scroll_to_widget(
-                    anchor_widget, animate=False, top=True
-                )
-                log.debug(
-                    f"Restored scroll position for {self.id} to {self.scroll_anchor_id}"
-                )
-            except Exception as e:
-                log.warning(f"Could not restore scroll position: {e}")
+        if since_id:  # Only restore on a refresh
+            self._restore_scroll_anchor()
         self.scroll_anchor_id = None
-        # --- End of scroll restoration logic ---
         if is_initial_load:
             self._notify_initial_render_complete()
 
+    def _restore_scroll_anchor(self):
+        if not self.scroll_anchor_id:
+            return
+        try:
+            anchor_widget = self.content_container.query_one(
+                f"#{self.scroll_anchor_id}"
+            )
+            self.content_container.scroll_to_widget(
+                anchor_widget, animate=False, top=True
+            )
+            log.debug(
+                f"Restored scroll position for {self.id} to {self.scroll_anchor_id}"
+            )
+        except Exception as e:
+            log.warning(f"Could not restore scroll position: {e}")
+
     def _notify_initial_render_complete(self):
         if not self.initial_render_done:
             self.initial_render_done = True
@@ -2,6 +2,7 @@ from textual.containers import VerticalScroll
 from textual import on, events
 from textual.screen import ModalScreen
 from mastui.widgets import Post, Notification, LikePost, BoostPost, DeletePost
+from mastui.image import ImageWidget
 from mastui.reply import ReplyScreen
 from mastui.thread import ThreadScreen
 from mastui.messages import ViewProfile, SelectPost
@@ -34,6 +35,8 @@ class TimelineContent(VerticalScroll):
             self.selected_item.remove_class("selected")
         self.selected_item = message.post_widget
         self.selected_item.add_class("selected")
+        if hasattr(self.selected_item, "activate"):
+            self.selected_item.activate()
         message.stop()
 
     def select_first_item(self):
@@ -54,6 +57,8 @@ class TimelineContent(VerticalScroll):
         self.selected_item = widget
         if self.selected_item:
             self.selected_item.add_class("selected")
+            if hasattr(self.selected_item, "activate"):
+                self.selected_item.activate()
 
 
     def on_mouse_scroll_down(self, event: events.MouseScrollDown) -> None:
@@ -73,6 +78,7 @@ class TimelineContent(VerticalScroll):
         if previous_item:
             self._set_selected(previous_item)
             previous_item.scroll_visible()
+            self._prefetch_images(previous_item, -1)
         else:
             if not getattr(self.timeline, "loading_more", False):
                 self.timeline.refresh_posts()
@@ -82,11 +88,30 @@ class TimelineContent(VerticalScroll):
         if next_item:
             self._set_selected(next_item)
             next_item.scroll_visible()
+            self._prefetch_images(next_item, 1)
         else:
             if not getattr(self.timeline, "loading_more", False):
                 if hasattr(self.timeline, "load_older_posts"):
                     self.timeline.load_older_posts()
 
+    def _prefetch_images(self, item, direction: int):
+        """Start loading images of the next few items in the scroll direction."""
+        count = self.app.config.image_prefetch_items
+        if not self.app.config.image_support or count <= 0:
+            return
+        try:
+            items = self.query("Post, Notification, ConversationSummary").nodes
+            idx = items.index(item)
+        except ValueError:
+            return
+        if direction > 0:
+            upcoming = items[idx + 1 : idx + 1 + count]
+        else:
+            upcoming = items[max(0, idx - count) : idx]
+        for upcoming_item in upcoming:
+            for image in upcoming_item.query(ImageWidget):
+                image.start_loading()
+
     def _adjacent_item(self, offset: int):
         try:
             items = self.query("Post, Notification, ConversationSummary")
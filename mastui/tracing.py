@@ -0,0 +1,187 @@
+"""Lightweight spans, exported as a Chrome trace-event file.
+
+Run `mastui --trace session.json` and open the file in Perfetto
+(https://ui.perfetto.dev) or `chrome://tracing`. Each span becomes a
+complete ("X") event on the thread that ran it. Work started by one user
+action shares a request id: the action opens a request with
+`tracer.new_request`, the id travels with the worker and the
+`TimelineUpdate` message, and spans inside `tracer.request(id)` carry it
+in their args and are joined by flow arrows from keypress to render.
+
+While tracing is off, `span` returns a shared no-op context manager and
+`traced` functions only check a flag.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from itertools import count
+from pathlib import Path
+from threading import Lock, get_ident
+from time import perf_counter
+import json
+import logging
+import os
+import threading
+
+log = logging.getLogger(__name__)
+
+_NO_SPAN = nullcontext()
+_current_request: ContextVar[int | None] = ContextVar("mastui_trace_request", default=None)
+
+
+def _now_us() -> float:
+    return perf_counter() * 1_000_000
+
+
+class Tracer:
+    """Writes trace events to a JSON array file while enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Path | None = None
+        self._file = None
+        self._lock = Lock()
+        self._first = True
+        self._request_ids = count(1)
+        self._named_threads: set[int] = set()
+        self._pid = os.getpid()
+
+    def start(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("w", encoding="utf-8")
+        self._file.write("[\n")
+        self._first = True
+        self._named_threads.clear()
+        self.enabled = True
+        log.info(f"Tracing to {self.path}")
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.enabled = False
+            self._file.write("\n]\n")
+            self._file.close()
+            self._file = None
+        log.info(f"Trace written to {self.path}")
+
+    def _emit(self, event: dict) -> None:
+        tid = event.setdefault("tid", get_ident())
+        event["pid"] = self._pid
+        with self._lock:
+            if self._file is None:
+                return
+            if tid not in self._named_threads:
+                self._named_threads.add(tid)
+                self._write(
+                    {
+                        "ph": "M",
+                        "name": "thread_name",
+                        "pid": self._pid,
+                        "tid": tid,
+                        "args": {"name": threading.current_thread().name},
+                    }
+                )
+            self._write(event)
+
+    def _write(self, event: dict) -> None:
+        self._file.write(("" if self._first else ",\n") + json.dumps(event, default=str))
+        self._first = False
+
+    def new_request(self, name: str, **args) -> int | None:
+        """Start a request that later spans can join; None while tracing is off."""
+        if not self.enabled:
+            return None
+        request_id = next(self._request_ids)
+        self._emit({"ph": "i", "s": "t", "name": name, "cat": "request", "ts": _now_us(), "args": {"request": request_id, **args}})
+        return request_id
+
+    def current_request(self) -> int | None:
+        """The request joined by spans on this thread, if any."""
+        return _current_request.get()
+
+    @contextmanager
+    def request(self, request_id: int | None):
+        """Let spans on this thread join `request_id` until the block ends."""
+        token = _current_request.set(request_id)
+        try:
+            yield
+        finally:
+            _current_request.reset(token)
+
+    def span(self, name: str, cat: str = "app", request_id: int | None = None, **args):
+        """Time the enclosed block as a span."""
+        if not self.enabled:
+            return _NO_SPAN
+        return self._span(name, cat, request_id, args)
+
+    @contextmanager
+    def _span(self, name: str, cat: str, request_id: int | None, args: dict):
+        request_id = request_id if request_id is not None else _current_request.get()
+        start = _now_us()
+        try:
+            yield args
+        finally:
+            self._emit_span(name, cat, start, _now_us(), request_id, args)
+
+    def _emit_span(self, name: str, cat: str, start: float, end: float, request_id: int | None, args: dict) -> None:
+        event = {"ph": "X", "name": name, "cat": cat, "ts": start, "dur": end - start, "args": args}
+        if request_id is not None:
+            args["request"] = request_id
+            # Consecutive spans of a request are joined by flow arrows.
+            event.update(bind_id=request_id, flow_in=True, flow_out=True)
+        self._emit(event)
+
+    def complete(self, name: str, cat: str, start: float, end: float | None = None, **args) -> None:
+        """Record a span that already happened, with `perf_counter` times."""
+        if not self.enabled:
+            return
+        end = perf_counter() if end is None else end
+        request_id = args.pop("request_id", None)
+        if request_id is None:
+            request_id = _current_request.get()
+        self._emit_span(name, cat, start * 1_000_000, end * 1_000_000, request_id, args)
+
+
+tracer = Tracer()
+
+
+def traced(cat: str, name: str | None = None):
+    """Decorate a function so that each call is a span while tracing is on."""
+
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, cat):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def trace_http_response(response, *args, **kwargs) -> None:
+    """A `requests` response hook recording the time until the headers arrived.
+
+    The rest of an API call's span is reading the body and decoding JSON.
+    """
+    if not tracer.enabled:
+        return
+    end = perf_counter()
+    request = response.request
+    path = request.path_url.split("?", 1)[0]
+    tracer.complete(
+        f"http {request.method} {path}",
+        "http",
+        end - response.elapsed.total_seconds(),
+        end,
+        status=response.status_code,
+    )
@@ -4,6 +4,8 @@ from dateutil.parser import parse
 from bs4 import BeautifulSoup
 import logging
 
+from mastui.render_cache import content_key, converted_content
+
 log = logging.getLogger(__name__)
 
 VISIBILITY_OPTIONS = [
@@ -15,6 +17,10 @@ VISIBILITY_OPTIONS = [
 
 MARKDOWN_LINK_REGEX = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
 
+# Bump whenever to_markdown/get_full_content_md output changes, so content
+# persisted in the cache database is converted again.
+CONVERTER_VERSION = 1
+
 
 def markdown_links_to_html(text: str) -> str:
     """Converts Markdown-style links in a string to HTML <a> tags."""
@@ -57,6 +63,13 @@ def get_full_content_md(status: dict) -> str:
     if cached:
         return cached
 
+    key = content_key(status)
+    if key is not None:
+        cached = converted_content.get(key)
+        if cached is not None:
+            status["_cached_markdown"] = cached
+            return cached
+
     html_content = status.get("content") or status.get("note") or ""
 
     content_md = to_markdown(html_content)
@@ -78,6 +91,8 @@ def get_full_content_md(status: dict) -> str:
             content_md = "\n".join(media_infos)
 
     status["_cached_markdown"] = content_md
+    if key is not None:
+        converted_content.put(key, content_md)
     return content_md
 
 
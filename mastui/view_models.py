@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+
+from dateutil.parser import parse
+
+from mastui.filters import (
+    get_status_filter_warning,
+    is_notification_hidden_by_filter,
+    is_status_hidden_by_filter,
+)
+from mastui.tracing import traced
+from mastui.utils import format_datetime, get_full_content_md, to_markdown
+
+log = logging.getLogger(__name__)
+
+CONVERSATION_SNIPPET_LENGTH = 100
+
+
+@dataclass(frozen=True)
+class MediaView:
+    """A media attachment, reduced to what the timeline widgets need."""
+
+    type: str
+    url: str
+    preview_url: str | None = None
+    description: str | None = None
+    blurhash: str | None = None
+    aspect: float | None = None
+
+
+@dataclass(frozen=True)
+class StatusView:
+    """Pre-computed display data for a single status."""
+
+    id: str
+    content_md: str
+    created_at: datetime | None
+    created_at_str: str
+    filter_warning: str | None
+    hidden: bool
+    media: tuple[MediaView, ...] = ()
+
+
+@dataclass(frozen=True)
+class TimelineItem:
+    """A timeline entry that is ready to be mounted without further work.
+
+    `data` is the raw API payload the widget keeps for actions (like, boost,
+    reply); everything that is expensive to derive from it lives in `status`.
+    """
+
+    widget_id: str
+    data: dict
+    status: StatusView | None
+    created_at: datetime | None
+    created_at_str: str
+    hidden: bool = False
+    snippet_md: str = ""
+
+
+def parse_datetime(value) -> datetime | None:
+    """Parse an API timestamp (string or datetime) into a datetime."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            return parse(str(value))
+        except (ValueError, OverflowError):
+            log.debug(f"Could not parse timestamp: {value!r}")
+            return None
+
+
+def _format_created_at(created_at: datetime | None) -> str:
+    return format_datetime(created_at) if created_at else ""
+
+
+def _media_aspect(media: dict) -> float | None:
+    """Return the width/height ratio of an attachment's preview, if known."""
+    meta = media.get("meta") or {}
+    for size in ("small", "original"):
+        info = meta.get(size) or {}
+        aspect = info.get("aspect")
+        if not aspect and info.get("width") and info.get("height"):
+            aspect = info["width"] / info["height"]
+        if aspect:
+            try:
+                return float(aspect)
+            except (TypeError, ValueError):
+                continue
+    return None
+
+
+def build_media_views(status: dict) -> tuple[MediaView, ...]:
+    media_views = []
+    for media in status.get("media_attachments") or []:
+        url = media.get("url") or media.get("remote_url")
+        if not url:
+            continue
+        media_views.append(
+            MediaView(
+                type=media.get("type", "unknown"),
+                url=url,
+                preview_url=media.get("preview_url"),
+                description=media.get("description"),
+                blurhash=media.get("blurhash"),
+                aspect=_media_aspect(media),
+            )
+        )
+    return tuple(media_views)
+
+
+def build_status_view(status: dict) -> StatusView:
+    """Convert, parse and evaluate everything a status widget displays."""
+    created_at = parse_datetime(status.get("created_at"))
+    return StatusView(
+        id=str(status.get("id", "")),
+        content_md=get_full_content_md(status),
+        created_at=created_at,
+        created_at_str=_format_created_at(created_at),
+        filter_warning=get_status_filter_warning(status),
+        hidden=is_status_hidden_by_filter(status),
+        media=build_media_views(status),
+    )
+
+
+def build_status_views(statuses: list) -> dict[str, StatusView]:
+    """Build views for a batch of statuses, keyed by the outer status id."""
+    return {
+        str(status["id"]): build_status_view(status.get("reblog") or status)
+        for status in statuses
+        if status
+    }
+
+
+def make_widget_id(timeline_id: str, item: dict) -> str:
+    """Return the DOM id used for an item in the given timeline."""
+    if timeline_id == "notifications":
+        status = item.get("status") or {}
+        status_id = status.get("id", "")
+        unique_part = f"{item['type']}-{item['account']['id']}-{status_id}"
+        # Replace periods with underscores to ensure valid HTML id (admin notifications have periods in IDs)
+        unique_part = unique_part.replace(".", "_")
+        return f"notif-{unique_part}"
+    if timeline_id == "direct":
+        return f"conv-{item['id']}"
+    return f"post-{item['id']}"
+
+
+def build_timeline_item(timeline_id: str, item: dict) -> TimelineItem:
+    """Build the view model for one entry of a timeline."""
+    widget_id = make_widget_id(timeline_id, item)
+
+    if timeline_id == "notifications":
+        status = item.get("status")
+        status_view = build_status_view(status) if status else None
+        if item["type"] == "mention" and status:
+            created_at = status_view.created_at
+        else:
+            created_at = parse_datetime(item.get("created_at"))
+        return TimelineItem(
+            widget_id=widget_id,
+            data=item,
+            status=status_view,
+            created_at=created_at,
+            created_at_str=_format_created_at(created_at),
+            hidden=is_notification_hidden_by_filter(item),
+        )
+
+    if timeline_id == "direct":
+        last_status = item.get("last_status")
+        created_at = None
+        snippet = ""
+        if last_status:
+            created_at = parse_datetime(last_status.get("created_at"))
+            snippet = to_markdown(last_status.get("content", ""))
+            # Truncate snippet to a reasonable length
+            if len(snippet) > CONVERSATION_SNIPPET_LENGTH:
+                snippet = snippet[: CONVERSATION_SNIPPET_LENGTH - 3] + "..."
+        return TimelineItem(
+            widget_id=widget_id,
+            data=item,
+            status=None,
+            created_at=created_at,
+            created_at_str=_format_created_at(created_at),
+            snippet_md=snippet,
+        )
+
+    status_view = build_status_view(item.get("reblog") or item)
+    return TimelineItem(
+        widget_id=widget_id,
+        data=item,
+        status=status_view,
+        created_at=status_view.created_at,
+        created_at_str=status_view.created_at_str,
+        hidden=status_view.hidden,
+    )
+
+
+@traced("convert")
+def build_timeline_items(timeline_id: str, items: list | None) -> list[TimelineItem]:
+    """Build view models for a batch of API items, skipping malformed ones."""
+    timeline_items = []
+    for item in items or []:
+        try:
+            timeline_items.append(build_timeline_item(timeline_id, item))
+        except (KeyError, TypeError, AttributeError) as e:
+            log.warning(f"Skipping malformed item in {timeline_id}: {e}")
+    return timeline_items
@@ -0,0 +1,161 @@
+"""Find the code that blocks the event loop.
+
+`StallWatchdog` schedules a heartbeat on the event loop and watches it from
+a separate thread. When the heartbeat is more than `threshold_ms` late, the
+loop is busy running something, so the watchdog captures the loop thread's
+stack at that moment. When the loop comes back, the stall is logged with
+its duration and stack and added to `offenders`, keyed by the innermost
+mastui frame, e.g. a synchronous API call in a screen callback.
+
+Stalls are logged at INFO: they belong in the `--debug` log file, while
+a WARNING would reach stderr, which the terminal UI draws on.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Event, Lock, Thread, get_ident
+from time import monotonic
+import asyncio
+import logging
+import sys
+import traceback
+
+log = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD_MS = 250.0
+STACK_DEPTH = 12
+SUMMARY_OFFENDERS = 10
+_PACKAGE_DIR = str(Path(__file__).parent)
+
+
+@dataclass
+class StallRecord:
+    """The stalls seen in one place."""
+
+    where: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    stack: list[str] = field(default_factory=list)
+
+
+def _offender(frames: list[traceback.FrameSummary]) -> str:
+    """Name the innermost mastui frame, or the innermost frame if none is ours."""
+    for frame in reversed(frames):
+        if frame.filename.startswith(_PACKAGE_DIR) and frame.filename != __file__:
+            break
+    else:
+        frame = frames[-1]
+    path = Path(frame.filename)
+    return f"{path.parent.name}/{path.name}:{frame.lineno} in {frame.name}"
+
+
+class StallWatchdog:
+    """Detects when the event loop doesn't tick for `threshold_ms`."""
+
+    def __init__(self, threshold_ms: float = DEFAULT_THRESHOLD_MS):
+        self.threshold_ms = threshold_ms
+        self.offenders: dict[str, StallRecord] = {}
+        self.stalls = 0
+        self._lock = Lock()
+        self._stopping = Event()
+        self._thread: Thread | None = None
+        self._handle: asyncio.TimerHandle | None = None
+        self._loop_thread_id = 0
+        self._last_tick = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def heartbeat_seconds(self) -> float:
+        return max(self.threshold_ms / 2000, 0.05)
+
+    def start(self, threshold_ms: float | None = None) -> None:
+        """Start watching the running event loop. Call it from the loop's thread."""
+        if threshold_ms is not None:
+            self.threshold_ms = threshold_ms
+        if self._thread is not None:
+            return
+        self._loop_thread_id = get_ident()
+        self._stopping.clear()
+        self._beat(asyncio.get_running_loop())
+        self._thread = Thread(target=self._watch, name="mastui-stall-watchdog", daemon=True)
+        self._thread.start()
+        log.debug(f"Stall watchdog started with a {self.threshold_ms:g} ms threshold")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._thread.join(timeout=1)
+        self._thread = None
+        self.log_summary()
+
+    def _beat(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._last_tick = monotonic()
+        self._handle = loop.call_later(self.heartbeat_seconds, self._beat, loop)
+
+    def _watch(self) -> None:
+        stalled_since = None
+        stack = None
+        while not self._stopping.wait(self.threshold_ms / 4000):
+            heartbeat = self.heartbeat_seconds
+            threshold = self.threshold_ms / 1000
+            last_tick = self._last_tick
+            if stalled_since is None:
+                if monotonic() - last_tick - heartbeat > threshold:
+                    stalled_since = last_tick
+                    stack = self._capture()
+            elif last_tick != stalled_since:
+                # The loop ran the heartbeat again: the stall is over.
+                self._record(stack, (last_tick - stalled_since - heartbeat) * 1000)
+                stalled_since = stack = None
+
+    def _capture(self) -> list[traceback.FrameSummary] | None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        return traceback.extract_stack(frame)
+
+    def _record(self, frames: list[traceback.FrameSummary] | None, duration_ms: float) -> None:
+        if not frames:
+            return
+        where = _offender(frames)
+        stack = traceback.format_list(frames[-STACK_DEPTH:])
+        with self._lock:
+            self.stalls += 1
+            record = self.offenders.get(where)
+            if record is None:
+                record = self.offenders[where] = StallRecord(where, stack=stack)
+            record.count += 1
+            record.total_ms += duration_ms
+            if duration_ms > record.max_ms:
+                record.max_ms = duration_ms
+                record.stack = stack
+        log.info(f"Event loop stalled for {duration_ms:.0f} ms in {where}:\n{''.join(stack)}")
+
+    def worst(self, count: int = SUMMARY_OFFENDERS) -> list[StallRecord]:
+        """The places that stalled the loop the longest in total."""
+        with self._lock:
+            records = list(self.offenders.values())
+        return sorted(records, key=lambda record: record.total_ms, reverse=True)[:count]
+
+    def log_summary(self) -> None:
+        if not self.stalls:
+            return
+        log.info(f"The event loop stalled {self.stalls} times; worst offenders:")
+        for record in self.worst():
+            log.info(
+                f"  {record.where}: {record.count} stalls, "
+                f"{record.total_ms:.0f} ms in total, {record.max_ms:.0f} ms at most"
+            )
+
+
+stall_watchdog = StallWatchdog()
@@ -11,16 +11,35 @@ from textual.widget import Widget
 from textual.containers import Vertical, Horizontal
 from textual import events, on
 from textual.message import Message
-from mastui.utils import get_full_content_md, format_datetime, to_markdown
-from mastui.filters import get_status_filter_warning
+from mastui.utils import format_datetime, to_markdown
+from mastui.view_models import (
+    StatusView,
+    build_status_view,
+    build_timeline_item,
+    parse_datetime,
+)
 from mastui.image import ImageWidget
 from mastui.messages import SelectPost, VoteOnPoll, ViewHashtag
+from mastui.render_cache import CachedLines, content_key
 import logging
 from datetime import datetime
+from rich.console import Group
+from rich.markdown import Markdown as RichMarkdown
 from rich.markup import escape as escape_markup
+from rich.measure import Measurement
+from rich.segment import Segment
+from rich.style import Style
+from rich.text import Text
 
 log = logging.getLogger(__name__)
 
+VISIBILITY_ICONS = {
+    "public": "🌐",
+    "unlisted": "🔑",
+    "private": "👥",
+    "direct": "🔒",
+}
+
 
 def safe_markup(text: str | None) -> str:
     """Escape user content for Static widgets that render Rich markup."""
@@ -172,14 +191,17 @@ class PollWidget(Vertical):
 class Post(Vertical):
     """A widget to display a single post."""
 
-    def __init__(self, post, timeline_id: str, **kwargs):
+    def __init__(self, post, timeline_id: str, view: StatusView | None = None, **kwargs):
         super().__init__(**kwargs)
         self.post = post
         self.timeline_id = timeline_id
         self.add_class("timeline-item")
         self.capture_mouse = True
         status_to_display = self.post.get("reblog") or self.post
-        self.created_at_str = format_datetime(status_to_display["created_at"])
+        # Timelines hand over a view built in the fetch worker; other screens
+        # still construct posts from raw data.
+        self.view = view or build_status_view(status_to_display)
+        self.created_at_str = self.view.created_at_str
 
     def on_mount(self):
         status_to_display = self.post.get("reblog") or self.post
@@ -212,19 +234,11 @@ class Post(Vertical):
                 classes="boost-header",
             )
 
-        spoiler_text = status_to_display.get("spoiler_text")
-        author_display_name = safe_markup(status_to_display["account"]["display_name"])
-        author_acct = safe_markup(status_to_display["account"]["acct"])
-        author = f"{author_display_name} (@{author_acct})"
-        self.border_title = safe_markup(author)
-        if spoiler_text:
-            self.border_title = safe_markup(spoiler_text)
-            self.border_subtitle = author
+        self._set_border_titles(status_to_display)
 
-        filter_warning = get_status_filter_warning(status_to_display)
-        if filter_warning:
-            yield Static(safe_markup(filter_warning), classes="filter-warning")
-        content_md = Markdown(get_full_content_md(status_to_display), open_links=False)
+        if self.view.filter_warning:
+            yield Static(safe_markup(self.view.filter_warning), classes="filter-warning")
+        content_md = Markdown(self.view.content_md, open_links=False)
         content_md.suppress_click = True
         content_md.can_focus = False
         yield content_md
@@ -236,10 +250,10 @@ class Post(Vertical):
                 post_id=status_to_display["id"],
             )
 
-        if self.app.config.image_support and status_to_display.get("media_attachments"):
-            for media in status_to_display["media_attachments"]:
-                if media["type"] == "image":
-                    yield ImageWidget(media["url"], self.app.config)
+        if self.app.config.image_support:
+            for media in self.view.media:
+                if media.type == "image":
+                    yield ImageWidget.for_media(media, self.app.config)
 
         with Horizontal(classes="post-footer"):
             yield LoadingIndicator(classes="action-spinner")
@@ -250,18 +264,26 @@ class Post(Vertical):
                 f"❤️ {status_to_display.get('favourites_count', 0)}",
                 id="like-count",
             )
-            yield Static(format_datetime(status_to_display["created_at"]), classes="timestamp")
-
-            visibility_icons = {
-                "public": "🌐",
-                "unlisted": "🔑",
-                "private": "👥",
-                "direct": "🔒",
-            }
+            yield Static(self.view.created_at_str, classes="timestamp")
+
             visibility = status_to_display.get("visibility")
-            vis_icon = visibility_icons.get(visibility, "")
+            vis_icon = VISIBILITY_ICONS.get(visibility, "")
             yield Static(vis_icon, classes="visibility-icon")
 
+    def _set_border_titles(self, status_to_display: dict) -> None:
+        spoiler_text = status_to_display.get("spoiler_text")
+        author_display_name = safe_markup(status_to_display["account"]["display_name"])
+        author_acct = safe_markup(status_to_display["account"]["acct"])
+        author = f"{author_display_name} (@{author_acct})"
+        self.border_title = safe_markup(author)
+        if spoiler_text:
+            self.border_title = safe_markup(spoiler_text)
+            self.border_subtitle = author
+
+    def activate(self) -> None:
+        """Called when the post becomes the selected item."""
+        pass
+
     def _focus_timeline(self) -> None:
         try:
             timeline = self.query_ancestor("Timeline")
@@ -291,6 +313,7 @@ class Post(Vertical):
     def update_from_post(self, post):
         self.post = post
         status_to_display = self.post.get("reblog") or self.post
+        self.view = build_status_view(status_to_display)
 
         # Update classes
         self.remove_class("favourited", "reblogged")
@@ -313,13 +336,12 @@ class Post(Vertical):
             md.remove()
         for warning in self.query(".filter-warning"):
             warning.remove()
-        filter_warning = get_status_filter_warning(status_to_display)
-        if filter_warning:
+        if self.view.filter_warning:
             self.mount(
-                Static(safe_markup(filter_warning), classes="filter-warning"),
+                Static(safe_markup(self.view.filter_warning), classes="filter-warning"),
                 before=self.query_one(".post-footer"),
             )
-        content_md = Markdown(get_full_content_md(status_to_display), open_links=False)
+        content_md = Markdown(self.view.content_md, open_links=False)
         content_md.suppress_click = True
         content_md.can_focus = False
         self.mount(content_md, before=self.query_one(".post-footer"))
@@ -341,7 +363,10 @@ class Post(Vertical):
     def on_markdown_link_clicked(self, event: Markdown.LinkClicked) -> None:
         """Handle a link being clicked in the Markdown."""
         event.stop()
-        href = event.href
+        self.open_link(event.href)
+
+    def open_link(self, href: str) -> None:
+        """Open a hashtag timeline for hashtag links, the browser for the rest."""
         # Heuristic to check if the link is a hashtag
         if "/tags/" in href:
             hashtag = href.split("/tags/")[-1].rstrip("/")
@@ -352,13 +377,171 @@ class Post(Vertical):
         self.app.action_link_clicked(href)
 
     def get_created_at(self) -> datetime | None:
-        status = self.post.get("reblog") or self.post
-        if status and "created_at" in status:
-            ts = status["created_at"]
-            if isinstance(ts, datetime):
-                return ts
-            return datetime.fromisoformat(ts.replace("Z", "+00:00"))
-        return None
+        return self.view.created_at
+
+
+class ClickableLinks:
+    """Turns the hyperlinks of a renderable into `open_link` click actions.
+
+    Textual handles the mouse itself, so terminal hyperlinks can't be
+    clicked; an `@click` meta runs `action_open_link` on the widget showing
+    the renderable instead.
+    """
+
+    def __init__(self, renderable):
+        self.renderable = renderable
+
+    def __rich_console__(self, console, options):
+        for segment in console.render(self.renderable, options):
+            style = segment.style
+            if style is not None and style.link:
+                href = style.link
+                style = style.update_link(None) + Style.from_meta({"@click": ("open_link", (href,))})
+                segment = Segment(segment.text, style, segment.control)
+            yield segment
+
+    def __rich_measure__(self, console, options) -> Measurement:
+        return Measurement.get(console, options, self.renderable)
+
+
+class CompactPostBody(Static):
+    """The single body widget of a `CompactPost`; its links open like a `Post`'s."""
+
+    def action_open_link(self, href: str) -> None:
+        self.parent.open_link(href)
+
+
+class CompactPost(Post):
+    """A post drawn as one pre-rendered Rich renderable.
+
+    A regular `Post` mounts a boost header, a `Markdown` widget (plus one
+    child per block), a poll, and a footer with a spinner and four labels.
+    The compact variant mounts a single body widget; the action spinner and
+    the interactive poll are only mounted when they are actually needed.
+    """
+
+    def compose(self):
+        status_to_display = self.post.get("reblog") or self.post
+        self._set_border_titles(status_to_display)
+        yield CompactPostBody(self.build_renderable(), classes="compact-post-body")
+
+        if self.app.config.image_support:
+            for media in self.view.media:
+                if media.type == "image":
+                    yield ImageWidget.for_media(media, self.app.config)
+
+    def build_renderable(self) -> Group:
+        """Build the header, body and footer of the post as one renderable."""
+        status_to_display = self.post.get("reblog") or self.post
+        parts = []
+
+        if self.post.get("reblog") is not None:
+            account = self.post["account"]
+            parts.append(
+                Text(
+                    f"🚀 Boosted by {account['display_name']} (@{account['acct']})",
+                    style="italic",
+                )
+            )
+        if self.view.filter_warning:
+            parts.append(Text(self.view.filter_warning, style="bold yellow"))
+
+        parts.append(
+            CachedLines(
+                ClickableLinks(RichMarkdown(self.view.content_md)),
+                key=content_key(status_to_display),
+                theme=self.app.theme,
+            )
+        )
+
+        poll = status_to_display.get("poll")
+        if poll:
+            parts.append(self._poll_summary(poll))
+
+        footer = Text(justify="center", style="dim")
+        footer.append(f"🚀 {status_to_display.get('reblogs_count', 0)}   ")
+        footer.append(f"❤️ {status_to_display.get('favourites_count', 0)}   ")
+        footer.append(self.view.created_at_str)
+        vis_icon = VISIBILITY_ICONS.get(status_to_display.get("visibility"), "")
+        if vis_icon:
+            footer.append(f" {vis_icon}")
+        parts.append(footer)
+        return Group(*parts)
+
+    def _poll_summary(self, poll: dict) -> Text:
+        total_votes = poll.get("votes_count", 0)
+        summary = Text()
+        if poll.get("voted") or poll.get("expired"):
+            summary.append("Poll Results:\n", style="bold")
+            own_votes = poll.get("own_votes") or []
+            for i, option in enumerate(poll.get("options", [])):
+                votes = option.get("votes_count") or 0
+                percentage = (votes / total_votes * 100) if total_votes > 0 else 0
+                prefix = "✓ " if i in own_votes else "  "
+                summary.append(
+                    f"{prefix}{option.get('title', '')} ({votes} votes, {percentage:.2f}%)\n"
+                )
+                summary.append(
+                    "█" * int(percentage / 2) + "\n",
+                    style="green" if i in own_votes else "blue",
+                )
+        else:
+            summary.append(
+                f"📊 Poll with {len(poll.get('options', []))} options, "
+                f"{total_votes} votes (select the post to vote)",
+                style="bold",
+            )
+        return summary
+
+    def _is_poll_open(self) -> bool:
+        status_to_display = self.post.get("reblog") or self.post
+        poll = status_to_display.get("poll")
+        return bool(poll) and not (poll.get("voted") or poll.get("expired"))
+
+    def activate(self) -> None:
+        """Mount the interactive poll the first time an open poll is selected."""
+        if not self._is_poll_open() or self.query(PollWidget):
+            return
+        body = self.query(".compact-post-body")
+        if not body:
+            # Selected before compose ran (e.g. the first item of a fresh page).
+            self.call_after_refresh(self.activate)
+            return
+        status_to_display = self.post.get("reblog") or self.post
+        self.mount(
+            PollWidget(
+                status_to_display["poll"],
+                timeline_id=self.timeline_id,
+                post_id=status_to_display["id"],
+            ),
+            after=body.first(),
+        )
+
+    def show_spinner(self):
+        if not self.query(".action-spinner"):
+            spinner = LoadingIndicator(classes="action-spinner compact-spinner")
+            spinner.display = True
+            self.mount(spinner)
+
+    def hide_spinner(self):
+        for spinner in self.query(".action-spinner"):
+            spinner.remove()
+
+    def update_from_post(self, post):
+        self.post = post
+        status_to_display = self.post.get("reblog") or self.post
+        self.view = build_status_view(status_to_display)
+
+        self.remove_class("favourited", "reblogged")
+        if status_to_display.get("favourited"):
+            self.add_class("favourited")
+        if status_to_display.get("reblogged"):
+            self.add_class("reblogged")
+
+        self.query_one(".compact-post-body", Static).update(self.build_renderable())
+        for poll_widget in self.query(PollWidget):
+            poll_widget.remove()
+        self.hide_spinner()
 
 
 class GapIndicator(Widget):
@@ -375,18 +558,21 @@ class GapIndicator(Widget):
 class Notification(Widget):
     """A widget to display a single notification."""
 
-    def __init__(self, notif, **kwargs):
+    def __init__(self, notif, view: StatusView | None = None, **kwargs):
         super().__init__(**kwargs)
         self.notif = notif
         self.add_class("timeline-item")
         self.capture_mouse = True
 
+        status = self.notif.get("status")
+        self.view = view or (build_status_view(status) if status else None)
         created_at = None
-        if self.notif["type"] == "mention":
-            created_at = self.notif["status"]["created_at"]
+        if self.notif["type"] == "mention" and self.view:
+            created_at = self.view.created_at
         else:
-            created_at = self.notif["created_at"]
-        self.created_at_str = format_datetime(created_at)
+            created_at = parse_datetime(self.notif["created_at"])
+        self.created_at = created_at
+        self.created_at_str = format_datetime(created_at) if created_at else ""
 
     def compose(self):
         notif_type = self.notif["type"]
@@ -395,32 +581,28 @@ class Notification(Widget):
         author_acct = safe_markup(f"@{author.get('acct', '')}")
         author_str = f"{author_display_name} ({author_acct})"
 
-        created_at = None
-        if self.notif["type"] == "mention":
-            created_at = self.notif["status"]["created_at"]
-        else:
-            created_at = self.notif["created_at"]
+        view = self.view
+        created_at_str = self.created_at_str
 
         if notif_type == "mention":
             status = self.notif["status"]
             spoiler_text = status.get("spoiler_text")
-            filter_warning = get_status_filter_warning(status)
 
             self.border_title = f"Mention from {author_str}"
             if spoiler_text:
                 self.border_title = safe_markup(spoiler_text)
                 self.border_subtitle = f"Mention from {author_str}"
 
-            if filter_warning:
-                yield Static(safe_markup(filter_warning), classes="filter-warning")
-            mention_md = Markdown(get_full_content_md(status), open_links=False)
+            if view.filter_warning:
+                yield Static(safe_markup(view.filter_warning), classes="filter-warning")
+            mention_md = Markdown(view.content_md, open_links=False)
             mention_md.suppress_click = True
             mention_md.can_focus = False
             yield mention_md
-            if self.app.config.image_support and status.get("media_attachments"):
-                for media in status["media_attachments"]:
-                    if media["type"] == "image":
-                        yield ImageWidget(media["url"], self.app.config)
+            if self.app.config.image_support:
+                for media in view.media:
+                    if media.type == "image":
+                        yield ImageWidget.for_media(media, self.app.config)
             with Horizontal(classes="post-footer"):
                 spinner = LoadingIndicator(classes="action-spinner")
                 spinner.display = False
@@ -431,52 +613,50 @@ class Notification(Widget):
                 yield Static(
                     f"❤️ {status.get('favourites_count', 0)}", id="like-count"
                 )
-                yield Static(format_datetime(created_at), classes="timestamp")
+                yield Static(created_at_str, classes="timestamp")
 
         elif notif_type == "favourite":
             status = self.notif["status"]
-            filter_warning = get_status_filter_warning(status)
             self.border_title = f"❤️ {author_str} favourited your post:"
-            if filter_warning:
-                yield Static(safe_markup(filter_warning), classes="filter-warning")
-            fav_md = Markdown(get_full_content_md(status), open_links=False)
+            if view.filter_warning:
+                yield Static(safe_markup(view.filter_warning), classes="filter-warning")
+            fav_md = Markdown(view.content_md, open_links=False)
             fav_md.suppress_click = True
             fav_md.can_focus = False
             yield fav_md
-            if self.app.config.image_support and status.get("media_attachments"):
-                for media in status["media_attachments"]:
-                    if media["type"] == "image":
-                        yield ImageWidget(media["url"], self.app.config)
+            if self.app.config.image_support:
+                for media in view.media:
+                    if media.type == "image":
+                        yield ImageWidget.for_media(media, self.app.config)
             with Horizontal(classes="post-footer"):
                 spinner = LoadingIndicator(classes="action-spinner")
                 spinner.display = False
                 yield spinner
-                yield Static(format_datetime(created_at), classes="timestamp")
+                yield Static(created_at_str, classes="timestamp")
 
         elif notif_type == "reblog":
             status = self.notif["status"]
-            filter_warning = get_status_filter_warning(status)
             self.border_title = f"🚀 {author_str} boosted your post:"
-            if filter_warning:
-                yield Static(safe_markup(filter_warning), classes="filter-warning")
-            reblog_md = Markdown(get_full_content_md(status), open_links=False)
+            if view.filter_warning:
+                yield Static(safe_markup(view.filter_warning), classes="filter-warning")
+            reblog_md = Markdown(view.content_md, open_links=False)
             reblog_md.suppress_click = True
             reblog_md.can_focus = False
             yield reblog_md
-            if self.app.config.image_support and status.get("media_attachments"):
-                for media in status["media_attachments"]:
-                    if media["type"] == "image":
-                        yield ImageWidget(media["url"], self.app.config)
+            if self.app.config.image_support:
+                for media in view.media:
+                    if media.type == "image":
+                        yield ImageWidget.for_media(media, self.app.config)
             with Horizontal(classes="post-footer"):
                 spinner = LoadingIndicator(classes="action-spinner")
                 spinner.display = False
                 yield spinner
-                yield Static(format_datetime(created_at), classes="timestamp")
+                yield Static(created_at_str, classes="timestamp")
 
         elif notif_type == "follow":
             self.border_title = f"👋 {author_str} followed you."
             with Horizontal(classes="post-footer"):
-                yield Static(format_datetime(created_at), classes="timestamp")
+                yield Static(created_at_str, classes="timestamp")
 
         elif notif_type == "poll":
             status = self.notif.get("status")
@@ -484,7 +664,7 @@ class Notification(Widget):
                 self.border_title = "📊 A poll you participated in has ended"
                 yield Static("(The original post appears to have been deleted.)")
                 with Horizontal(classes="post-footer"):
-                    yield Static(format_datetime(created_at), classes="timestamp")
+                    yield Static(created_at_str, classes="timestamp")
                 return
 
             self.border_title = "📊 A poll you participated in has ended:"
@@ -495,29 +675,28 @@ class Notification(Widget):
                 spinner = LoadingIndicator(classes="action-spinner")
                 spinner.display = False
                 yield spinner
-                yield Static(format_datetime(created_at), classes="timestamp")
+                yield Static(created_at_str, classes="timestamp")
         elif notif_type == "update":
             status = self.notif["status"]
-            filter_warning = get_status_filter_warning(status)
             self.border_title = (
                 f"✍️ A post by {author_str} you interacted with was updated"
             )
             self.border_subtitle = f"{author_str}"
-            if filter_warning:
-                yield Static(safe_markup(filter_warning), classes="filter-warning")
-            update_md = Markdown(get_full_content_md(status))
+            if view.filter_warning:
+                yield Static(safe_markup(view.filter_warning), classes="filter-warning")
+            update_md = Markdown(view.content_md)
             update_md.suppress_click = True
             update_md.can_focus = False
             yield update_md
-            if self.app.config.image_support and status.get("media_attachments"):
-                for media in status["media_attachments"]:
-                    if media["type"] == "image":
-                        yield ImageWidget(media["url"], self.app.config)
+            if self.app.config.image_support:
+                for media in view.media:
+                    if media.type == "image":
+                        yield ImageWidget.for_media(media, self.app.config)
             with Horizontal(classes="post-footer"):
                 spinner = LoadingIndicator(classes="action-spinner")
                 spinner.display = False
                 yield spinner
-                yield Static(format_datetime(created_at), classes="timestamp")
+                yield Static(created_at_str, classes="timestamp")
 
         else:
             yield Static(f"Unsupported notification type: {safe_markup(notif_type)}")
@@ -559,6 +738,7 @@ class Notification(Widget):
         status = post.get("reblog") or post
         if self.notif.get("status"):
             self.notif["status"] = status
+            self.view = build_status_view(status)
 
         if self.notif["type"] == "mention":
             self.query_one("#boost-count").update(
@@ -571,20 +751,7 @@ class Notification(Widget):
 
     def get_created_at(self) -> datetime | None:
         """Expose the creation time for timeline sorting and gap detection."""
-        created_at = None
-        if self.notif["type"] == "mention" and self.notif.get("status"):
-            created_at = self.notif["status"].get("created_at")
-        else:
-            created_at = self.notif.get("created_at")
-
-        if not created_at:
-            return None
-        if isinstance(created_at, datetime):
-            return created_at
-        try:
-            return datetime.fromisoformat(str(created_at).replace("Z", "+00:00"))
-        except Exception:
-            return None
+        return self.created_at
 
     @on(Markdown.LinkClicked)
     def on_markdown_link_clicked(self, event: Markdown.LinkClicked) -> None:
@@ -653,9 +820,10 @@ class StatusResult(SearchResult):
 class ConversationSummary(Widget, can_focus=True):
     """A widget to display a conversation summary."""
 
-    def __init__(self, conversation: dict, **kwargs):
+    def __init__(self, conversation: dict, snippet: str | None = None, **kwargs):
         super().__init__(**kwargs)
         self.conversation = conversation
+        self.snippet = snippet
         self.add_class("timeline-item")
         self.capture_mouse = True
         if conversation.get("unread"):
@@ -684,10 +852,9 @@ class ConversationSummary(Widget, can_focus=True):
         self.border_title = f"{icon} DM with {participant_names}"
 
         if last_status:
-            snippet = to_markdown(last_status.get("content", ""))
-            # Truncate snippet to a reasonable length
-            if len(snippet) > 100:
-                snippet = snippet[:97] + "..."
+            snippet = self.snippet
+            if snippet is None:
+                snippet = build_timeline_item("direct", self.conversation).snippet_md
             snippet_md = Markdown(snippet, open_links=False)
             snippet_md.suppress_click = True
             snippet_md.can_focus = False